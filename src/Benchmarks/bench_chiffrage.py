@@ -0,0 +1,216 @@
+import sys
+import os
+import json
+import time
+import platform
+import subprocess
+import tracemalloc
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.Composants import Algorithme_de_chiffrage
+from src.Composants.Algorithme_de_chiffrage import RSA
+from src.Composants.Oignon import construit_oignon
+
+TAILLES_CLÉ: list[int] = [1024, 2048, 3072]
+TAILLES_MESSAGE: list[int] = [64, 1024, 4096, 16384]
+FORMATS: list[str] = ["texte", "binaire", "hybride"]
+# L'ancien format texte grossit d'environ x2.4 par saut: au-delà de 4 sauts la mesure n'a plus de sens
+SAUTS_MAX_TEXTE: int = 4
+
+def percentile(valeurs: list[float], p: float) -> float:
+    """
+    Percentile (méthode du rang le plus proche) d'une liste de mesures
+
+    Args:
+        valeurs (list[float]): Les mesures
+        p (float): Le percentile voulu, entre 0 et 100
+    """
+    triées: list[float] = sorted(valeurs)
+    rang: int = max(0, min(len(triées) - 1, round(p / 100 * len(triées) + 0.5) - 1))
+    return triées[rang]
+
+def mesure(fonction, répétitions: int) -> dict:
+    """
+    Appelle une fonction plusieurs fois et résume latences, débit et pic mémoire
+
+    Args:
+        fonction (callable): La fonction à mesurer, sa valeur de retour est conservée
+        répétitions (int): Nombre d'appels
+
+    Returns:
+        dict: ops_par_sec, p50_ms, p99_ms, pic_memoire_octets et le dernier résultat
+    """
+    durées: list[float] = []
+    for _ in range(répétitions):
+        début: float = time.perf_counter()
+        fonction()
+        durées.append(time.perf_counter() - début)
+    # Le pic mémoire est mesuré sur un appel à part: tracemalloc fausserait les latences
+    tracemalloc.start()
+    résultat = fonction()
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "ops_par_sec": round(len(durées) / sum(durées), 3) if sum(durées) else None,
+        "p50_ms": round(percentile(durées, 50) * 1000, 4),
+        "p99_ms": round(percentile(durées, 99) * 1000, 4),
+        "pic_memoire_octets": pic,
+        "resultat": résultat,
+    }
+
+def bench_clés(taille_clé: int, répétitions: int) -> dict:
+    """
+    Mesure RSA.generate_keys pour une taille de clé
+
+    Args:
+        taille_clé (int): Taille de la clé en bits
+        répétitions (int): Nombre de clés générées
+    """
+    r: dict = mesure(lambda: RSA(taille_clé).generate_keys(), répétitions)
+    r.pop("resultat")
+    return {"operation": "generate_keys", "taille_cle": taille_clé, **r}
+
+def bench_chiffrement(cipher: RSA, format_fil: str, taille_message: int, répétitions: int) -> list[dict]:
+    """
+    Mesure le chiffrement et le déchiffrement d'un message pour un format donné
+
+    Args:
+        cipher (RSA): Chiffreur avec sa paire de clés
+        format_fil (str): "texte", "binaire" ou "hybride"
+        taille_message (int): Taille du message en octets
+        répétitions (int): Nombre d'opérations
+    """
+    message: bytes = (b"SAE3.02 " * (taille_message // 8 + 1))[:taille_message]
+    if format_fil == "texte":
+        chiffre = lambda: cipher.encrypt(message.decode('ascii'), cipher.clé_publique)
+        déchiffre = cipher.decrypt
+    elif format_fil == "binaire":
+        chiffre = lambda: cipher.encrypt_binaire(message, cipher.clé_publique)
+        déchiffre = cipher.decrypt_binaire
+    else:
+        chiffre = lambda: cipher.encrypt_hybride(message, cipher.clé_publique)
+        déchiffre = cipher.decrypt_hybride
+
+    commun: dict = {"format": format_fil, "taille_cle": cipher.taille_clé, "taille_message": taille_message}
+    chiffrement: dict = mesure(chiffre, répétitions)
+    chiffré = chiffrement.pop("resultat")
+    déchiffrement: dict = mesure(lambda: déchiffre(chiffré), répétitions)
+    déchiffrement.pop("resultat")
+    return [
+        {"operation": "encrypt", **commun, "ratio_expansion": round(len(chiffré) / taille_message, 3), **chiffrement},
+        {"operation": "decrypt", **commun, **déchiffrement},
+    ]
+
+def bench_oignon(chemin_complet: list[dict], format_fil: str, sauts: int, répétitions: int) -> dict:
+    """
+    Mesure la construction d'un oignon comme le fait ApplicationClient.envoie_message
+
+    Args:
+        chemin_complet (list[dict]): Routeurs disponibles (au moins `sauts`)
+        format_fil (str): Format des couches
+        sauts (int): Nombre de routeurs sur le chemin
+        répétitions (int): Nombre de constructions
+    """
+    message: str = "Bonjour à travers le réseau en oignon"
+    chemin: list[dict] = chemin_complet[:sauts]
+    r: dict = mesure(lambda: construit_oignon(RSA(), chemin, "127.0.0.1", 8002, message, format_fil), répétitions)
+    paquet: bytes = r.pop("resultat")
+    return {"operation": "oignon", "format": format_fil, "sauts": sauts, "taille_paquet": len(paquet),
+            "ratio_expansion": round(len(paquet) / len(message.encode('utf-8')), 3), **r}
+
+def identifiant_commit() -> str | None:
+    """
+    Commit courant du dépôt, pour comparer les résultats d'une version à l'autre
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=project_root, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def lance(tailles_clé: list[int], tailles_message: list[int], répétitions: int, sauts_max: int) -> dict:
+    """
+    Lance toute la suite et renvoie le rapport
+
+    Args:
+        tailles_clé (list[int]): Tailles de clé mesurées
+        tailles_message (list[int]): Tailles de message mesurées
+        répétitions (int): Nombre d'opérations par mesure
+        sauts_max (int): Nombre de sauts maximal pour la construction d'oignons
+    """
+    résultats: list[dict] = []
+    for taille_clé in tailles_clé:
+        print(f"Info: Mesures pour {taille_clé} bits...", file=sys.stderr)
+        résultats.append(bench_clés(taille_clé, max(2, répétitions // 10)))
+        cipher: RSA = RSA(taille_clé)
+        cipher.generate_keys()
+        for format_fil in FORMATS:
+            for taille_message in tailles_message:
+                résultats.extend(bench_chiffrement(cipher, format_fil, taille_message, répétitions))
+
+    print(f"Info: Construction d'oignons de 1 à {sauts_max} sauts...", file=sys.stderr)
+    chemin: list[dict] = []
+    for i in range(sauts_max):
+        routeur: RSA = RSA()
+        routeur.generate_keys()
+        chemin.append({"id": f"R{i}", "ip": "127.0.0.1", "port": 8010 + i, "key": routeur.clé_publique})
+    for format_fil in ["cellule"] + FORMATS:
+        for sauts in range(1, sauts_max + 1):
+            if format_fil == "texte" and sauts > SAUTS_MAX_TEXTE:
+                break
+            résultats.append(bench_oignon(chemin, format_fil, sauts, répétitions))
+
+    return {
+        "meta": {
+            "commit": identifiant_commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "moteur": Algorithme_de_chiffrage.MOTEUR.nom,
+            "repetitions": répétitions,
+        },
+        "resultats": résultats,
+    }
+
+USAGE: str = "Usage: python bench_chiffrage.py [-r répétitions] [-k 1024,2048,3072] [-t 64,1024,4096,16384] [-s sauts_max] [-o sortie.json]"
+
+if __name__ == "__main__":
+    répétitions: int = 20
+    tailles_clé: list[int] = TAILLES_CLÉ
+    tailles_message: list[int] = TAILLES_MESSAGE
+    sauts_max: int = 10
+    sortie: str | None = None
+
+    i = 1
+    while i < len(sys.argv):
+        arg = sys.argv[i]
+        if arg == "-r" and i + 1 < len(sys.argv):
+            répétitions = int(sys.argv[i + 1])
+            i += 1
+        elif arg == "-k" and i + 1 < len(sys.argv):
+            tailles_clé = [int(x) for x in sys.argv[i + 1].split(',')]
+            i += 1
+        elif arg == "-t" and i + 1 < len(sys.argv):
+            tailles_message = [int(x) for x in sys.argv[i + 1].split(',')]
+            i += 1
+        elif arg == "-s" and i + 1 < len(sys.argv):
+            sauts_max = int(sys.argv[i + 1])
+            i += 1
+        elif arg == "-o" and i + 1 < len(sys.argv):
+            sortie = sys.argv[i + 1]
+            i += 1
+        elif arg in ["-h", "--help"]:
+            print(USAGE)
+            sys.exit(0)
+        i += 1
+
+    rapport: dict = lance(tailles_clé, tailles_message, répétitions, sauts_max)
+    if sortie:
+        with open(sortie, 'w', encoding='utf-8') as f:
+            json.dump(rapport, f, indent=2, ensure_ascii=False)
+        print(f"Info: Résultats écrits dans {sortie}", file=sys.stderr)
+    else:
+        print(json.dumps(rapport, indent=2, ensure_ascii=False))
@@ -0,0 +1,63 @@
+import sys
+import os
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, "../.."))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.Composants import Algorithme_de_chiffrage
+from src.Composants.Algorithme_de_chiffrage import RSA, choisit_moteur, gmpy2
+
+def mesure(fonction, répétitions: int) -> float:
+    """
+    Temps moyen d'un appel en millisecondes
+
+    Args:
+        fonction (callable): La fonction à mesurer
+        répétitions (int): Nombre d'appels
+    """
+    début: float = time.perf_counter()
+    for _ in range(répétitions):
+        fonction()
+    return (time.perf_counter() - début) * 1000 / répétitions
+
+def bench_moteur(nom: str, taille_clé: int, répétitions: int) -> dict:
+    """
+    Mesure génération de clé, chiffrement et déchiffrement pour un moteur donné
+
+    Args:
+        nom (str): "python" ou "gmpy2"
+        taille_clé (int): Taille de la clé en bits
+        répétitions (int): Nombre d'opérations par mesure
+    """
+    choisit_moteur(nom)
+    cipher: RSA = RSA(taille_clé)
+    génération: float = mesure(cipher.generate_keys, max(1, répétitions // 20))
+    message: bytes = os.urandom(4096)
+    chiffré: bytes = cipher.encrypt_binaire(message, cipher.clé_publique)
+    return {
+        "moteur": nom,
+        "taille_clé": taille_clé,
+        "generate_keys_ms": round(génération, 3),
+        "encrypt_4ko_ms": round(mesure(lambda: cipher.encrypt_binaire(message, cipher.clé_publique), répétitions), 3),
+        "decrypt_4ko_ms": round(mesure(lambda: cipher.decrypt_binaire(chiffré), répétitions), 3),
+        "operation_privee_ms": round(mesure(lambda: cipher.déchiffre_entier(12345678901234567890), répétitions * 10), 3),
+    }
+
+if __name__ == "__main__":
+    répétitions: int = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    moteurs: list[str] = ["python"] + (["gmpy2"] if gmpy2 else [])
+    if not gmpy2:
+        print("Info: gmpy2 non installé, seul le moteur Python est mesuré (pip install gmpy2)")
+    moteur_initial: str = Algorithme_de_chiffrage.MOTEUR.nom
+
+    for taille in (1024, 2048, 3072):
+        résultats: list[dict] = [bench_moteur(nom, taille, répétitions) for nom in moteurs]
+        for r in résultats:
+            print(f"{r['moteur']:>7} {taille} bits | keygen {r['generate_keys_ms']:>9} ms | encrypt 4Ko {r['encrypt_4ko_ms']:>8} ms | "
+                  f"decrypt 4Ko {r['decrypt_4ko_ms']:>8} ms | op. privée {r['operation_privee_ms']:>7} ms")
+        if len(résultats) == 2:
+            print(f"        accélération gmpy2: x{résultats[0]['decrypt_4ko_ms'] / résultats[1]['decrypt_4ko_ms']:.2f} (decrypt)")
+    choisit_moteur(moteur_initial)
@@ -1,5 +1,271 @@
-import sympy
-from typing import Tuple, List
+import struct
+import hashlib
+import hmac
+import math
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, List, Iterator
+
+try:
+    import gmpy2  # Optionnel: accélère fortement les opérations sur les grands entiers
+except ImportError:
+    gmpy2 = None
+# gmpy2 >= 2.2 convertit directement entre octets et mpz, sans passer par un int Python
+MPZ_OCTETS: bool = gmpy2 is not None and hasattr(gmpy2.mpz, "from_bytes")
+
+# Format binaire: version (1 octet) | largeur d'un bloc chiffré (2 octets) | taille du clair (4 octets) | blocs
+VERSION_BINAIRE: int = 1
+# Format hybride: même entête | clé de session chiffrée en RSA (1 bloc) | tag HMAC | corps chiffré par flux
+VERSION_HYBRIDE: int = 2
+ENTÊTE_BINAIRE: struct.Struct = struct.Struct(">BHI")
+TAILLE_CLÉ_SESSION: int = 32
+TAILLE_TAG: int = 16
+
+def crible_petits_premiers(limite: int) -> list[int]:
+    """
+    Crible d'Ératosthène, utilisé pour filtrer les candidats avant Miller-Rabin
+
+    Args:
+        limite (int): Borne supérieure (exclue)
+    """
+    est_premier: bytearray = bytearray([1]) * limite
+    est_premier[0:2] = b"\x00\x00"
+    for i in range(2, int(limite ** 0.5) + 1):
+        if est_premier[i]:
+            est_premier[i*i::i] = bytes(len(range(i*i, limite, i)))
+    return [i for i in range(limite) if est_premier[i]]
+
+PETITS_PREMIERS: list[int] = crible_petits_premiers(2000)
+# Produit des petits premiers: un seul gcd suffit pour éliminer la majorité des candidats
+PRODUIT_PETITS_PREMIERS: int = math.prod(PETITS_PREMIERS)
+TOURS_MILLER_RABIN: int = 20
+
+def est_probablement_premier(n: int, tours: int = TOURS_MILLER_RABIN) -> bool:
+    """
+    Test de primalité de Miller-Rabin
+
+    Args:
+        n (int): L'entier à tester
+        tours (int): Nombre de bases aléatoires testées
+    """
+    if n < 2:
+        return False
+    if n <= PETITS_PREMIERS[-1]:
+        return n in PETITS_PREMIERS
+    if math.gcd(n, PRODUIT_PETITS_PREMIERS) != 1:
+        return False
+
+    d: int = n - 1
+    r: int = 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    for _ in range(tours):
+        a: int = secrets.randbelow(n - 3) + 2
+        x: int = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+def génère_premier(bits: int) -> int:
+    """
+    Génère un nombre premier aléatoire d'exactement `bits` bits (les deux bits de poids fort sont forcés
+    pour que le produit de deux premiers fasse bien 2*bits bits)
+
+    Args:
+        bits (int): Taille du premier en bits
+    """
+    while True:
+        candidat: int = secrets.randbits(bits) | (0b11 << (bits - 2)) | 1
+        # On parcourt les impairs suivants avant de retirer un nouveau candidat
+        while candidat.bit_length() == bits:
+            if math.gcd(candidat, PRODUIT_PETITS_PREMIERS) == 1 and MOTEUR.est_premier(candidat):
+                return candidat
+            candidat += 2
+
+class MoteurPython:
+    """
+    Moteur de calcul sur les grands entiers basé uniquement sur les entiers natifs de Python
+    """
+    nom: str = "python"
+
+    def pow_mod(self, base: int, exposant: int, modulo: int) -> int:
+        """Exponentiation modulaire"""
+        return pow(base, exposant, modulo)
+
+    def inverse(self, a: int, modulo: int) -> int:
+        """Inverse modulaire"""
+        return pow(a, -1, modulo)
+
+    def est_premier(self, n: int) -> bool:
+        """Test de primalité"""
+        return est_probablement_premier(n)
+
+    def depuis_octets(self, données: bytes) -> int:
+        """Conversion octets (big-endian) vers entier"""
+        return int.from_bytes(données, 'big')
+
+    def vers_octets(self, entier: int, taille: int) -> bytes:
+        """Conversion entier vers octets (big-endian, taille fixe)"""
+        return entier.to_bytes(taille, 'big')
+
+class MoteurGmpy2(MoteurPython):
+    """
+    Moteur de calcul s'appuyant sur GMP via gmpy2. Un entier lu par depuis_octets reste un mpz jusqu'à vers_octets
+    (chiffrement et déchiffrement sans aucun passage par un int Python), les autres résultats sont reconvertis en int
+    """
+    nom: str = "gmpy2"
+
+    def pow_mod(self, base: int, exposant: int, modulo: int) -> int:
+        """Exponentiation modulaire (GMP), mpz si la base en est un"""
+        résultat = gmpy2.powmod(base, exposant, modulo)
+        return résultat if isinstance(base, gmpy2.mpz) else int(résultat)
+
+    def inverse(self, a: int, modulo: int) -> int:
+        """Inverse modulaire (GMP)"""
+        return int(gmpy2.invert(a, modulo))
+
+    def est_premier(self, n: int) -> bool:
+        """Test de primalité (GMP)"""
+        return bool(gmpy2.is_prime(n, TOURS_MILLER_RABIN))
+
+    def depuis_octets(self, données: bytes) -> int:
+        """Conversion octets (big-endian) vers mpz (int Python avant gmpy2 2.2)"""
+        if MPZ_OCTETS:
+            return gmpy2.mpz.from_bytes(données, 'big')
+        return int.from_bytes(données, 'big')
+
+    def vers_octets(self, entier: int, taille: int) -> bytes:
+        """Conversion int ou mpz vers octets (big-endian, taille fixe), par GMP pour un mpz"""
+        return entier.to_bytes(taille, 'big')
+
+MOTEURS: dict[str, type] = {"python": MoteurPython, "gmpy2": MoteurGmpy2}
+MOTEUR: MoteurPython = MoteurGmpy2() if gmpy2 else MoteurPython()
+
+def choisit_moteur(nom: str) -> MoteurPython:
+    """
+    Force le moteur de calcul utilisé par tout le module
+
+    Args:
+        nom (str): "python" ou "gmpy2"
+
+    Raises:
+        ValueError: Moteur inconnu ou gmpy2 non installé
+    """
+    global MOTEUR
+    if nom not in MOTEURS:
+        raise ValueError(f"Moteur inconnu: {nom}")
+    if nom == "gmpy2" and gmpy2 is None:
+        raise ValueError("gmpy2 n'est pas installé")
+    MOTEUR = MOTEURS[nom]()
+    return MOTEUR
+
+def chiffre_entier(m_int: int, clé_publique: Tuple[int, int]) -> int:
+    """
+    Opération publique RSA sur un entier
+
+    Args:
+        m_int (int): L'entier en clair
+        clé_publique (Tuple[int, int]): La clé publique (n, e)
+    """
+    n, e = clé_publique
+    return MOTEUR.pow_mod(m_int, e, n)
+
+def est_format_binaire(données: bytes) -> bool:
+    """
+    Indique si des données reçues utilisent un format binaire (l'ancien format texte commence toujours par un chiffre)
+
+    Args:
+        données (bytes): Les données reçues
+    """
+    return len(données) >= ENTÊTE_BINAIRE.size and données[0] in (VERSION_BINAIRE, VERSION_HYBRIDE)
+
+def flux_de_clé(clé: bytes, taille: int) -> bytes:
+    """
+    Génère un flux pseudo-aléatoire à partir d'une clé (SHAKE-256)
+
+    Args:
+        clé (bytes): La clé du flux
+        taille (int): Nombre d'octets voulus
+    """
+    return hashlib.shake_256(b"flux|" + clé).digest(taille)
+
+def xor_octets(a: bytes, b: bytes) -> bytes:
+    """
+    XOR de deux suites d'octets de même taille, en passant par les entiers pour rester rapide en Python pur
+
+    Args:
+        a (bytes): Première suite
+        b (bytes): Seconde suite
+    """
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+def calcule_tag(clé: bytes, *morceaux: bytes) -> bytes:
+    """
+    Calcule le tag d'intégrité HMAC-SHA256 (tronqué) d'une couche hybride
+
+    Args:
+        clé (bytes): La clé de session
+        *morceaux (bytes): Les données à authentifier, à la suite (évite de les recoller)
+    """
+    mac = hmac.new(b"mac|" + clé, digestmod=hashlib.sha256)
+    for morceau in morceaux:
+        mac.update(morceau)
+    return mac.digest()[:TAILLE_TAG]
+
+def déchiffre_crt(c_int: int, clé_crt: Tuple[int, int, int, int, int]) -> int:
+    """
+    Opération privée RSA avec le théorème des restes chinois
+
+    Args:
+        c_int (int): L'entier chiffré
+        clé_crt (Tuple[int, int, int, int, int]): (p, q, dP, dQ, qInv)
+    """
+    p, q, dP, dQ, qInv = clé_crt
+    m1: int = MOTEUR.pow_mod(c_int % p, dP, p)
+    m2: int = MOTEUR.pow_mod(c_int % q, dQ, q)
+    h: int = (qInv * (m1 - m2)) % p
+    return m2 + h * q
+
+def _déchiffre_lot(blocs: list[int], clé_crt: Tuple[int, int, int, int, int]) -> list[int]:
+    """Déchiffre un lot de blocs dans un processus du pool (doit rester au niveau du module pour être picklable)"""
+    return [déchiffre_crt(c_int, clé_crt) for c_int in blocs]
+
+# Pool de processus partagé par toutes les instances de RSA, désactivé par défaut
+_exécuteur_parallèle: ProcessPoolExecutor | None = None
+_processus_parallèles: int = 0
+SEUIL_PARALLÈLE: int = 16
+_seuil_parallèle: int = SEUIL_PARALLÈLE
+
+def active_déchiffrement_parallèle(processus: int = 0, seuil: int = SEUIL_PARALLÈLE) -> None:
+    """
+    Active le déchiffrement des gros messages sur plusieurs processus (contourne le GIL pour les modexp)
+
+    Args:
+        processus (int): Nombre de processus du pool (0 = nombre de cœurs)
+        seuil (int): Nombre de blocs à partir duquel le pool est utilisé
+    """
+    global _exécuteur_parallèle, _processus_parallèles, _seuil_parallèle
+    arrête_déchiffrement_parallèle()
+    _processus_parallèles = processus or os.cpu_count() or 1
+    _seuil_parallèle = max(2, seuil)
+    _exécuteur_parallèle = ProcessPoolExecutor(max_workers=_processus_parallèles)
+
+def arrête_déchiffrement_parallèle() -> None:
+    """
+    Arrête le pool de processus s'il est actif
+    """
+    global _exécuteur_parallèle
+    if _exécuteur_parallèle:
+        _exécuteur_parallèle.shutdown(wait=False, cancel_futures=True)
+        _exécuteur_parallèle = None
 
 class RSA:
     def __init__(self, taille_clé: int = 1024):
@@ -12,6 +278,8 @@ class RSA:
         self.taille_clé = taille_clé
         self.clé_publique: Tuple[int, int] = None
         self.clé_privé: Tuple[int, int] = None
+        # Paramètres CRT (p, q, dP, dQ, qInv) pour accélérer les opérations privées
+        self.clé_crt: Tuple[int, int, int, int, int] = None
 
     def generate_keys(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
         """
@@ -20,17 +288,109 @@ class RSA:
         Returns:
             Tuple[Tuple[int, int], Tuple[int, int]]: (clé_publique, clé_privée)
         """
-        p: int = sympy.randprime(2**(self.taille_clé//2 - 1), 2**(self.taille_clé//2))
-        q: int = sympy.randprime(2**(self.taille_clé//2 - 1), 2**(self.taille_clé//2))
+        e: int = 65537
+        p: int = génère_premier(self.taille_clé // 2)
+        while math.gcd(e, p - 1) != 1:
+            p = génère_premier(self.taille_clé // 2)
+        q: int = génère_premier(self.taille_clé // 2)
+        while q == p or math.gcd(e, q - 1) != 1:
+            q = génère_premier(self.taille_clé // 2)
         n: int = p * q
         phi: int = (p - 1) * (q - 1)
-        e: int = 65537
-        d: int = pow(e, -1, phi)
+        d: int = MOTEUR.inverse(e, phi)
         
         self.clé_publique = (n, e)
         self.clé_privé = (n, d)
+        self.clé_crt = (p, q, d % (p - 1), d % (q - 1), MOTEUR.inverse(q, p))
+        return self.clé_publique, self.clé_privé
+
+    def exporte_clés(self) -> dict:
+        """
+        Exporte la paire de clés (avec p et q) sous forme de dictionnaire sérialisable
+
+        Returns:
+            dict: Les paramètres de la clé
+        """
+        if not self.clé_privé or not self.clé_crt:
+            raise ValueError("Pas de clé privée")
+        return {
+            "taille_clé": self.taille_clé,
+            "n": self.clé_publique[0],
+            "e": self.clé_publique[1],
+            "d": self.clé_privé[1],
+            "p": self.clé_crt[0],
+            "q": self.clé_crt[1],
+        }
+
+    def importe_clés(self, paramètres: dict) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """
+        Recharge une paire de clés exportée par exporte_clés et recalcule les paramètres CRT
+
+        Args:
+            paramètres (dict): Les paramètres de la clé
+
+        Raises:
+            ValueError: Clé incohérente
+
+        Returns:
+            Tuple[Tuple[int, int], Tuple[int, int]]: (clé_publique, clé_privée)
+        """
+        n, e, d, p, q = (int(paramètres[x]) for x in ("n", "e", "d", "p", "q"))
+        if p * q != n or (e * d) % ((p - 1) * (q - 1)) != 1:
+            raise ValueError("Clé incohérente")
+        self.taille_clé = int(paramètres.get("taille_clé", n.bit_length()))
+        self.clé_publique = (n, e)
+        self.clé_privé = (n, d)
+        self.clé_crt = (p, q, d % (p - 1), d % (q - 1), MOTEUR.inverse(q, p))
         return self.clé_publique, self.clé_privé
 
+    def déchiffre_entier(self, c_int: int) -> int:
+        """
+        Opération privée sur un entier, avec le théorème des restes chinois si p et q sont connus
+
+        Args:
+            c_int (int): L'entier chiffré
+
+        Returns:
+            int: L'entier déchiffré
+        """
+        if not self.clé_crt:
+            n, d = self.clé_privé
+            return MOTEUR.pow_mod(c_int, d, n)
+        return déchiffre_crt(c_int, self.clé_crt)
+
+    def déchiffre_blocs_flux(self, blocs: list[int]) -> Iterator[int]:
+        """
+        Déchiffre des blocs indépendants au fur et à mesure, en parallèle (par lots) si le pool est actif et le message assez gros
+
+        Args:
+            blocs (list[int]): Les entiers chiffrés
+
+        Yields:
+            int: Les entiers déchiffrés, dans le même ordre
+        """
+        exécuteur = _exécuteur_parallèle
+        if exécuteur is None or not self.clé_crt or len(blocs) < _seuil_parallèle:
+            for c_int in blocs:
+                yield self.déchiffre_entier(c_int)
+            return
+        taille_lot: int = -(-len(blocs) // _processus_parallèles)
+        lots = [blocs[i:i+taille_lot] for i in range(0, len(blocs), taille_lot)]
+        for lot in exécuteur.map(_déchiffre_lot, lots, [self.clé_crt] * len(lots)):
+            yield from lot
+
+    def déchiffre_blocs(self, blocs: list[int]) -> list[int]:
+        """
+        Déchiffre une liste de blocs indépendants
+
+        Args:
+            blocs (list[int]): Les entiers chiffrés
+
+        Returns:
+            list[int]: Les entiers déchiffrés, dans le même ordre
+        """
+        return list(self.déchiffre_blocs_flux(blocs))
+
     def encrypt(self, message: str, clé_publique: Tuple[int, int]) -> str:
         """
         Retourne une string de nombres séparés par des virgules
@@ -49,8 +409,8 @@ class RSA:
         
         for i in range(0, len(octets_message), taille_bloque):
             bloc: bytes = octets_message[i:i+taille_bloque]
-            m_int = int.from_bytes(bloc, 'big')
-            c_int = pow(m_int, e, n)
+            m_int = MOTEUR.depuis_octets(bloc)
+            c_int = MOTEUR.pow_mod(m_int, e, n)
             entiers_chiffré.append(str(c_int))
             
         return ",".join(entiers_chiffré)
@@ -64,21 +424,190 @@ class RSA:
         """
         if not self.clé_privé: 
             raise ValueError("Pas de clé privée")
-        n, d = self.clé_privé
         
         try:
-            chunks: List[int] = []
-            for x in encrypted_str.split(','):
-                if x.strip():
-                    chunks.append(int(x))
+            flux = self.decrypt_flux(encrypted_str)
+            nombre_blocs: int = encrypted_str.count(',') + 1
+            # Taille maximale connue d'avance: un seul tampon, décodé une seule fois à la fin
+            tampon = bytearray(nombre_blocs * ((self.clé_privé[0].bit_length() + 7) // 8))
+            position: int = 0
+            for morceau in flux:
+                tampon[position:position+len(morceau)] = morceau
+                position += len(morceau)
         except ValueError:
             return ""
+        return tampon[:position].decode('utf-8', errors='replace')
+
+    def decrypt_flux(self, données: bytes | str) -> Iterator[bytes]:
+        """
+        Déchiffre bloc par bloc (format texte ou binaire) et rend le clair au fur et à mesure,
+        ce qui permet de lire l'entête de routage avant d'avoir tout déchiffré
+
+        Args:
+            données (bytes | str): Le message chiffré
+
+        Raises:
+            ValueError: Pas de clé privée ou message malformé (levée dès le premier appel à next)
+
+        Yields:
+            bytes: Le clair de chaque bloc
+        """
+        if not self.clé_privé:
+            raise ValueError("Pas de clé privée")
+
+        if isinstance(données, str) or not est_format_binaire(données):
+            texte: str = données if isinstance(données, str) else bytes(données).decode('ascii')
+            blocs: list[int] = [int(x) for x in texte.split(',') if x.strip()]
+            for m_int in self.déchiffre_blocs_flux(blocs):
+                yield MOTEUR.vers_octets(m_int, (m_int.bit_length() + 7) // 8)
+            return
+
+        if données[0] != VERSION_BINAIRE:
+            raise ValueError("Format non découpable en blocs")
+        _, largeur, taille_clair = ENTÊTE_BINAIRE.unpack_from(données)
+        n: int = self.clé_privé[0]
+        if largeur != (n.bit_length() + 7) // 8:
+            raise ValueError("Largeur de bloc incompatible avec la clé")
+        taille_bloque: int = largeur - 11
+        nombre_blocs: int = -(-taille_clair // taille_bloque)
+        if len(données) != ENTÊTE_BINAIRE.size + nombre_blocs * largeur:
+            raise ValueError("Taille du message chiffré incohérente")
+
+        blocs = []
+        for i in range(nombre_blocs):
+            début: int = ENTÊTE_BINAIRE.size + i * largeur
+            blocs.append(MOTEUR.depuis_octets(données[début:début+largeur]))
+
+        for i, m_int in enumerate(self.déchiffre_blocs_flux(blocs)):
+            taille_morceau: int = min(taille_bloque, taille_clair - i * taille_bloque)
+            if m_int.bit_length() > taille_morceau * 8:
+                raise ValueError("Bloc invalide (mauvaise clé ?)")
+            yield MOTEUR.vers_octets(m_int, taille_morceau)
+
+    def encrypt_binaire(self, message: bytes | str, clé_publique: Tuple[int, int]) -> bytes:
+        """
+        Chiffre un message au format binaire: blocs big-endian de la taille du modulus précédés d'un entête
+
+        Args:
+            message (bytes | str): Le message à chiffrer
+            clé_publique (Tuple[int, int]): La clé publique (n, e)
+
+        Returns:
+            bytes: Le message chiffré
+        """
+        n: int
+        e: int
+        n, e = clé_publique
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        largeur: int = (n.bit_length() + 7) // 8
+        taille_bloque: int = largeur - 11
+
+        morceaux: list[bytes] = [ENTÊTE_BINAIRE.pack(VERSION_BINAIRE, largeur, len(message))]
+        for i in range(0, len(message), taille_bloque):
+            m_int = MOTEUR.depuis_octets(message[i:i+taille_bloque])
+            morceaux.append(MOTEUR.vers_octets(MOTEUR.pow_mod(m_int, e, n), largeur))
+        return b"".join(morceaux)
+
+    def decrypt_binaire(self, données: bytes) -> bytes:
+        """
+        Déchiffre un message au format binaire
+
+        Args:
+            données (bytes): Le message chiffré
+
+        Raises:
+            ValueError: Pas de clé privée ou message malformé
+
+        Returns:
+            bytes: Le message en clair
+        """
+        if not est_format_binaire(données) or données[0] != VERSION_BINAIRE:
+            raise ValueError("Entête binaire invalide")
+        _, _, taille_clair = ENTÊTE_BINAIRE.unpack_from(données)
+        clair = bytearray(taille_clair)
+        position: int = 0
+        for morceau in self.decrypt_flux(données):
+            clair[position:position+len(morceau)] = morceau
+            position += len(morceau)
+        return bytes(clair)
+
+    def déchiffre_paquet(self, données: bytes) -> bytes:
+        """
+        Déchiffre un paquet reçu quel que soit son format (binaire ou ancien format texte)
+
+        Args:
+            données (bytes): Le paquet reçu
+
+        Returns:
+            bytes: Le paquet en clair
+        """
+        if est_format_binaire(données):
+            if données[0] == VERSION_HYBRIDE:
+                return self.decrypt_hybride(données)
+            return self.decrypt_binaire(données)
+        return self.decrypt(données.decode('utf-8')).encode('utf-8')
+
+    def encrypt_hybride(self, message: bytes | str, clé_publique: Tuple[int, int]) -> bytes:
+        """
+        Chiffre un message en mode hybride: seule une clé de session aléatoire passe par RSA,
+        le corps est chiffré par un flux SHAKE-256 et authentifié par HMAC
+
+        Args:
+            message (bytes | str): Le message à chiffrer
+            clé_publique (Tuple[int, int]): La clé publique (n, e)
+
+        Returns:
+            bytes: Le message chiffré
+        """
+        n: int
+        e: int
+        n, e = clé_publique
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        largeur: int = (n.bit_length() + 7) // 8
+        clé_session: bytes = secrets.token_bytes(TAILLE_CLÉ_SESSION)
+
+        entête: bytes = ENTÊTE_BINAIRE.pack(VERSION_HYBRIDE, largeur, len(message))
+        clé_chiffrée: bytes = MOTEUR.vers_octets(MOTEUR.pow_mod(MOTEUR.depuis_octets(clé_session), e, n), largeur)
+        corps: bytes = xor_octets(message, flux_de_clé(clé_session, len(message)))
+        tag: bytes = calcule_tag(clé_session, entête, clé_chiffrée, corps)
+        return b"".join((entête, clé_chiffrée, tag, corps))
+
+    def decrypt_hybride(self, données: bytes | memoryview) -> bytes:
+        """
+        Déchiffre un message au format hybride (une seule opération RSA quelle que soit la taille)
+
+        Args:
+            données (bytes | memoryview): Le message chiffré
+
+        Raises:
+            ValueError: Pas de clé privée, message malformé ou tag invalide
+
+        Returns:
+            bytes: Le message en clair
+        """
+        if not self.clé_privé:
+            raise ValueError("Pas de clé privée")
+        if len(données) < ENTÊTE_BINAIRE.size or données[0] != VERSION_HYBRIDE:
+            raise ValueError("Entête hybride invalide")
+        _, largeur, taille_clair = ENTÊTE_BINAIRE.unpack_from(données)
+        n: int = self.clé_privé[0]
+        if largeur != (n.bit_length() + 7) // 8:
+            raise ValueError("Largeur de bloc incompatible avec la clé")
+        début_corps: int = ENTÊTE_BINAIRE.size + largeur + TAILLE_TAG
+        if len(données) != début_corps + taille_clair:
+            raise ValueError("Taille du message chiffré incohérente")
+
+        c_int = MOTEUR.depuis_octets(données[ENTÊTE_BINAIRE.size:ENTÊTE_BINAIRE.size+largeur])
+        k_int: int = self.déchiffre_entier(c_int)
+        if k_int.bit_length() > TAILLE_CLÉ_SESSION * 8:
+            raise ValueError("Clé de session invalide")
+        clé_session: bytes = MOTEUR.vers_octets(k_int, TAILLE_CLÉ_SESSION)
 
-        message_decrypté = ""
-        for c_int in chunks:
-            m_int = pow(c_int, d, n)
-            try:
-                message_decrypté += m_int.to_bytes((m_int.bit_length() + 7) // 8, 'big').decode('utf-8')
-            except:
-                pass 
-        return message_decrypté
\ No newline at end of file
+        vue: memoryview = memoryview(données)
+        tag: bytes = bytes(vue[début_corps-TAILLE_TAG:début_corps])
+        corps: memoryview = vue[début_corps:]
+        if not hmac.compare_digest(tag, calcule_tag(clé_session, vue[:début_corps-TAILLE_TAG], corps)):
+            raise ValueError("Tag d'intégrité invalide")
+        return xor_octets(corps, flux_de_clé(clé_session, len(corps)))
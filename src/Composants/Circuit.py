@@ -0,0 +1,351 @@
+import hashlib
+import secrets
+import socket
+import struct
+import threading
+import time
+
+from src.Composants import Algorithme_de_chiffrage
+from src.Composants.Algorithme_de_chiffrage import RSA, chiffre_entier, flux_de_clé, xor_octets, TAILLE_CLÉ_SESSION
+from src.Composants.Oignon import largeur_clé, MARQUEUR_ROUTAGE, TYPE_RELAIS, TYPE_FINALE, LONGUEUR
+
+# Circuits: le client échange une clé de session avec chaque saut une seule fois (cellule de CRÉATION, une opération
+# RSA par routeur), puis les messages (DONNÉES) ne portent plus qu'un identifiant de circuit et une couche XOR par saut.
+# Entête de toutes les cellules de circuit: version | type | identifiant du circuit sur ce lien
+VERSION_CIRCUIT: int = 4
+ENTÊTE_CIRCUIT: struct.Struct = struct.Struct(">BB8s")
+CRÉATION: int = 0
+DONNÉES: int = 1
+FIN: int = 2
+TAILLE_ID: int = 8
+TAILLE_NONCE: int = 8
+# Routage d'une couche de création: marqueur | type | IPv4 | port | identifiant du circuit vers le saut suivant
+ROUTAGE_CIRCUIT: struct.Struct = struct.Struct(">4sB4sH8s")
+# Comme les cellules, la création garde la même taille à chaque saut (bourrage aléatoire)
+TAILLE_CRÉATION: int = 4096
+MARQUEUR_DONNÉES: bytes = b"DATA"
+
+def nonce_suivant(clé: bytes, nonce: bytes) -> bytes:
+    """
+    Nonce transmis au saut suivant: chaque saut dérive le sien du précédent avec sa clé,
+    deux routeurs d'un même circuit ne voient donc jamais le même nonce
+
+    Args:
+        clé (bytes): Clé de session du saut
+        nonce (bytes): Nonce reçu par ce saut
+    """
+    return hashlib.shake_256(b"nonce|" + clé + nonce).digest(TAILLE_NONCE)
+
+def flux_circuit(clé: bytes, nonce: bytes, taille: int) -> bytes:
+    """
+    Flux de chiffrement d'un message de circuit pour un saut
+
+    Args:
+        clé (bytes): Clé de session du saut
+        nonce (bytes): Nonce du message pour ce saut
+        taille (int): Nombre d'octets voulus
+    """
+    return flux_de_clé(clé + nonce, taille)
+
+class CircuitClient:
+    """
+    Circuit ouvert par un client: chemin, clé de session et identifiant de circuit de chaque saut
+    """
+    def __init__(self, chemin: list[dict], ip_destination: str, port_destination: int):
+        """
+        Tire les clés et identifiants d'un nouveau circuit
+
+        Args:
+            chemin (list[dict]): Les routeurs du chemin, dans l'ordre de traversée
+            ip_destination (str): IPv4 du client destinataire
+            port_destination (int): Port du client destinataire
+        """
+        self.chemin: list[dict] = chemin
+        self.destination: tuple[str, int] = (ip_destination, int(port_destination))
+        self.identifiants: list[bytes] = [secrets.token_bytes(TAILLE_ID) for _ in chemin]
+        self.clés: list[bytes] = [secrets.token_bytes(TAILLE_CLÉ_SESSION) for _ in chemin]
+        self.dernier_usage: float = time.monotonic()
+
+    def création(self, taille: int = TAILLE_CRÉATION) -> bytes:
+        """
+        Cellule de création, construite du dernier saut vers le premier comme une cellule de message
+
+        Args:
+            taille (int): Taille du corps de la cellule
+
+        Raises:
+            ValueError: Le chemin ne tient pas dans la cellule
+
+        Returns:
+            bytes: La cellule à envoyer au premier routeur
+        """
+        if sum(largeur_clé(r["key"]) + ROUTAGE_CIRCUIT.size for r in self.chemin) > taille:
+            raise ValueError("Chemin trop long pour une cellule de création")
+        utiles: list[int] = [taille]
+        for r in self.chemin[:-1]:
+            utiles.append(utiles[-1] - largeur_clé(r["key"]) - ROUTAGE_CIRCUIT.size)
+
+        corps: bytes = b""
+        for i in range(len(self.chemin) - 1, -1, -1):
+            largeur: int = largeur_clé(self.chemin[i]["key"])
+            if i == len(self.chemin) - 1:
+                ip, port = self.destination
+                clair: bytes = ROUTAGE_CIRCUIT.pack(MARQUEUR_ROUTAGE, TYPE_FINALE, socket.inet_aton(ip), port, bytes(TAILLE_ID))
+                clair += bytes(utiles[i] - largeur - len(clair))
+            else:
+                suivant: dict = self.chemin[i + 1]
+                clair = ROUTAGE_CIRCUIT.pack(MARQUEUR_ROUTAGE, TYPE_RELAIS, socket.inet_aton(suivant["ip"]),
+                                             int(suivant["port"]), self.identifiants[i + 1]) + corps
+            moteur = Algorithme_de_chiffrage.MOTEUR
+            clé_chiffrée: bytes = moteur.vers_octets(chiffre_entier(moteur.depuis_octets(self.clés[i]), self.chemin[i]["key"]), largeur)
+            corps = clé_chiffrée + xor_octets(clair, flux_de_clé(self.clés[i], len(clair)))
+        return ENTÊTE_CIRCUIT.pack(VERSION_CIRCUIT, CRÉATION, self.identifiants[0]) + corps
+
+    def données(self, message: bytes) -> bytes:
+        """
+        Cellule de message: une couche XOR par saut, aucune opération RSA
+
+        Args:
+            message (bytes): Le message
+
+        Returns:
+            bytes: La cellule à envoyer au premier routeur
+        """
+        clair: bytes = MARQUEUR_DONNÉES + LONGUEUR.pack(len(message)) + message
+        premier: bytes = secrets.token_bytes(TAILLE_NONCE)
+        nonce: bytes = premier
+        for clé in self.clés:
+            clair = xor_octets(clair, flux_circuit(clé, nonce, len(clair)))
+            nonce = nonce_suivant(clé, nonce)
+        self.dernier_usage = time.monotonic()
+        return ENTÊTE_CIRCUIT.pack(VERSION_CIRCUIT, DONNÉES, self.identifiants[0]) + premier + clair
+
+    def fin(self) -> bytes:
+        """
+        Cellule de fermeture: chaque saut oublie le circuit et la transmet au suivant
+
+        Returns:
+            bytes: La cellule à envoyer au premier routeur
+        """
+        return ENTÊTE_CIRCUIT.pack(VERSION_CIRCUIT, FIN, self.identifiants[0])
+
+    def réutilisable(self, routeurs: list[dict], nombre_sauts: int, ip_destination: str, port_destination: int,
+                     inactivité_max: float) -> bool:
+        """
+        Le circuit peut-il porter ce message: même destination, même longueur, routeurs toujours annoncés
+        par le master avec la même époque (un routeur redémarré a perdu sa table des circuits) et circuit
+        pas encore expiré chez les routeurs
+
+        Args:
+            routeurs (list[dict]): Routeurs actuellement annoncés par le master
+            nombre_sauts (int): Nombre de sauts demandé
+            ip_destination (str): IP du destinataire
+            port_destination (int): Port du destinataire
+            inactivité_max (float): Durée d'inactivité au-delà de laquelle le circuit est abandonné (s)
+
+        Returns:
+            bool: True si le circuit peut être réutilisé
+        """
+        if (ip_destination, int(port_destination)) != self.destination or nombre_sauts != len(self.chemin):
+            return False
+        if time.monotonic() - self.dernier_usage > inactivité_max:
+            return False
+        annoncés: set = {(r["id"], r["ip"], r["port"], r.get("époque")) for r in routeurs}
+        return all(r.get("époque") and (r["id"], r["ip"], r["port"], r["époque"]) in annoncés for r in self.chemin)
+
+def lit_entête_circuit(cellule: bytes | memoryview) -> tuple[int, bytes, memoryview]:
+    """
+    Lit l'entête d'une cellule de circuit
+
+    Args:
+        cellule (bytes | memoryview): La cellule reçue
+
+    Raises:
+        ValueError: Cellule trop courte ou type inconnu
+
+    Returns:
+        tuple[int, bytes, memoryview]: (type, identifiant du circuit, corps)
+    """
+    if len(cellule) < ENTÊTE_CIRCUIT.size:
+        raise ValueError("Cellule de circuit trop courte")
+    version, type_cellule, identifiant = ENTÊTE_CIRCUIT.unpack_from(cellule)
+    if version != VERSION_CIRCUIT or type_cellule not in (CRÉATION, DONNÉES, FIN):
+        raise ValueError("Ce n'est pas une cellule de circuit")
+    return type_cellule, identifiant, memoryview(cellule)[ENTÊTE_CIRCUIT.size:]
+
+def ouvre_création(cipher: RSA, corps: bytes | memoryview) -> tuple[bytes, int, str, int, bytes, tuple]:
+    """
+    Retire la couche d'un saut d'une cellule de création: l'unique opération RSA du circuit pour ce routeur
+
+    Args:
+        cipher (RSA): Le chiffreur du routeur (avec sa clé privée)
+        corps (bytes | memoryview): Le corps de la cellule, sans l'entête
+
+    Raises:
+        ValueError: Cellule malformée ou chiffrée pour une autre clé
+
+    Returns:
+        tuple[bytes, int, str, int, bytes, tuple]: (clé de session, type, ip, port, identifiant sortant,
+        corps à transmettre au saut suivant en morceaux, vide pour le dernier saut)
+    """
+    largeur: int = largeur_clé(cipher.clé_publique)
+    if len(corps) < largeur + ROUTAGE_CIRCUIT.size:
+        raise ValueError("Cellule de création trop courte")
+    moteur = Algorithme_de_chiffrage.MOTEUR
+    k_int: int = cipher.déchiffre_entier(moteur.depuis_octets(corps[:largeur]))
+    if k_int.bit_length() > TAILLE_CLÉ_SESSION * 8:
+        raise ValueError("Clé de session invalide")
+    clé_session: bytes = moteur.vers_octets(k_int, TAILLE_CLÉ_SESSION)
+    clair: bytes = xor_octets(corps[largeur:], flux_de_clé(clé_session, len(corps) - largeur))
+
+    marqueur, type_saut, ip, port, sortant = ROUTAGE_CIRCUIT.unpack_from(clair)
+    if marqueur != MARQUEUR_ROUTAGE or type_saut not in (TYPE_RELAIS, TYPE_FINALE):
+        raise ValueError("Bloc de routage invalide")
+    suite: tuple = ()
+    if type_saut == TYPE_RELAIS:
+        suite = (memoryview(clair)[ROUTAGE_CIRCUIT.size:], secrets.token_bytes(largeur + ROUTAGE_CIRCUIT.size))
+    return clé_session, type_saut, socket.inet_ntoa(ip), port, sortant, suite
+
+def retire_couche(clé: bytes, corps: bytes | memoryview) -> tuple[bytes, bytes]:
+    """
+    Retire la couche d'un saut d'une cellule de message
+
+    Args:
+        clé (bytes): Clé de session du saut
+        corps (bytes | memoryview): Le corps de la cellule: nonce puis message chiffré
+
+    Raises:
+        ValueError: Cellule trop courte
+
+    Returns:
+        tuple[bytes, bytes]: (nonce reçu, message avec une couche de moins)
+    """
+    if len(corps) < TAILLE_NONCE:
+        raise ValueError("Cellule de message trop courte")
+    nonce, chiffré = bytes(corps[:TAILLE_NONCE]), corps[TAILLE_NONCE:]
+    return nonce, xor_octets(chiffré, flux_circuit(clé, nonce, len(chiffré)))
+
+def lit_données(clair: bytes) -> memoryview:
+    """
+    Extrait le message une fois toutes les couches retirées (dernier saut)
+
+    Args:
+        clair (bytes): marqueur | longueur | message
+
+    Raises:
+        ValueError: Marqueur absent (mauvaise clé, cellule altérée) ou longueur incohérente
+
+    Returns:
+        memoryview: Le message (vue sur le clair, sans recopie)
+    """
+    début: int = len(MARQUEUR_DONNÉES) + LONGUEUR.size
+    if len(clair) < début or clair[:len(MARQUEUR_DONNÉES)] != MARQUEUR_DONNÉES:
+        raise ValueError("Message de circuit invalide")
+    (longueur,) = LONGUEUR.unpack_from(clair, len(MARQUEUR_DONNÉES))
+    if longueur > len(clair) - début:
+        raise ValueError("Longueur de message invalide")
+    return memoryview(clair)[début:début + longueur]
+
+class EntréeCircuit:
+    """
+    Un circuit vu par un routeur: clé de session et saut suivant (ou destinataire final)
+    """
+    __slots__ = ("clé", "type_saut", "ip", "port", "sortant", "dernier_usage")
+
+    def __init__(self, clé: bytes, type_saut: int, ip: str, port: int, sortant: bytes):
+        """
+        Initialise une entrée de la table
+
+        Args:
+            clé (bytes): Clé de session échangée à la création
+            type_saut (int): TYPE_RELAIS ou TYPE_FINALE
+            ip (str): IP du saut suivant, ou du destinataire pour le dernier saut
+            port (int): Port du saut suivant ou du destinataire
+            sortant (bytes): Identifiant du circuit sur le lien vers le saut suivant
+        """
+        self.clé: bytes = clé
+        self.type_saut: int = type_saut
+        self.ip: str = ip
+        self.port: int = port
+        self.sortant: bytes = sortant
+        self.dernier_usage: float = time.monotonic()
+
+class TableDeCircuits:
+    """
+    Circuits connus d'un routeur, indexés par l'identifiant reçu du saut précédent, oubliés après un délai d'inactivité
+    """
+    def __init__(self, délai_inactivité: float = 600.0, taille_max: int = 65536):
+        """
+        Initialise une table vide
+
+        Args:
+            délai_inactivité (float): Un circuit sans message depuis ce délai est supprimé (s)
+            taille_max (int): Nombre maximal de circuits, les créations au-delà sont refusées
+        """
+        self.délai_inactivité: float = délai_inactivité
+        self.taille_max: int = taille_max
+        self.circuits: dict[bytes, EntréeCircuit] = {}
+        self.verrou: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.circuits)
+
+    def ajoute(self, identifiant: bytes, entrée: EntréeCircuit) -> bool:
+        """
+        Enregistre un circuit
+
+        Args:
+            identifiant (bytes): Identifiant du circuit sur le lien entrant
+            entrée (EntréeCircuit): Le circuit
+
+        Returns:
+            bool: False si la table est pleine ou l'identifiant déjà pris
+        """
+        with self.verrou:
+            if identifiant in self.circuits or len(self.circuits) >= self.taille_max:
+                return False
+            self.circuits[identifiant] = entrée
+            return True
+
+    def prend(self, identifiant: bytes) -> EntréeCircuit | None:
+        """
+        Cherche un circuit et repousse son expiration
+
+        Args:
+            identifiant (bytes): Identifiant du circuit sur le lien entrant
+
+        Returns:
+            EntréeCircuit | None: Le circuit, None s'il est inconnu ou expiré
+        """
+        with self.verrou:
+            entrée: EntréeCircuit | None = self.circuits.get(identifiant)
+            if entrée is not None:
+                entrée.dernier_usage = time.monotonic()
+            return entrée
+
+    def retire(self, identifiant: bytes) -> EntréeCircuit | None:
+        """
+        Oublie un circuit
+
+        Args:
+            identifiant (bytes): Identifiant du circuit sur le lien entrant
+
+        Returns:
+            EntréeCircuit | None: Le circuit retiré, None s'il était inconnu
+        """
+        with self.verrou:
+            return self.circuits.pop(identifiant, None)
+
+    def nettoie(self) -> int:
+        """
+        Supprime les circuits inactifs
+
+        Returns:
+            int: Nombre de circuits supprimés
+        """
+        limite: float = time.monotonic() - self.délai_inactivité
+        with self.verrou:
+            expirés: list[bytes] = [i for i, e in self.circuits.items() if e.dernier_usage < limite]
+            for identifiant in expirés:
+                del self.circuits[identifiant]
+        return len(expirés)
@@ -0,0 +1,153 @@
+import atexit
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Tous les journaux du projet sont sous ce nom: "sae302.routeur", "sae302.master", ...
+RACINE: str = "sae302"
+FORMAT: str = "%(asctime)s %(levelname)-7s [%(name)s] %(message)s"
+NIVEAUX: tuple[str, ...] = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+_écouteur: logging.handlers.QueueListener | None = None
+_gestionnaire: logging.Handler | None = None
+_pid: int | None = None
+_paramètres: dict | None = None
+_suspendu: bool = False
+
+class FiltreÉchantillonnage(logging.Filter):
+    """
+    Ne garde qu'un message sur N pour chaque événement configuré. L'événement est passé par
+    `extra={"événement": nom}`; les messages sans événement, ou d'un événement non configuré, passent tous.
+    """
+    def __init__(self, taux: dict[str, int]):
+        """
+        Initialise le filtre
+
+        Args:
+            taux (dict[str, int]): Pour chaque événement, garde 1 message sur N
+        """
+        super().__init__()
+        self.taux: dict[str, int] = {nom: max(1, n) for nom, n in taux.items()}
+        # itertools.count est atomique sous le GIL: pas de verrou sur le chemin chaud
+        self.compteurs: dict[str, itertools.count] = {nom: itertools.count() for nom in self.taux}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        événement: str | None = getattr(record, "événement", None)
+        if événement not in self.taux:
+            return True
+        return next(self.compteurs[événement]) % self.taux[événement] == 0
+
+def obtient_journal(nom: str) -> logging.Logger:
+    """
+    Journal d'un composant
+
+    Args:
+        nom (str): Nom du composant ("routeur", "master", "liens", ...)
+
+    Returns:
+        logging.Logger: Le journal "sae302.<nom>"
+    """
+    return logging.getLogger(f"{RACINE}.{nom}")
+
+def configure_journal(niveau: str = "INFO", échantillonnage: dict[str, int] | None = None,
+                      fichier: str | None = None) -> None:
+    """
+    Branche les journaux du projet sur une file: les threads appelants ne font que mettre le message en file,
+    un thread d'arrière-plan se charge de l'écriture (sortie standard et fichier éventuel).
+    Peut être rappelée, par exemple dans un processus fils après un fork.
+
+    Args:
+        niveau (str): DEBUG, INFO, WARNING ou ERROR (les messages par paquet sont en DEBUG)
+        échantillonnage (dict[str, int] | None): Garde 1 message sur N par événement
+        fichier (str | None): Fichier où écrire les journaux en plus de la sortie standard
+
+    Raises:
+        ValueError: Niveau inconnu
+    """
+    global _écouteur, _gestionnaire, _pid, _paramètres
+    niveau = niveau.upper()
+    if niveau not in NIVEAUX:
+        raise ValueError(f"Niveau de journal inconnu: {niveau}")
+
+    racine: logging.Logger = logging.getLogger(RACINE)
+    if _gestionnaire is not None:
+        racine.removeHandler(_gestionnaire)
+    # Après un fork, l'écouteur hérité appartient au processus parent: on ne l'arrête pas
+    if _écouteur is not None and _pid == os.getpid():
+        _écouteur.stop()
+
+    formateur = logging.Formatter(FORMAT, "%H:%M:%S")
+    sorties: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if fichier:
+        sorties.append(logging.FileHandler(fichier, encoding="utf-8"))
+    for sortie in sorties:
+        sortie.setFormatter(formateur)
+
+    file_journal: queue.SimpleQueue = queue.SimpleQueue()
+    _gestionnaire = logging.handlers.QueueHandler(file_journal)
+    if échantillonnage:
+        # Le filtre s'applique avant la mise en file: un message écarté ne coûte presque rien
+        _gestionnaire.addFilter(FiltreÉchantillonnage(échantillonnage))
+    racine.addHandler(_gestionnaire)
+    racine.setLevel(niveau)
+    racine.propagate = False
+
+    _écouteur = logging.handlers.QueueListener(file_journal, *sorties)
+    _écouteur.start()
+    _pid = os.getpid()
+    _paramètres = {"niveau": niveau, "échantillonnage": échantillonnage, "fichier": fichier}
+
+def suspend_journal() -> None:
+    """
+    Écrit les messages en file puis arrête le thread d'écriture, à appeler juste avant un fork:
+    aucun thread n'existe alors pendant le fork. relance_journal le redémarre, dans le parent et dans chaque fils.
+    Rien ne doit être journalisé entre les deux (le message serait copié dans chaque fils).
+    """
+    global _suspendu
+    if _écouteur is not None and _pid == os.getpid() and not _suspendu:
+        _écouteur.stop()
+        _suspendu = True
+
+def relance_journal() -> None:
+    """
+    Redémarre le thread d'écriture après suspend_journal (même file et mêmes sorties), ou le recrée avec la
+    même configuration dans un processus fils issu d'un fork fait sans suspension
+    (le thread du parent n'existe pas dans le fils)
+    """
+    global _pid, _suspendu
+    if _écouteur is not None and _suspendu:
+        _écouteur.start()
+        _pid = os.getpid()
+        _suspendu = False
+    elif _paramètres is not None and _pid != os.getpid():
+        configure_journal(**_paramètres)
+
+def arrête_journal() -> None:
+    """
+    Écrit les messages encore en file puis arrête le thread d'écriture
+    """
+    global _écouteur
+    if _écouteur is not None and _pid == os.getpid() and not _suspendu:
+        _écouteur.stop()
+        _écouteur = None
+
+def lit_échantillonnage(texte: str, échantillonnage: dict[str, int]) -> None:
+    """
+    Ajoute une règle d'échantillonnage donnée en ligne de commande
+
+    Args:
+        texte (str): "événement=N", par exemple "paquet_reçu=100"
+        échantillonnage (dict[str, int]): Les règles, complétées sur place
+
+    Raises:
+        ValueError: Format invalide
+    """
+    événement, _, n = texte.partition("=")
+    if not événement or not n.isdigit():
+        raise ValueError(f"Échantillonnage invalide: {texte} (attendu: événement=N)")
+    échantillonnage[événement] = int(n)
+
+atexit.register(arrête_journal)
@@ -0,0 +1,435 @@
+import socket
+import select
+import threading
+import time
+from collections import deque
+
+from src.Composants.Trame import envoie_trames, taille_paquet, Paquet, EnvoiInterrompu
+from src.Composants.Metriques import Métriques
+from src.Composants.Transport import connecte, est_uds
+from src.Composants.Journalisation import obtient_journal
+
+journal = obtient_journal("liens")
+
+# Un lien entrant persistant sans trame depuis ce délai est fermé par le routeur qui le reçoit.
+# Les émetteurs ferment les leurs avant (60 s pour les liens entre routeurs, moitié pour le lien d'un circuit client)
+INACTIVITÉ_LIEN_ENTRANT: float = 120.0
+
+def connexion_fermée(sock: socket.socket | None) -> bool:
+    """
+    Une connexion d'envoi ne reçoit jamais de données: si elle devient lisible, c'est que l'autre côté l'a fermée
+    (un envoi dessus pourrait encore réussir et être perdu sans erreur)
+
+    Args:
+        sock (socket.socket | None): La connexion
+
+    Returns:
+        bool: True si elle est fermée, inutilisable ou absente
+    """
+    if sock is None:
+        return True
+    try:
+        lisible, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(lisible)
+
+class Lien:
+    """
+    Connexion persistante (TCP, ou socket Unix si le voisin est sur la même machine) vers un prochain saut, partagée par tous les paquets qui vont vers lui
+    """
+    def __init__(self, destination: tuple[str, int]):
+        """
+        Initialise le lien (la connexion est ouverte au premier envoi)
+
+        Args:
+            destination (tuple[str, int]): (ip, port) du prochain saut
+        """
+        self.destination: tuple[str, int] = destination
+        self.sock: socket.socket | None = None
+        self.verrou: threading.Lock = threading.Lock()
+        self.dernier_usage: float = time.monotonic()
+
+    def est_mort(self) -> bool:
+        """
+        Un lien sortant ne reçoit jamais de données: s'il devient lisible, c'est que l'autre côté l'a fermé
+        """
+        return connexion_fermée(self.sock)
+
+    def ferme(self) -> None:
+        """
+        Ferme la connexion (elle sera rouverte au prochain envoi)
+        """
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+class RéserveDeLiens:
+    """
+    Réserve de connexions persistantes, une par prochain saut: les paquets y circulent sous forme de trames
+    au lieu d'ouvrir une connexion TCP par paquet.
+    """
+    def __init__(self, délai_connexion: float = 5.0, délai_inactivité: float = 60.0, métriques: Métriques | None = None):
+        """
+        Initialise la réserve. Le thread de nettoyage ne démarre qu'au premier lien: une réserve créée
+        avant un fork n'a aucun thread à perdre dans le processus fils
+
+        Args:
+            délai_connexion (float): Timeout d'ouverture et d'envoi en secondes
+            délai_inactivité (float): Un lien inutilisé depuis ce délai est fermé
+            métriques (Métriques | None): Reçoit la durée des connexions et leur nombre
+        """
+        self.délai_connexion: float = délai_connexion
+        self.métriques: Métriques | None = métriques
+        self.délai_inactivité: float = délai_inactivité
+        self.liens: dict[tuple[str, int], Lien] = {}
+        self.verrou: threading.Lock = threading.Lock()
+        self.arrêt: threading.Event = threading.Event()
+        self.nettoyage_lancé: bool = False
+
+    def lien(self, ip: str, port: int) -> Lien:
+        """
+        Lien vers une destination (créé au besoin)
+
+        Args:
+            ip (str): IP du prochain saut
+            port (int): Port du prochain saut
+        """
+        destination: tuple[str, int] = (ip, int(port))
+        with self.verrou:
+            lien: Lien | None = self.liens.get(destination)
+            if lien is None:
+                lien = self.liens[destination] = Lien(destination)
+                if not self.nettoyage_lancé:
+                    threading.Thread(target=self.nettoyage, name="nettoyage-liens", daemon=True).start()
+                    self.nettoyage_lancé = True
+            return lien
+
+    def envoie(self, ip: str, port: int, données: Paquet) -> None:
+        """
+        Envoie un paquet sous forme de trame, avec une reconnexion automatique si le lien était tombé
+
+        Args:
+            ip (str): IP du prochain saut
+            port (int): Port du prochain saut
+            données (Paquet): Le paquet, en un bloc ou en morceaux
+
+        Raises:
+            OSError: Destination injoignable même après reconnexion
+        """
+        self.envoie_lot(ip, port, [données])
+
+    def envoie_lot(self, ip: str, port: int, paquets: list[Paquet]) -> None:
+        """
+        Envoie plusieurs paquets à la suite sur le lien, avec une reconnexion automatique si le lien était tombé.
+        Après une reconnexion, seules les trames qui n'étaient pas parties en entier sont renvoyées.
+
+        Args:
+            ip (str): IP du prochain saut
+            port (int): Port du prochain saut
+            paquets (list[Paquet]): Les paquets, dans l'ordre
+
+        Raises:
+            EnvoiInterrompu: Destination injoignable même après reconnexion, avec le nombre de paquets déjà envoyés
+        """
+        lien: Lien = self.lien(ip, port)
+        envoyés: int = 0
+        with lien.verrou:
+            for tentative in range(2):
+                if lien.sock is None or lien.est_mort():
+                    lien.ferme()
+                    début: float = time.perf_counter()
+                    try:
+                        lien.sock = connecte(*lien.destination, timeout=self.délai_connexion)
+                    except OSError as e:
+                        raise EnvoiInterrompu(e, trames_envoyées=envoyés) from e
+                    if self.métriques:
+                        self.métriques.observe("connexion", time.perf_counter() - début)
+                        self.métriques.incrémente("connexions_ouvertes")
+                        if est_uds(lien.sock):
+                            self.métriques.incrémente("connexions_locales")
+                try:
+                    envoie_trames(lien.sock, paquets[envoyés:])
+                    lien.dernier_usage = time.monotonic()
+                    return
+                except EnvoiInterrompu as e:
+                    lien.ferme()
+                    envoyés += e.trames_envoyées
+                    if tentative == 1:
+                        raise EnvoiInterrompu(e, e.envoyé, envoyés) from e
+
+    def nettoyage(self) -> None:
+        """
+        Boucle du thread de nettoyage: ferme les liens inactifs
+        """
+        while not self.arrêt.wait(min(self.délai_inactivité, 5.0)):
+            limite: float = time.monotonic() - self.délai_inactivité
+            with self.verrou:
+                liens = list(self.liens.values())
+            for lien in liens:
+                # Le Lien reste dans la réserve, seule sa connexion est fermée
+                with lien.verrou:
+                    if lien.sock is not None and lien.dernier_usage < limite:
+                        lien.ferme()
+
+    def ferme_tout(self) -> None:
+        """
+        Ferme tous les liens et arrête le nettoyage
+        """
+        self.arrêt.set()
+        with self.verrou:
+            liens = list(self.liens.values())
+            self.liens.clear()
+        for lien in liens:
+            with lien.verrou:
+                lien.ferme()
+
+class FileDeSaut:
+    """
+    Paquets en attente vers un prochain saut, et état de son disjoncteur
+    """
+    def __init__(self, destination: tuple[str, int]):
+        """
+        Initialise une file vide
+
+        Args:
+            destination (tuple[str, int]): (ip, port) du prochain saut
+        """
+        self.destination: tuple[str, int] = destination
+        self.paquets: deque[tuple[float, Paquet]] = deque()  # (instant de mise en file, paquet)
+        self.condition: threading.Condition = threading.Condition()
+        self.échecs: int = 0  # Tentatives ratées consécutives
+        self.disjoncté_jusqu_à: float = 0.0
+        self.dernier_usage: float = time.monotonic()
+        self.thread: threading.Thread | None = None
+
+class OrdonnanceurEnvois:
+    """
+    Envois sortants asynchrones: une file et un thread par prochain saut. Les paquets d'une même file partent
+    par lots sur une seule connexion, les échecs sont retentés avec un délai exponentiel borné et un voisin
+    qui ne répond plus ouvre un disjoncteur (ses paquets sont refusés pendant un moment).
+    """
+    def __init__(self, réserve: RéserveDeLiens | None, taille_file: int = 1024, taille_lot: int = 32,
+                 tentatives: int = 4, délai_initial: float = 0.05, délai_max: float = 2.0,
+                 seuil_disjoncteur: int = 5, durée_disjoncteur: float = 30.0,
+                 délai_connexion: float = 5.0, délai_inactivité: float = 60.0, métriques: Métriques | None = None):
+        """
+        Initialise l'ordonnanceur (les threads d'envoi sont créés à la première destination)
+
+        Args:
+            réserve (RéserveDeLiens | None): Liens persistants, None pour une connexion par lot
+            taille_file (int): Paquets en attente max par prochain saut (au-delà, ils sont refusés)
+            taille_lot (int): Paquets max envoyés d'un coup
+            tentatives (int): Essais par lot avant de l'abandonner
+            délai_initial (float): Attente avant le premier nouvel essai, doublée à chaque échec
+            délai_max (float): Borne de l'attente entre deux essais
+            seuil_disjoncteur (int): Tentatives ratées consécutives qui ouvrent le disjoncteur
+            durée_disjoncteur (float): Durée pendant laquelle un voisin disjoncté est ignoré
+            délai_connexion (float): Timeout de connexion sans réserve de liens
+            délai_inactivité (float): Le thread d'une destination inutilisée depuis ce délai s'arrête
+            métriques (Métriques | None): Reçoit l'attente en file, la durée des envois et les compteurs de sortie
+        """
+        self.réserve: RéserveDeLiens | None = réserve
+        self.taille_file: int = taille_file
+        self.taille_lot: int = taille_lot
+        self.tentatives: int = max(1, tentatives)
+        self.délai_initial: float = délai_initial
+        self.délai_max: float = délai_max
+        self.seuil_disjoncteur: int = seuil_disjoncteur
+        self.durée_disjoncteur: float = durée_disjoncteur
+        self.délai_connexion: float = délai_connexion
+        self.délai_inactivité: float = délai_inactivité
+        self.métriques: Métriques | None = métriques
+        self.files: dict[tuple[str, int], FileDeSaut] = {}
+        self.verrou: threading.Lock = threading.Lock()
+        self.vidange: threading.Event = threading.Event()
+        self.arrêt: threading.Event = threading.Event()
+        self.envoyés: int = 0
+        self.abandonnés: int = 0
+
+    def envoie(self, ip: str, port: int, données: Paquet) -> bool:
+        """
+        Met un paquet dans la file de son prochain saut, sans attendre l'envoi
+
+        Args:
+            ip (str): IP du prochain saut
+            port (int): Port du prochain saut
+            données (Paquet): Le paquet, en un bloc ou en morceaux
+
+        Returns:
+            bool: False si le paquet est refusé (file pleine, disjoncteur ouvert ou arrêt en cours)
+        """
+        destination: tuple[str, int] = (ip, int(port))
+        with self.verrou:
+            if self.vidange.is_set():
+                self.abandonnés += 1
+                return False
+            file: FileDeSaut | None = self.files.get(destination)
+            if file is None:
+                file = self.files[destination] = FileDeSaut(destination)
+                file.thread = threading.Thread(target=self.boucle_envoi, args=(file,), name=f"envoi-{ip}:{port}", daemon=True)
+                file.thread.start()
+            with file.condition:
+                if time.monotonic() < file.disjoncté_jusqu_à or len(file.paquets) >= self.taille_file:
+                    self.abandonnés += 1
+                    return False
+                file.paquets.append((time.perf_counter(), données))
+                file.condition.notify()
+        return True
+
+    def boucle_envoi(self, file: FileDeSaut) -> None:
+        """
+        Thread d'une destination: vide sa file par lots jusqu'à l'arrêt ou une longue inactivité
+
+        Args:
+            file (FileDeSaut): La file de la destination
+        """
+        while not self.arrêt.is_set():
+            with file.condition:
+                if not file.paquets:
+                    file.condition.wait(timeout=1.0)
+                lot: list[tuple[float, Paquet]] = [file.paquets.popleft() for _ in range(min(len(file.paquets), self.taille_lot))]
+            if lot:
+                if self.métriques:
+                    maintenant: float = time.perf_counter()
+                    for instant, _ in lot:
+                        self.métriques.observe("attente_sortie", maintenant - instant)
+                self.envoie_avec_reprise(file, [données for _, données in lot])
+                file.dernier_usage = time.monotonic()
+                continue
+            if self.vidange.is_set() or time.monotonic() - file.dernier_usage > self.délai_inactivité:
+                # Retire la file sous les deux verrous pour ne pas perdre un paquet ajouté entre-temps
+                with self.verrou, file.condition:
+                    if not file.paquets:
+                        if self.files.get(file.destination) is file:
+                            del self.files[file.destination]
+                        return
+
+    def envoie_avec_reprise(self, file: FileDeSaut, lot: list[Paquet]) -> None:
+        """
+        Envoie un lot en retentant avec un délai exponentiel, et ouvre le disjoncteur si le voisin ne répond plus.
+        Chaque nouvel essai ne renvoie que les paquets qui ne sont pas encore partis (pas de doublon chez le voisin).
+
+        Args:
+            file (FileDeSaut): La file de la destination
+            lot (list[Paquet]): Les paquets à envoyer
+        """
+        délai: float = self.délai_initial
+        for tentative in range(self.tentatives):
+            try:
+                début: float = time.perf_counter()
+                self.transmet(file.destination, lot)
+                file.échecs = 0
+                self.compte_envoyés(lot)
+                if self.métriques:
+                    self.métriques.observe("envoi", time.perf_counter() - début)
+                return
+            except OSError as e:
+                erreur: OSError = e
+                if isinstance(e, EnvoiInterrompu) and e.trames_envoyées:
+                    self.compte_envoyés(lot[:e.trames_envoyées])
+                    lot = lot[e.trames_envoyées:]
+                file.échecs += 1
+                if self.métriques:
+                    self.métriques.incrémente("échecs_envoi")
+            if file.échecs >= self.seuil_disjoncteur or tentative + 1 == self.tentatives or self.arrêt.wait(délai):
+                break
+            délai = min(délai * 2, self.délai_max)
+
+        ip, port = file.destination
+        perdus: int = len(lot)
+        if file.échecs >= self.seuil_disjoncteur:
+            # Le compteur n'est remis à zéro qu'après un succès: un seul échec suffit à redisjoncter ensuite
+            with file.condition:
+                file.disjoncté_jusqu_à = time.monotonic() + self.durée_disjoncteur
+                perdus += len(file.paquets)
+                file.paquets.clear()
+            journal.error(f"{ip}:{port} injoignable ({erreur}), envois suspendus pendant {self.durée_disjoncteur:.0f} s")
+        else:
+            journal.error(f"Échec vers {ip}:{port} après {self.tentatives} essais: {erreur}")
+        with self.verrou:
+            self.abandonnés += perdus
+        if self.métriques:
+            self.métriques.incrémente("paquets_abandonnés", perdus)
+
+    def compte_envoyés(self, paquets: list[Paquet]) -> None:
+        """
+        Compte des paquets partis vers leur prochain saut
+
+        Args:
+            paquets (list[Paquet]): Les paquets envoyés
+        """
+        with self.verrou:
+            self.envoyés += len(paquets)
+        if self.métriques:
+            self.métriques.incrémente("paquets_envoyés", len(paquets))
+            self.métriques.incrémente("octets_envoyés", sum(taille_paquet(d) for d in paquets))
+
+    def transmet(self, destination: tuple[str, int], lot: list[Paquet]) -> None:
+        """
+        Envoie un lot de trames sur le lien persistant, ou sur une connexion ouverte pour l'occasion
+
+        Args:
+            destination (tuple[str, int]): (ip, port) du prochain saut
+            lot (list[Paquet]): Les paquets
+
+        Raises:
+            OSError: Échec de connexion ou d'envoi (EnvoiInterrompu si des paquets sont déjà partis)
+        """
+        if self.réserve:
+            self.réserve.envoie_lot(destination[0], destination[1], lot)
+            return
+        début: float = time.perf_counter()
+        with connecte(*destination, timeout=self.délai_connexion) as s:
+            if self.métriques:
+                self.métriques.observe("connexion", time.perf_counter() - début)
+                self.métriques.incrémente("connexions_ouvertes")
+                if est_uds(s):
+                    self.métriques.incrémente("connexions_locales")
+            envoie_trames(s, lot)
+
+    def état(self) -> dict:
+        """
+        Compteurs globaux et état de chaque file
+
+        Returns:
+            dict: envoyés, abandonnés et, par destination "ip:port", profondeur et disjoncteur
+        """
+        maintenant: float = time.monotonic()
+        with self.verrou:
+            return {
+                "envoyés": self.envoyés,
+                "abandonnés": self.abandonnés,
+                "files": {
+                    f"{ip}:{port}": {
+                        "profondeur": len(file.paquets),
+                        "disjoncteur": "ouvert" if maintenant < file.disjoncté_jusqu_à else "fermé",
+                    }
+                    for (ip, port), file in self.files.items()
+                },
+            }
+
+    def arrête(self, délai: float = 2.0) -> None:
+        """
+        Refuse les nouveaux paquets, laisse les files se vider pendant `délai` puis arrête les threads
+
+        Args:
+            délai (float): Temps laissé aux files pour se vider
+        """
+        self.vidange.set()
+        with self.verrou:
+            files = list(self.files.values())
+        limite: float = time.monotonic() + délai
+        for file in files:
+            with file.condition:
+                file.condition.notify()
+            file.thread.join(timeout=max(0.0, limite - time.monotonic()))
+        self.arrêt.set()
+        for file in files:
+            file.thread.join(timeout=1.0)
+            with self.verrou, file.condition:
+                self.abandonnés += len(file.paquets)
+                file.paquets.clear()
@@ -0,0 +1,111 @@
+import os
+import re
+import json
+import time
+
+from src.Composants.Algorithme_de_chiffrage import RSA
+from src.Composants.Journalisation import obtient_journal
+
+journal = obtient_journal("clés")
+
+class MagasinDeClés:
+    """
+    Stockage sur disque des paires de clés des routeurs (un fichier JSON par identifiant de routeur),
+    pour éviter de régénérer une clé à chaque redémarrage.
+    """
+    def __init__(self, dossier: str, taille_clé: int = 1024, âge_max: float | None = None):
+        """
+        Initialise le magasin de clés
+
+        Args:
+            dossier (str): Dossier où sont rangées les clés
+            taille_clé (int): Taille de clé attendue, une clé d'une autre taille est régénérée
+            âge_max (float | None): Âge maximal d'une clé en secondes avant rotation (None = pas de limite)
+        """
+        self.dossier: str = dossier
+        self.taille_clé: int = taille_clé
+        self.âge_max: float | None = âge_max
+
+    def chemin(self, id_routeur: str) -> str:
+        """
+        Chemin du fichier de clé d'un routeur (l'identifiant est nettoyé pour rester un nom de fichier valide)
+
+        Args:
+            id_routeur (str): Identifiant du routeur
+        """
+        nom: str = re.sub(r"[^A-Za-z0-9_.-]", "_", id_routeur)
+        return os.path.join(self.dossier, f"{nom}.json")
+
+    def charge(self, id_routeur: str) -> RSA | None:
+        """
+        Charge la clé d'un routeur si elle existe et respecte la politique (taille et âge)
+
+        Args:
+            id_routeur (str): Identifiant du routeur
+
+        Returns:
+            RSA | None: Le chiffreur prêt à l'emploi, ou None s'il faut générer une nouvelle clé
+        """
+        try:
+            with open(self.chemin(id_routeur), 'r', encoding='utf-8') as f:
+                contenu: dict = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            journal.error(f"Fichier de clé illisible pour {id_routeur}: {e}")
+            return None
+
+        if int(contenu.get("taille_clé", 0)) != self.taille_clé:
+            journal.info(f"Taille de clé différente pour {id_routeur}, rotation")
+            return None
+        if self.âge_max is not None and time.time() - float(contenu.get("créée_le", 0)) > self.âge_max:
+            journal.info(f"Clé de {id_routeur} trop ancienne, rotation")
+            return None
+
+        cipher: RSA = RSA(self.taille_clé)
+        try:
+            cipher.importe_clés(contenu)
+        except (KeyError, ValueError) as e:
+            journal.error(f"Clé invalide pour {id_routeur}: {e}")
+            return None
+        return cipher
+
+    def sauvegarde(self, id_routeur: str, cipher: RSA) -> None:
+        """
+        Sauvegarde la clé d'un routeur (écriture atomique, fichier lisible uniquement par son propriétaire)
+
+        Args:
+            id_routeur (str): Identifiant du routeur
+            cipher (RSA): Le chiffreur contenant la paire de clés
+        """
+        os.makedirs(self.dossier, exist_ok=True)
+        contenu: dict = cipher.exporte_clés()
+        contenu["créée_le"] = time.time()
+        chemin: str = self.chemin(id_routeur)
+        temporaire: str = chemin + ".tmp"
+        descripteur: int = os.open(temporaire, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descripteur, 'w', encoding='utf-8') as f:
+            json.dump(contenu, f)
+        os.replace(temporaire, chemin)
+
+    def charge_ou_génère(self, id_routeur: str) -> RSA:
+        """
+        Charge la clé existante du routeur, ou en génère (et sauvegarde) une nouvelle
+
+        Args:
+            id_routeur (str): Identifiant du routeur
+
+        Returns:
+            RSA: Le chiffreur avec sa paire de clés
+        """
+        cipher: RSA | None = self.charge(id_routeur)
+        if cipher:
+            journal.info(f"Clé de {id_routeur} chargée depuis {self.chemin(id_routeur)}")
+            return cipher
+        cipher = RSA(self.taille_clé)
+        cipher.generate_keys()
+        try:
+            self.sauvegarde(id_routeur, cipher)
+        except OSError as e:
+            journal.error(f"Impossible de sauvegarder la clé de {id_routeur}: {e}")
+        return cipher
@@ -0,0 +1,143 @@
+import bisect
+import os
+import threading
+import time
+
+# Bornes supérieures des seaux des histogrammes, en millisecondes (le dernier seau compte tout ce qui dépasse)
+BORNES_MS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Histogramme:
+    """
+    Histogramme de latences à seaux fixes: ajout en temps constant, quantiles approchés à la borne du seau
+    """
+    def __init__(self):
+        """
+        Initialise un histogramme vide
+        """
+        self.seaux: list[int] = [0] * (len(BORNES_MS) + 1)
+        self.nombre: int = 0
+        self.somme: float = 0.0
+        self.min: float = float("inf")
+        self.max: float = 0.0
+
+    def ajoute(self, ms: float) -> None:
+        """
+        Ajoute une mesure
+
+        Args:
+            ms (float): Durée en millisecondes
+        """
+        self.seaux[bisect.bisect_left(BORNES_MS, ms)] += 1
+        self.nombre += 1
+        self.somme += ms
+        if ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q: float) -> float:
+        """
+        Quantile approché: borne supérieure du seau qui contient la q-ième mesure
+
+        Args:
+            q (float): Entre 0 et 1 (0.99 pour le p99)
+
+        Returns:
+            float: La durée en millisecondes (le maximum observé pour le dernier seau)
+        """
+        if not self.nombre:
+            return 0.0
+        rang: float = q * self.nombre
+        cumul: int = 0
+        for i, n in enumerate(self.seaux):
+            cumul += n
+            if cumul >= rang and n:
+                return min(BORNES_MS[i], self.max) if i < len(BORNES_MS) else self.max
+        return self.max
+
+    def instantané(self) -> dict:
+        """
+        Résumé de l'histogramme
+
+        Returns:
+            dict: nombre, moyenne, min, max, p50, p90, p99 (en ms) et les seaux non vides
+        """
+        return {
+            "nombre": self.nombre,
+            "moyenne": round(self.somme / self.nombre, 3) if self.nombre else 0.0,
+            "min": round(self.min, 3) if self.nombre else 0.0,
+            "max": round(self.max, 3),
+            "p50": round(self.quantile(0.50), 3),
+            "p90": round(self.quantile(0.90), 3),
+            "p99": round(self.quantile(0.99), 3),
+            "seaux": {
+                (f"<={BORNES_MS[i]}" if i < len(BORNES_MS) else f">{BORNES_MS[-1]}"): n
+                for i, n in enumerate(self.seaux) if n
+            },
+        }
+
+class Métriques:
+    """
+    Compteurs et histogrammes de latence par étape, partagés par tous les threads d'un processus
+    """
+    def __init__(self):
+        """
+        Initialise des métriques vides
+        """
+        self.verrou: threading.Lock = threading.Lock()
+        self.compteurs: dict[str, int] = {}
+        self.histogrammes: dict[str, Histogramme] = {}
+        self.début: float = time.time()
+
+    def incrémente(self, nom: str, n: int = 1) -> None:
+        """
+        Ajoute n à un compteur (créé à zéro au premier appel)
+
+        Args:
+            nom (str): Nom du compteur
+            n (int): Valeur à ajouter
+        """
+        with self.verrou:
+            self.compteurs[nom] = self.compteurs.get(nom, 0) + n
+
+    def valeur(self, nom: str) -> int:
+        """
+        Valeur courante d'un compteur
+
+        Args:
+            nom (str): Nom du compteur
+
+        Returns:
+            int: La valeur, 0 si le compteur n'existe pas encore
+        """
+        with self.verrou:
+            return self.compteurs.get(nom, 0)
+
+    def observe(self, étape: str, durée: float) -> None:
+        """
+        Enregistre la durée d'une étape
+
+        Args:
+            étape (str): Nom de l'étape
+            durée (float): Durée en secondes (différence de deux time.perf_counter())
+        """
+        with self.verrou:
+            histogramme: Histogramme | None = self.histogrammes.get(étape)
+            if histogramme is None:
+                histogramme = self.histogrammes[étape] = Histogramme()
+            histogramme.ajoute(durée * 1000)
+
+    def instantané(self) -> dict:
+        """
+        Copie cohérente de toutes les métriques, sérialisable en JSON
+
+        Returns:
+            dict: pid, durée de fonctionnement, compteurs et latences par étape (ms)
+        """
+        with self.verrou:
+            return {
+                "pid": os.getpid(),
+                "durée_fonctionnement_s": round(time.time() - self.début, 1),
+                "compteurs": dict(sorted(self.compteurs.items())),
+                "latences_ms": {étape: h.instantané() for étape, h in sorted(self.histogrammes.items())},
+            }
@@ -0,0 +1,215 @@
+import socket
+import struct
+import secrets
+from typing import Iterator
+
+from src.Composants import Algorithme_de_chiffrage
+from src.Composants.Algorithme_de_chiffrage import RSA, chiffre_entier, flux_de_clé, xor_octets, TAILLE_CLÉ_SESSION
+
+# Cellule de taille fixe: version (1 octet) | corps de TAILLE_CELLULE octets.
+# Chaque saut retire du début du corps sa clé de session chiffrée et son bloc de routage,
+# puis complète la fin avec autant d'octets aléatoires: la cellule transmise garde la même taille.
+VERSION_CELLULE: int = 3
+TAILLE_CELLULE: int = 8192
+# Routage: marqueur | type | IPv4 | port
+ROUTAGE: struct.Struct = struct.Struct(">4sB4sH")
+MARQUEUR_ROUTAGE: bytes = b"CELL"
+TYPE_RELAIS: int = 0
+TYPE_FINALE: int = 1
+LONGUEUR: struct.Struct = struct.Struct(">I")
+# Un entête "ip|port|" des anciens formats ne dépasse jamais cette taille
+TAILLE_MAX_ENTÊTE: int = 64
+
+def largeur_clé(clé_publique: tuple[int, int]) -> int:
+    """
+    Taille en octets d'un bloc RSA pour une clé publique
+
+    Args:
+        clé_publique (tuple[int, int]): La clé publique (n, e)
+    """
+    return (clé_publique[0].bit_length() + 7) // 8
+
+def capacité_cellule(chemin: list[dict], taille: int = TAILLE_CELLULE) -> int:
+    """
+    Nombre d'octets de message que peut transporter une cellule sur ce chemin
+
+    Args:
+        chemin (list[dict]): Les routeurs du chemin (avec leur clé "key")
+        taille (int): Taille du corps de la cellule
+    """
+    return taille - sum(largeur_clé(r["key"]) + ROUTAGE.size for r in chemin) - LONGUEUR.size
+
+def construit_cellule(chemin: list[dict], ip_destination: str, port_destination: int, message: bytes, taille: int = TAILLE_CELLULE) -> bytes:
+    """
+    Construit une cellule de taille fixe à travers le chemin, du dernier saut vers le premier
+
+    Args:
+        chemin (list[dict]): Les routeurs du chemin, dans l'ordre de traversée
+        ip_destination (str): IPv4 du client destinataire
+        port_destination (int): Port du client destinataire
+        message (bytes): Le message à transmettre
+        taille (int): Taille du corps de la cellule
+
+    Raises:
+        ValueError: Le message ne tient pas dans la cellule
+
+    Returns:
+        bytes: La cellule prête à être envoyée au premier routeur
+    """
+    if len(message) > capacité_cellule(chemin, taille):
+        raise ValueError(f"Message trop long pour une cellule ({capacité_cellule(chemin, taille)} octets max sur ce chemin)")
+
+    # Partie utile du corps vu par chaque saut: la fin est remplacée par le bourrage des sauts précédents
+    utiles: list[int] = [taille]
+    for r in chemin[:-1]:
+        utiles.append(utiles[-1] - largeur_clé(r["key"]) - ROUTAGE.size)
+
+    corps: bytes = b""
+    for i in range(len(chemin) - 1, -1, -1):
+        largeur: int = largeur_clé(chemin[i]["key"])
+        if i == len(chemin) - 1:
+            routage: bytes = ROUTAGE.pack(MARQUEUR_ROUTAGE, TYPE_FINALE, socket.inet_aton(ip_destination), int(port_destination))
+            clair: bytes = routage + LONGUEUR.pack(len(message)) + message
+            clair += bytes(utiles[i] - largeur - len(clair))
+        else:
+            suivant: dict = chemin[i + 1]
+            routage = ROUTAGE.pack(MARQUEUR_ROUTAGE, TYPE_RELAIS, socket.inet_aton(suivant["ip"]), int(suivant["port"]))
+            clair = routage + corps
+        clé_session: bytes = secrets.token_bytes(TAILLE_CLÉ_SESSION)
+        moteur = Algorithme_de_chiffrage.MOTEUR
+        clé_chiffrée: bytes = moteur.vers_octets(chiffre_entier(moteur.depuis_octets(clé_session), chemin[i]["key"]), largeur)
+        corps = clé_chiffrée + xor_octets(clair, flux_de_clé(clé_session, len(clair)))
+    return bytes([VERSION_CELLULE]) + corps
+
+def ouvre_cellule(cipher: RSA, cellule: bytes | memoryview) -> tuple[int, str, int, tuple | memoryview]:
+    """
+    Retire la couche d'un saut: une seule opération RSA, puis un XOR de la taille de la cellule.
+    Le seul octet recopié est celui du clair produit par le XOR: le reste est découpé en vues.
+
+    Args:
+        cipher (RSA): Le chiffreur du routeur (avec sa clé privée)
+        cellule (bytes | memoryview): La cellule reçue
+
+    Raises:
+        ValueError: Cellule malformée ou chiffrée pour une autre clé
+
+    Returns:
+        tuple[int, str, int, tuple | memoryview]: (type, ip, port, contenu) où contenu est la cellule à relayer
+        en morceaux (TYPE_RELAIS, voir Trame.Paquet) ou le message final (TYPE_FINALE)
+    """
+    if not cellule or cellule[0] != VERSION_CELLULE:
+        raise ValueError("Ce n'est pas une cellule")
+    corps: memoryview = memoryview(cellule)[1:]
+    largeur: int = largeur_clé(cipher.clé_publique)
+    if len(corps) < largeur + ROUTAGE.size + LONGUEUR.size:
+        raise ValueError("Cellule trop courte")
+
+    moteur = Algorithme_de_chiffrage.MOTEUR
+    k_int: int = cipher.déchiffre_entier(moteur.depuis_octets(corps[:largeur]))
+    if k_int.bit_length() > TAILLE_CLÉ_SESSION * 8:
+        raise ValueError("Clé de session invalide")
+    clé_session: bytes = moteur.vers_octets(k_int, TAILLE_CLÉ_SESSION)
+    clair: bytes = xor_octets(corps[largeur:], flux_de_clé(clé_session, len(corps) - largeur))
+
+    marqueur, type_saut, ip, port = ROUTAGE.unpack_from(clair)
+    if marqueur != MARQUEUR_ROUTAGE or type_saut not in (TYPE_RELAIS, TYPE_FINALE):
+        raise ValueError("Bloc de routage invalide")
+    reste: memoryview = memoryview(clair)[ROUTAGE.size:]
+
+    if type_saut == TYPE_FINALE:
+        (longueur,) = LONGUEUR.unpack_from(reste)
+        if longueur > len(reste) - LONGUEUR.size:
+            raise ValueError("Longueur de message invalide")
+        return type_saut, socket.inet_ntoa(ip), port, reste[LONGUEUR.size:LONGUEUR.size + longueur]
+    bourrage: bytes = secrets.token_bytes(largeur + ROUTAGE.size)
+    return type_saut, socket.inet_ntoa(ip), port, (bytes([VERSION_CELLULE]), reste, bourrage)
+
+def lit_entête_routage(flux: Iterator[bytes]) -> tuple[str, str, memoryview] | None:
+    """
+    Lit l'entête "ip|port|" des anciens formats dès les premiers blocs déchiffrés: un paquet
+    qui n'est pas pour nous est rejeté sans déchiffrer le reste
+
+    Args:
+        flux (Iterator[bytes]): Le clair, bloc par bloc (voir RSA.decrypt_flux)
+
+    Raises:
+        ValueError: Erreur de déchiffrement remontée par le flux
+
+    Returns:
+        tuple[str, str, memoryview] | None: (prochaine_ip, prochain_port, payload), None si l'entête est invalide
+    """
+    tampon = bytearray()
+    fin_entête: int = -1
+    for morceau in flux:
+        tampon += morceau
+        premier: int = tampon.find(b'|')
+        if premier != -1:
+            fin_entête = tampon.find(b'|', premier + 1)
+            if fin_entête != -1:
+                break
+        if len(tampon) > TAILLE_MAX_ENTÊTE:
+            return None
+    if fin_entête == -1 or fin_entête > TAILLE_MAX_ENTÊTE:
+        return None
+    try:
+        prochaine_ip, prochain_port = tampon[:fin_entête].decode('utf-8').split('|')
+        int(prochain_port)
+    except ValueError:
+        return None
+
+    for morceau in flux:
+        tampon += morceau
+    return prochaine_ip, prochain_port, memoryview(tampon)[fin_entête + 1:]
+
+def sépare_destination(payload: memoryview) -> tuple[str, str, memoryview] | None:
+    """
+    Lit l'entête "ip|port|" du destinataire final des anciens formats, sans recopier le message
+
+    Args:
+        payload (memoryview): "ip|port|message", tel que rendu par lit_entête_routage
+
+    Returns:
+        tuple[str, str, memoryview] | None: (ip, port, message), None si l'entête est invalide
+    """
+    parties: list[bytes] = bytes(payload[:TAILLE_MAX_ENTÊTE]).split(b'|', 2)
+    if len(parties) < 3:
+        return None
+    try:
+        ip, port = parties[0].decode('utf-8'), parties[1].decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    return ip, port, payload[len(parties[0]) + len(parties[1]) + 2:]
+
+def construit_oignon(cipher: RSA, chemin: list[dict], ip_destination: str, port_destination: int, message: str, format_fil: str = "cellule") -> bytes:
+    """
+    Construit le paquet à envoyer au premier routeur du chemin
+
+    Args:
+        cipher (RSA): Chiffreur utilisé pour les opérations publiques
+        chemin (list[dict]): Les routeurs du chemin, dans l'ordre de traversée
+        ip_destination (str): IP du client destinataire
+        port_destination (int): Port du client destinataire
+        message (str): Le message
+        format_fil (str): "cellule" (taille fixe), "hybride", "binaire" ou "texte"
+
+    Returns:
+        bytes: Le paquet chiffré
+    """
+    if format_fil == "cellule":
+        return construit_cellule(chemin, ip_destination, port_destination, message.encode('utf-8'))
+
+    message_envoye: bytes = f"{ip_destination}|{port_destination}|{message}".encode('utf-8')
+    for i in range(len(chemin)-1, -1, -1):
+        r: dict = chemin[i]
+        if i == len(chemin)-1:
+            prochain_saut = "FINALE|0"
+        else:
+            prochain_saut = f"{chemin[i+1]['ip']}|{chemin[i+1]['port']}"
+        couche: bytes = f"{prochain_saut}|".encode('utf-8') + message_envoye
+        if format_fil == "texte":
+            message_envoye = cipher.encrypt(couche.decode('utf-8'), r["key"]).encode('utf-8')
+        elif format_fil == "binaire":
+            message_envoye = cipher.encrypt_binaire(couche, r["key"])
+        else:
+            message_envoye = cipher.encrypt_hybride(couche, r["key"])
+    return message_envoye
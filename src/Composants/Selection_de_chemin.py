@@ -0,0 +1,57 @@
+import random
+
+# Profondeur de file (paquets en attente) qui compte autant qu'un CPU à 100% dans le poids d'un routeur
+PROFONDEUR_RÉFÉRENCE: int = 8
+# Débit (paquets/s reçus) qui compte autant qu'un CPU à 100%: à charge égale, le trafic est réparti vers les routeurs moins sollicités
+DÉBIT_RÉFÉRENCE: float = 500.0
+
+def poids_routeur(routeur: dict) -> float | None:
+    """
+    Poids d'un routeur pour le tirage du chemin: plus il est chargé, moins il a de chances d'être choisi
+
+    Args:
+        routeur (dict): Routeur reçu du master, avec une clé "charge" s'il a envoyé un rapport récent
+
+    Returns:
+        float | None: Poids entre 0 et 1, None si la charge est inconnue
+    """
+    charge: dict | None = routeur.get("charge")
+    if not charge:
+        return None
+    return 1.0 / (1.0 + charge["profondeur"] / PROFONDEUR_RÉFÉRENCE + charge["paquets_par_s"] / DÉBIT_RÉFÉRENCE
+                  + charge["cpu"] / 100.0)
+
+def choisit_chemin(routeurs: list[dict], nombre_sauts: int, pondéré: bool = True) -> list[dict]:
+    """
+    Tire les routeurs d'un chemin, sans remise. En mode pondéré, un routeur saturé reste possible
+    (le chemin ne doit pas devenir prévisible) mais il est tiré d'autant moins souvent qu'il est chargé.
+
+    Args:
+        routeurs (list[dict]): Routeurs disponibles
+        nombre_sauts (int): Nombre de routeurs du chemin
+        pondéré (bool): False pour un tirage uniforme
+
+    Returns:
+        list[dict]: Les routeurs du chemin, dans l'ordre
+
+    Raises:
+        ValueError: Pas assez de routeurs
+    """
+    if len(routeurs) < nombre_sauts:
+        raise ValueError(f"Pas assez de routeurs: {len(routeurs)} pour {nombre_sauts} sauts")
+    if not pondéré:
+        return random.sample(routeurs, nombre_sauts)
+
+    poids: list[float | None] = [poids_routeur(r) for r in routeurs]
+    connus: list[float] = [p for p in poids if p is not None]
+    # Un routeur sans rapport (ancien routeur, rapport désactivé) est traité comme un routeur moyen
+    défaut: float = sum(connus) / len(connus) if connus else 1.0
+    restants: list[dict] = list(routeurs)
+    poids_restants: list[float] = [défaut if p is None else p for p in poids]
+
+    chemin: list[dict] = []
+    for _ in range(nombre_sauts):
+        i: int = random.choices(range(len(restants)), weights=poids_restants)[0]
+        chemin.append(restants.pop(i))
+        poids_restants.pop(i)
+    return chemin
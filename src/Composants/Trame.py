@@ -0,0 +1,418 @@
+import socket
+import struct
+import zlib
+
+# Trame: marqueur (4 octets) | longueur du contenu (4 octets, big-endian) | contenu
+# Plusieurs trames peuvent se suivre sur une même connexion TCP.
+MARQUEUR_TRAME: bytes = b"SAEt"
+ENTÊTE_TRAME: struct.Struct = struct.Struct(">4sI")
+TAILLE_MAX_TRAME: int = 64 * 1024 * 1024
+# Taille de départ des tampons de réception: ils grandissent ensuite avec les données vraiment reçues
+TAILLE_LECTURE: int = 64 * 1024
+# En dessous de cette taille, entête et contenu partent en un seul envoi (évite deux petits segments TCP)
+SEUIL_ENVOI_GROUPÉ: int = 64 * 1024
+# Tampons passés à un seul sendmsg (IOV_MAX vaut 1024 sous Linux)
+TAMPONS_MAX_ENVOI: int = 512
+
+# Un paquet à envoyer est soit un bloc d'octets, soit un tuple de morceaux envoyés à la suite sans être recollés
+# (entêtes ajoutés par le routeur + vue sur le tampon reçu): le contenu relayé n'est jamais recopié
+Paquet = bytes | bytearray | memoryview | tuple
+
+# Entête d'un paquet destiné à un routeur: magique (4 octets) | version (1 octet) | longueur (4 octets) | CRC32 (4 octets)
+# Vérifié avant toute opération RSA: un paquet quelconque envoyé sur le port est rejeté pour le prix d'un CRC32.
+# Le CRC détecte les données corrompues ou aléatoires, pas un émetteur malveillant qui le recalcule.
+MAGIQUE_PAQUET: bytes = b"SAEp"
+VERSION_ENTÊTE_PAQUET: int = 1
+ENTÊTE_PAQUET: struct.Struct = struct.Struct(">4sBII")
+
+def recois_exactement(sock: socket.socket, taille: int) -> bytearray | None:
+    """
+    Lit exactement `taille` octets sur une socket, directement dans le tampon de sortie.
+    Le tampon grandit avec les données reçues (il double) au lieu d'être alloué d'après la longueur annoncée:
+    une trame qui annonce 64 Mo sans les envoyer ne coûte que ce qui est réellement arrivé.
+
+    Args:
+        sock (socket.socket): La socket
+        taille (int): Nombre d'octets à lire
+
+    Returns:
+        bytearray | None: Les octets lus, None si la connexion est fermée avant la fin
+    """
+    tampon = bytearray(min(taille, TAILLE_LECTURE))
+    reçu: int = 0
+    while reçu < taille:
+        if reçu == len(tampon):
+            tampon.extend(bytes(min(len(tampon), taille - reçu)))
+        # Vue relâchée après chaque recv: un bytearray ne peut pas grandir tant qu'une vue existe
+        with memoryview(tampon) as vue:
+            n: int = sock.recv_into(vue[reçu:])
+        if not n:
+            return None
+        reçu += n
+    return tampon
+
+class AssembleurMessage:
+    """
+    Lecture non bloquante d'une connexion: accumule les octets à mesure qu'ils arrivent et rend chaque message
+    une fois complet (trame, ou message de l'ancien format). Le tampon grandit avec les données reçues,
+    jamais d'après la longueur annoncée. Les octets d'une trame suivante déjà reçus sont gardés pour la suite.
+    """
+    def __init__(self, taille_max_ancien: int = 65536):
+        """
+        Initialise un assembleur vide
+
+        Args:
+            taille_max_ancien (int): Taille maximale lue pour un message de l'ancien format
+        """
+        self.taille_max_ancien: int = taille_max_ancien
+        self.tampon: bytearray = bytearray()  # Alloué à la première lecture: une connexion muette ne coûte rien
+        self.rempli: int = 0
+        self.fermé: bool = False
+
+    def attendu(self) -> int:
+        """
+        Taille totale du message en cours, d'après ce qui est déjà reçu
+
+        Raises:
+            ValueError: Marqueur ou longueur de trame invalide
+
+        Returns:
+            int: Octets nécessaires (entête compris) pour une trame, taille_max_ancien pour l'ancien format
+        """
+        if self.rempli >= ENTÊTE_TRAME.size and self.tampon[:len(MARQUEUR_TRAME)] == MARQUEUR_TRAME:
+            return ENTÊTE_TRAME.size + longueur_trame(self.tampon[:ENTÊTE_TRAME.size])
+        return max(self.taille_max_ancien, ENTÊTE_TRAME.size)
+
+    def lit(self, sock: socket.socket) -> bool:
+        """
+        Lit ce qui est disponible sur la socket (un seul recv)
+
+        Args:
+            sock (socket.socket): La socket, lisible ou non bloquante
+
+        Raises:
+            ValueError: Marqueur ou longueur de trame invalide
+
+        Returns:
+            bool: False si la connexion est fermée par l'autre côté
+        """
+        if self.rempli == len(self.tampon):
+            # Tampon plein: il double, sans dépasser la taille du message en cours
+            croissance: int = min(max(len(self.tampon), TAILLE_LECTURE), max(self.attendu() - self.rempli, 1))
+            self.tampon.extend(bytes(croissance))
+        n: int = sock.recv_into(memoryview(self.tampon)[self.rempli:])
+        if not n:
+            self.fermé = True
+            return False
+        self.rempli += n
+        return True
+
+    def en_cours(self) -> bool:
+        """
+        Un message a-t-il commencé à arriver
+        """
+        return self.rempli > 0
+
+    def message(self) -> tuple[memoryview | bytes, bool] | None:
+        """
+        Retire le premier message complet
+
+        Raises:
+            ValueError: Marqueur ou longueur de trame invalide
+
+        Returns:
+            tuple[memoryview | bytes, bool] | None: (contenu, True si c'était une trame), None s'il manque des octets
+        """
+        début: bytes = bytes(self.tampon[:min(self.rempli, len(MARQUEUR_TRAME))])
+        if not début:
+            return None
+        if len(début) < len(MARQUEUR_TRAME) and MARQUEUR_TRAME.startswith(début) and not self.fermé:
+            return None  # Peut encore devenir un marqueur de trame
+        if début != MARQUEUR_TRAME:
+            # Ancien format: un seul message par connexion, tel qu'il est arrivé
+            contenu: bytes = bytes(self.tampon[:self.rempli])
+            self.rempli = 0
+            return contenu, False
+        if self.rempli < ENTÊTE_TRAME.size:
+            return None
+        fin: int = self.attendu()
+        if self.rempli < fin:
+            return None
+        # La trame garde son tampon (le contenu est rendu sans recopie), la suite part dans un nouveau tampon
+        ancien: bytearray = self.tampon
+        suite = memoryview(ancien)[fin:self.rempli]
+        self.tampon = bytearray(suite)
+        self.rempli = len(suite)
+        suite.release()
+        return memoryview(ancien)[ENTÊTE_TRAME.size:fin], True
+
+def emballe_trame(données: bytes) -> bytes:
+    """
+    Ajoute l'entête de trame devant des données
+
+    Args:
+        données (bytes): Le contenu de la trame
+    """
+    return ENTÊTE_TRAME.pack(MARQUEUR_TRAME, len(données)) + données
+
+def taille_paquet(paquet: Paquet) -> int:
+    """
+    Taille d'un paquet, en un bloc ou en morceaux
+
+    Args:
+        paquet (Paquet): Le paquet
+    """
+    return sum(len(m) for m in paquet) if isinstance(paquet, tuple) else len(paquet)
+
+class EnvoiInterrompu(OSError):
+    """
+    Échec au milieu d'un envoi: indique ce qui est déjà parti, pour ne renvoyer que le reste
+    """
+    def __init__(self, erreur: OSError, envoyé: int = 0, trames_envoyées: int = 0):
+        """
+        Initialise l'erreur à partir de l'erreur d'origine
+
+        Args:
+            erreur (OSError): L'erreur de la socket (ou de la connexion)
+            envoyé (int): Octets déjà acceptés par le noyau
+            trames_envoyées (int): Trames parties en entier, à ne pas renvoyer
+        """
+        super().__init__(*erreur.args)
+        self.envoyé: int = envoyé
+        self.trames_envoyées: int = trames_envoyées
+
+def envoie_tampons(sock: socket.socket, tampons: list) -> int:
+    """
+    Envoie des tampons à la suite avec sendmsg (écriture vectorisée: un seul appel système, aucune recopie)
+
+    Args:
+        sock (socket.socket): La socket
+        tampons (list): Les tampons (bytes, bytearray ou memoryview), dans l'ordre
+
+    Raises:
+        EnvoiInterrompu: Erreur de la socket, avec le nombre d'octets envoyés avant elle
+
+    Returns:
+        int: Nombre d'octets envoyés
+    """
+    vues: list[memoryview] = [memoryview(t).cast("B") for t in tampons if len(t)]
+    vectorisé: bool = hasattr(sock, "sendmsg")
+    if not vectorisé:
+        # Pas de sendmsg (Windows): les petits tampons sont regroupés, les gros envoyés tels quels
+        blocs: list[memoryview] = []
+        groupe = bytearray()
+        for vue in vues:
+            if len(vue) > SEUIL_ENVOI_GROUPÉ:
+                if groupe:
+                    blocs.append(memoryview(groupe))
+                    groupe = bytearray()
+                blocs.append(vue)
+            else:
+                groupe += vue
+        if groupe:
+            blocs.append(memoryview(groupe))
+        vues = blocs
+    total: int = 0
+    try:
+        while vues:
+            envoyé: int = sock.sendmsg(vues[:TAMPONS_MAX_ENVOI]) if vectorisé else sock.send(vues[0])
+            total += envoyé
+            # Envoi partiel: on retire les tampons partis et on raccourcit le premier tampon restant
+            while envoyé:
+                if envoyé >= len(vues[0]):
+                    envoyé -= len(vues.pop(0))
+                else:
+                    vues[0] = vues[0][envoyé:]
+                    envoyé = 0
+    except OSError as e:
+        raise EnvoiInterrompu(e, total) from e
+    return total
+
+def envoie_trame(sock: socket.socket, données: Paquet) -> None:
+    """
+    Envoie une trame complète sur une socket (sans recopier le contenu)
+
+    Args:
+        sock (socket.socket): La socket
+        données (Paquet): Le contenu de la trame, en un bloc ou en morceaux
+    """
+    envoie_trames(sock, [données])
+
+def envoie_trames(sock: socket.socket, paquets: list[Paquet]) -> None:
+    """
+    Envoie plusieurs trames à la suite en un seul sendmsg: entêtes de trame et morceaux des paquets
+    sont passés au noyau tels quels, sans être recollés
+
+    Args:
+        sock (socket.socket): La socket
+        paquets (list[Paquet]): Les contenus des trames, dans l'ordre
+
+    Raises:
+        EnvoiInterrompu: Erreur de la socket, avec le nombre de trames parties en entier avant elle
+    """
+    tampons: list = []
+    tailles: list[int] = []
+    for paquet in paquets:
+        tailles.append(taille_paquet(paquet))
+        tampons.append(ENTÊTE_TRAME.pack(MARQUEUR_TRAME, tailles[-1]))
+        if isinstance(paquet, tuple):
+            tampons.extend(paquet)
+        else:
+            tampons.append(paquet)
+    try:
+        envoie_tampons(sock, tampons)
+    except EnvoiInterrompu as e:
+        # Une trame coupée en route compte comme non envoyée: le récepteur la jette avec la connexion
+        fin: int = 0
+        for taille in tailles:
+            fin += ENTÊTE_TRAME.size + taille
+            if fin > e.envoyé:
+                break
+            e.trames_envoyées += 1
+        raise
+
+def longueur_trame(entête: bytes) -> int:
+    """
+    Vérifie un entête de trame complet et renvoie la longueur du contenu annoncé
+
+    Args:
+        entête (bytes): Les ENTÊTE_TRAME.size premiers octets
+
+    Raises:
+        ValueError: Marqueur invalide ou longueur trop grande
+    """
+    marqueur, longueur = ENTÊTE_TRAME.unpack(entête)
+    if marqueur != MARQUEUR_TRAME:
+        raise ValueError("Marqueur de trame invalide")
+    if longueur > TAILLE_MAX_TRAME:
+        raise ValueError(f"Trame trop grande: {longueur} octets")
+    return longueur
+
+def recois_suite_trame(sock: socket.socket, début: bytes) -> bytes | None:
+    """
+    Termine la lecture d'une trame dont le marqueur a déjà été lu
+
+    Args:
+        sock (socket.socket): La socket
+        début (bytes): Les 4 premiers octets déjà lus (le marqueur)
+
+    Raises:
+        ValueError: Marqueur invalide ou longueur annoncée trop grande
+
+    Returns:
+        bytearray | None: Le contenu de la trame, None si la connexion est fermée avant la fin
+    """
+    reste: bytearray | None = recois_exactement(sock, ENTÊTE_TRAME.size - len(début))
+    if reste is None:
+        return None
+    return recois_exactement(sock, longueur_trame(début + reste))
+
+def recois_trame(sock: socket.socket) -> bytes | None:
+    """
+    Lit une trame complète sur une socket
+
+    Args:
+        sock (socket.socket): La socket
+
+    Raises:
+        ValueError: Ce n'est pas une trame ou la longueur annoncée est trop grande
+
+    Returns:
+        bytearray | None: Le contenu de la trame, None si la connexion est fermée
+    """
+    marqueur: bytearray | None = recois_exactement(sock, len(MARQUEUR_TRAME))
+    if marqueur is None:
+        return None
+    if marqueur != MARQUEUR_TRAME:
+        raise ValueError("Marqueur de trame invalide")
+    return recois_suite_trame(sock, marqueur)
+
+def recois_message(sock: socket.socket, taille_max_ancien: int = 65536) -> tuple[bytes | None, bool]:
+    """
+    Lit un message: une trame complète, ou à défaut un message de l'ancien format (sans entête)
+    tel que renvoyé par un seul recv
+
+    Args:
+        sock (socket.socket): La socket
+        taille_max_ancien (int): Taille maximale lue pour un message de l'ancien format
+
+    Raises:
+        ValueError: Longueur de trame annoncée trop grande
+
+    Returns:
+        tuple[bytes | None, bool]: (contenu, None si la connexion est fermée ; True si le message était tramé)
+    """
+    début = bytearray()
+    while len(début) < len(MARQUEUR_TRAME):
+        morceau: bytes = sock.recv(len(MARQUEUR_TRAME) - len(début))
+        if not morceau:
+            # Message de l'ancien format plus court qu'un marqueur (ex: "ACK")
+            return (bytes(début), False) if début else (None, False)
+        début += morceau
+        if not MARQUEUR_TRAME.startswith(début):
+            break
+    if début == MARQUEUR_TRAME:
+        return recois_suite_trame(sock, bytes(début)), True
+    return bytes(début) + sock.recv(taille_max_ancien), False
+
+def paquet_en_morceaux(*morceaux: bytes | bytearray | memoryview) -> tuple:
+    """
+    Paquet destiné à un routeur, sans recoller ses morceaux: l'entête (magique, version, longueur, CRC32)
+    est calculé sur les morceaux successifs
+
+    Args:
+        *morceaux (bytes | bytearray | memoryview): Le paquet en un ou plusieurs morceaux
+
+    Returns:
+        tuple: (entête, *morceaux), à passer à envoie_trame(s)
+    """
+    crc: int = 0
+    for morceau in morceaux:
+        crc = zlib.crc32(morceau, crc)
+    entête: bytes = ENTÊTE_PAQUET.pack(MAGIQUE_PAQUET, VERSION_ENTÊTE_PAQUET, sum(len(m) for m in morceaux), crc)
+    return (entête, *morceaux)
+
+def emballe_paquet(données: bytes) -> bytes:
+    """
+    Ajoute l'entête de paquet (magique, version, longueur, CRC32) devant un paquet destiné à un routeur
+
+    Args:
+        données (bytes): Le paquet (oignon, cellule ou cellule de circuit)
+    """
+    return b"".join(paquet_en_morceaux(données))
+
+def a_un_entête_paquet(données: bytes) -> bool:
+    """
+    Le paquet commence-t-il par l'entête de paquet (les anciens émetteurs n'en mettent pas)
+
+    Args:
+        données (bytes): Le paquet reçu
+    """
+    return données[:len(MAGIQUE_PAQUET)] == MAGIQUE_PAQUET
+
+def déballe_paquet(données: bytes | bytearray) -> memoryview:
+    """
+    Vérifie l'entête de paquet et le retire
+
+    Args:
+        données (bytes): Le paquet reçu
+
+    Raises:
+        ValueError: Magique, version, longueur ou CRC32 incorrect
+
+    Returns:
+        memoryview: Le paquet sans son entête (vue sur le tampon reçu, sans recopie)
+    """
+    if len(données) < ENTÊTE_PAQUET.size:
+        raise ValueError("Paquet plus court que son entête")
+    magique, version, longueur, crc = ENTÊTE_PAQUET.unpack_from(données)
+    if magique != MAGIQUE_PAQUET:
+        raise ValueError("Magique de paquet invalide")
+    if version != VERSION_ENTÊTE_PAQUET:
+        raise ValueError(f"Version d'entête inconnue: {version}")
+    if longueur != len(données) - ENTÊTE_PAQUET.size:
+        raise ValueError(f"Longueur annoncée {longueur}, reçu {len(données) - ENTÊTE_PAQUET.size}")
+    contenu: memoryview = memoryview(données)[ENTÊTE_PAQUET.size:]
+    if zlib.crc32(contenu) != crc:
+        raise ValueError("CRC32 du paquet invalide")
+    return contenu
@@ -0,0 +1,304 @@
+import ipaddress
+import os
+import socket
+import stat
+import struct
+import tempfile
+import threading
+
+from src.Composants.Journalisation import obtient_journal
+
+journal = obtient_journal("transport")
+
+# Les sockets Unix n'existent pas partout (anciens Windows), et sans identifiant d'utilisateur (Windows)
+# on ne peut pas vérifier à qui ils appartiennent: tout repasse alors par TCP
+UDS_DISPONIBLE: bool = hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+# Adresse donnée aux connexions acceptées sur un socket Unix (elles n'ont pas d'adresse IP)
+ADRESSE_UDS: str = "uds"
+
+# Chemins annoncés par le master pour les destinations de cette machine: {port: chemin}
+_annuaire: dict[int, str] = {}
+_verrou: threading.Lock = threading.Lock()
+_adresses_locales: set[str] | None = None
+_dossier: str | None = None
+_dossier_vérifié: bool = False
+
+def dossier_uds() -> str | None:
+    """
+    Dossier privé des sockets Unix: $XDG_RUNTIME_DIR/sae302, sinon sae302-<uid> dans le dossier temporaire.
+    Il est créé en 0700; un dossier existant qui n'est pas un vrai dossier de l'utilisateur courant, ou que
+    d'autres utilisateurs peuvent ouvrir, est refusé (ils pourraient y placer un faux socket).
+
+    Returns:
+        str | None: Le dossier, None s'il n'est pas sûr (tout passe alors par TCP)
+    """
+    global _dossier, _dossier_vérifié
+    with _verrou:
+        if _dossier_vérifié:
+            return _dossier
+        _dossier_vérifié = True
+        if not UDS_DISPONIBLE:
+            return None
+        base: str | None = os.environ.get("XDG_RUNTIME_DIR")
+        dossier: str = os.path.join(base, "sae302") if base else os.path.join(tempfile.gettempdir(), f"sae302-{os.getuid()}")
+        try:
+            os.mkdir(dossier, 0o700)
+        except FileExistsError:
+            pass
+        except OSError as e:
+            journal.warning("Impossible de créer %s (%s), sockets Unix désactivés", dossier, e)
+            return None
+        try:
+            info: os.stat_result = os.lstat(dossier)
+        except OSError as e:
+            journal.warning("Dossier %s inaccessible (%s), sockets Unix désactivés", dossier, e)
+            return None
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+            journal.warning("Dossier %s non privé (propriétaire ou droits), sockets Unix désactivés", dossier)
+            return None
+        _dossier = dossier
+        return dossier
+
+def chemin_uds_défaut(port: int) -> str | None:
+    """
+    Chemin du socket Unix d'un routeur ou d'un client qui écoute sur un port TCP donné
+
+    Args:
+        port (int): Port TCP d'écoute
+
+    Returns:
+        str | None: Le chemin, dans le dossier privé de l'utilisateur, None s'il n'y en a pas de sûr
+    """
+    dossier: str | None = dossier_uds()
+    return os.path.join(dossier, f"sae302_{int(port)}.sock") if dossier else None
+
+def adresses_locales() -> set[str]:
+    """
+    Adresses IP de cette machine (calculées une seule fois)
+
+    Returns:
+        set[str]: Les adresses, dont celle de l'interface de sortie par défaut
+    """
+    global _adresses_locales
+    if _adresses_locales is None:
+        adresses: set[str] = set()
+        try:
+            adresses.update(socket.gethostbyname_ex(socket.gethostname())[2])
+        except OSError:
+            pass
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.connect(('8.8.8.8', 1))
+            adresses.add(s.getsockname()[0])
+        except OSError:
+            pass
+        finally:
+            s.close()
+        _adresses_locales = adresses
+    return _adresses_locales
+
+def est_locale(ip: str) -> bool:
+    """
+    Indique si une adresse désigne cette machine
+
+    Args:
+        ip (str): Adresse IP (ou "localhost")
+
+    Returns:
+        bool: True pour une adresse de bouclage ou une adresse d'une interface locale
+    """
+    if ip == "localhost":
+        return True
+    try:
+        if ipaddress.ip_address(ip).is_loopback:
+            return True
+    except ValueError:
+        return False
+    return ip in adresses_locales()
+
+def annonce_chemin(ip: str, port: int, chemin: str | None) -> None:
+    """
+    Retient le socket Unix annoncé par le master pour une destination (ignoré si elle n'est pas sur cette machine).
+    Sur une même machine, un port TCP désigne un seul processus: le chemin est retenu par port.
+
+    Args:
+        ip (str): IP de la destination, telle qu'enregistrée auprès du master
+        port (int): Port TCP de la destination
+        chemin (str | None): Chemin du socket Unix, None pour l'oublier
+    """
+    if not est_locale(ip):
+        return
+    with _verrou:
+        if chemin:
+            _annuaire[int(port)] = chemin
+        else:
+            _annuaire.pop(int(port), None)
+
+def lit_annuaire(texte: str) -> list[tuple[str, int, str]]:
+    """
+    Découpe l'annuaire des sockets Unix envoyé par le master
+
+    Args:
+        texte (str): "ip:port:chemin;ip:port:chemin;..." (le chemin peut contenir des ':')
+
+    Returns:
+        list[tuple[str, int, str]]: Les entrées (ip, port, chemin) bien formées
+    """
+    entrées: list[tuple[str, int, str]] = []
+    for entrée in texte.split(";"):
+        ip, _, reste = entrée.partition(":")
+        port, _, chemin = reste.partition(":")
+        if ip and port.isdigit() and chemin:
+            entrées.append((ip, int(port), chemin))
+    return entrées
+
+def remplace_annuaire(entrées: list[tuple[str, int, str]]) -> None:
+    """
+    Remplace tous les chemins connus par l'annuaire complet du master (les destinations parties sont oubliées)
+
+    Args:
+        entrées (list[tuple[str, int, str]]): (ip, port, chemin) de chaque destination qui écoute sur un socket Unix
+    """
+    locales: dict[int, str] = {int(port): chemin for ip, port, chemin in entrées if chemin and est_locale(ip)}
+    with _verrou:
+        _annuaire.clear()
+        _annuaire.update(locales)
+
+def chemin_local(ip: str, port: int) -> str | None:
+    """
+    Socket Unix à utiliser pour joindre une destination. Seuls les chemins annoncés par le master sont utilisés,
+    jamais un chemin deviné d'après le port.
+
+    Args:
+        ip (str): IP de la destination
+        port (int): Port TCP de la destination
+
+    Returns:
+        str | None: Le chemin annoncé, None si la destination n'est pas locale ou n'en a pas annoncé
+    """
+    if not UDS_DISPONIBLE or not est_locale(ip):
+        return None
+    with _verrou:
+        chemin: str | None = _annuaire.get(int(port))
+    return chemin if chemin and os.path.exists(chemin) else None
+
+def pair_de_confiance(sock: socket.socket) -> bool:
+    """
+    Le processus à l'autre bout d'un socket Unix appartient-il à l'utilisateur courant (SO_PEERCRED, Linux)
+
+    Args:
+        sock (socket.socket): La connexion AF_UNIX
+
+    Returns:
+        bool: True si c'est le même utilisateur, ou si le système ne permet pas de le savoir
+        (le propriétaire du fichier a alors été vérifié avant la connexion)
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True
+    identité = struct.Struct("3i")  # pid, uid, gid
+    try:
+        _, uid, _ = identité.unpack(sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, identité.size))
+    except OSError:
+        return False
+    return uid == os.getuid()
+
+def connecte(ip: str, port: int, timeout: float | None = 5.0) -> socket.socket:
+    """
+    Ouvre une connexion vers une destination: socket Unix si elle est sur cette machine et en écoute,
+    TCP sinon (ou si le socket Unix refuse la connexion, par exemple un fichier resté après un arrêt brutal).
+    Le socket Unix n'est utilisé que si le fichier et le processus qui écoute appartiennent à l'utilisateur courant.
+
+    Args:
+        ip (str): IP de la destination
+        port (int): Port TCP de la destination
+        timeout (float | None): Timeout de connexion et des envois
+
+    Returns:
+        socket.socket: La connexion (AF_UNIX ou AF_INET)
+
+    Raises:
+        OSError: Destination injoignable
+    """
+    chemin: str | None = chemin_local(ip, port)
+    if chemin is not None:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(timeout)
+        try:
+            if os.stat(chemin).st_uid != os.getuid():
+                raise PermissionError(f"{chemin} appartient à un autre utilisateur")
+            s.connect(chemin)
+            if not pair_de_confiance(s):
+                raise PermissionError(f"le processus qui écoute sur {chemin} appartient à un autre utilisateur")
+            return s
+        except PermissionError as e:
+            s.close()
+            journal.warning("Socket Unix refusé (%s), repli sur TCP", e)
+        except OSError as e:
+            s.close()
+            journal.debug("Socket Unix %s inutilisable (%s), repli sur TCP", chemin, e)
+    return socket.create_connection((ip, int(port)), timeout=timeout)
+
+def est_uds(sock: socket.socket) -> bool:
+    """
+    Indique si une connexion passe par un socket Unix
+
+    Args:
+        sock (socket.socket): La connexion
+
+    Returns:
+        bool: True pour AF_UNIX
+    """
+    return UDS_DISPONIBLE and sock.family == socket.AF_UNIX
+
+def écoute_uds(chemin: str, backlog: int = 128) -> socket.socket | None:
+    """
+    Ouvre un socket Unix d'écoute. Un fichier laissé par un processus arrêté est remplacé,
+    mais un socket sur lequel un autre processus écoute encore n'est jamais volé.
+
+    Args:
+        chemin (str): Chemin du socket
+        backlog (int): Connexions en attente max
+
+    Returns:
+        socket.socket | None: Le socket en écoute, None si c'est impossible (la destination reste joignable en TCP)
+    """
+    if not UDS_DISPONIBLE:
+        return None
+    if os.path.exists(chemin):
+        sonde = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sonde.connect(chemin)
+            journal.warning("Le socket Unix %s est déjà utilisé, écoute en TCP seulement", chemin)
+            return None
+        except OSError:
+            pass
+        finally:
+            sonde.close()
+        try:
+            os.unlink(chemin)
+        except OSError as e:
+            journal.warning("Impossible de remplacer %s: %s", chemin, e)
+            return None
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.bind(chemin)
+        os.chmod(chemin, 0o600)  # Un chemin choisi hors du dossier privé reste fermé aux autres utilisateurs
+        s.listen(backlog)
+    except OSError as e:
+        s.close()
+        journal.warning("Impossible d'écouter sur %s: %s", chemin, e)
+        return None
+    return s
+
+def supprime_uds(chemin: str | None) -> None:
+    """
+    Supprime le fichier d'un socket Unix d'écoute à l'arrêt
+
+    Args:
+        chemin (str | None): Chemin du socket
+    """
+    if chemin:
+        try:
+            os.unlink(chemin)
+        except OSError:
+            pass
@@ -2,17 +2,28 @@ import sys
 import socket
 import threading
 import mysql.connector
+import mysql.connector.pooling
 import signal # Pour gérée les interruptions clavier (grâce à signal.SIGINT), j'étais obligé pour géré le fait que le port resté occupé après fermeture
 from PyQt6.QtWidgets import QApplication, QMainWindow, QTextEdit, QVBoxLayout, QWidget, QLabel, QHBoxLayout, QPushButton
 from PyQt6.QtCore import Qt, QDateTime
 from PyQt6.QtGui import QCloseEvent
 import os
+import time
+import contextlib
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "../.."))
 if project_root not in sys.path: 
     sys.path.insert(0, project_root)
 
+from src.Composants.Trame import envoie_trame, recois_message
+from src.Composants.Journalisation import obtient_journal, configure_journal
+
+journal = obtient_journal("master")
+
+# Un rapport de charge plus ancien est ignoré (le routeur ou son worker ne répond sans doute plus)
+VALIDITÉ_CHARGE: float = 60.0
+
 def chargement_conf_bdd() -> dict:
     """
     Charge la configuration depuis config.conf
@@ -28,14 +39,16 @@ def chargement_conf_bdd() -> dict:
                 val: str
                 clé, val = line.strip().split('=', 1) # a
                 config[clé.strip()] = val.strip()
-                print(f"Chargé: {clé.strip()} = {val.strip()}")
+                journal.debug(f"Chargé: {clé.strip()}")
     except FileNotFoundError:
-        print("Fichier config.conf non trouvé.")
+        journal.error("Fichier config.conf non trouvé.")
         input("Appuyez sur Entrée pour continuer...")
         exit(1)
     return config
 
 DB_CONFIG = chargement_conf_bdd()
+# pool_size n'est pas un paramètre de connexion: il est retiré avant de passer DB_CONFIG à mysql.connector
+TAILLE_RÉSERVE_BDD: int = int(DB_CONFIG.pop("pool_size", 8))
 
 def trouve_ip_local():
     """
@@ -54,6 +67,82 @@ def trouve_ip_local():
         s.close()
     return ip
 
+class RéserveBDD:
+    """
+    Réserve de connexions MariaDB partagée par tous les threads du master, au lieu d'une connexion
+    (et de son authentification) par requête. Un thread qui trouve la réserve vide attend qu'une connexion
+    soit rendue. Avant d'être prêtée, chaque connexion est vérifiée (ping) et rouverte si le serveur l'a fermée.
+    """
+    def __init__(self, config: dict, taille: int = TAILLE_RÉSERVE_BDD, délai_attente: float = 10.0):
+        """
+        Initialise la réserve (les connexions sont ouvertes à la première demande)
+
+        Args:
+            config (dict): Paramètres de connexion (host, user, password, database)
+            taille (int): Connexions ouvertes au maximum (1 à 32, limite de mysql.connector)
+            délai_attente (float): Attente max d'une connexion libre, en secondes
+
+        Raises:
+            ValueError: Taille hors limites
+        """
+        if not 1 <= taille <= mysql.connector.pooling.CNX_POOL_MAXSIZE:
+            raise ValueError(f"pool_size doit être entre 1 et {mysql.connector.pooling.CNX_POOL_MAXSIZE}: {taille}")
+        self.config: dict = config
+        self.taille: int = taille
+        self.délai_attente: float = délai_attente
+        # mysql.connector lève une erreur quand la réserve est vide: le sémaphore fait attendre à la place
+        self.places: threading.BoundedSemaphore = threading.BoundedSemaphore(taille)
+        self.verrou: threading.Lock = threading.Lock()
+        self.réserve: mysql.connector.pooling.MySQLConnectionPool | None = None
+
+    def obtient_réserve(self) -> mysql.connector.pooling.MySQLConnectionPool:
+        """
+        Réserve de mysql.connector, créée au premier appel (et recréée plus tard si la base était injoignable)
+
+        Returns:
+            mysql.connector.pooling.MySQLConnectionPool: La réserve
+
+        Raises:
+            mysql.connector.Error: Base injoignable
+        """
+        with self.verrou:
+            if self.réserve is None:
+                # Pas de remise à zéro de session à chaque retour (un aller-retour de plus): les transactions
+                # sont validées ou annulées explicitement dans connexion()
+                self.réserve = mysql.connector.pooling.MySQLConnectionPool(
+                    pool_name="sae302_master", pool_size=self.taille, pool_reset_session=False, **self.config)
+            return self.réserve
+
+    @contextlib.contextmanager
+    def connexion(self):
+        """
+        Prête une connexion pour la durée d'un bloc `with`, puis la rend à la réserve.
+        Une transaction laissée ouverte (exception, ou simple lecture jamais validée) est annulée avant le retour,
+        sinon le prochain emprunteur lirait le même instantané de la base.
+
+        Yields:
+            PooledMySQLConnection: La connexion
+
+        Raises:
+            mysql.connector.errors.PoolError: Aucune connexion libre après le délai d'attente
+            mysql.connector.Error: Base injoignable
+        """
+        if not self.places.acquire(timeout=self.délai_attente):
+            raise mysql.connector.errors.PoolError(f"Aucune connexion libre après {self.délai_attente:.0f} s")
+        try:
+            conn = self.obtient_réserve().get_connection()
+            try:
+                yield conn
+            finally:
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                except mysql.connector.Error:
+                    pass  # Connexion perdue: elle sera rouverte au prochain prêt
+                conn.close()  # Rend la connexion à la réserve sans la fermer
+        finally:
+            self.places.release()
+
 class MasterServer(threading.Thread):
     """
     Initialisation du serveur master qui gère les enregistrements des routeurs et clients, ainsi que la journalisation dans la base de données de MariaDB.
@@ -73,9 +162,22 @@ class MasterServer(threading.Thread):
         self.port: int = port
         self.log_callback = log_callback
         self.en_cours: bool = True
+        # Derniers rapports de charge, gardés en mémoire seulement: {id_routeur: {pid: (instant, profondeur, paquets/s, cpu)}}
+        self.charges: dict[str, dict[int, tuple[float, int, float, float]]] = {}
+        self.verrou_charges: threading.Lock = threading.Lock()
+        # Routeurs enregistrés depuis le démarrage (la table routeurs est vidée par init_bdd): seuls à pouvoir envoyer un rapport
+        self.routeurs_enregistrés: set[str] = set()
+        # Sockets Unix annoncés, renvoyés aux routeurs (seuls chemins auxquels ils se connectent) et aux clients:
+        # {id_routeur: (ip, port, chemin)} et {(ip, port): chemin} pour les clients
+        self.chemins_uds: dict[str, tuple[str, str, str]] = {}
+        self.chemins_clients: dict[tuple[str, str], str] = {}
+        # Époque du dernier démarrage de chaque routeur (absente s'il refuse les circuits): {id_routeur: époque}
+        self.époques: dict[str, str] = {}
         self.sock: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.sock.bind(('0.0.0.0', self.port))
+        # Connexions MariaDB partagées par les threads de gère_client (taille: pool_size dans config.conf)
+        self.bdd: RéserveBDD = RéserveBDD(DB_CONFIG)
         self.init_bdd()
 
     def init_bdd(self) -> None:
@@ -83,17 +185,16 @@ class MasterServer(threading.Thread):
         Initialise la connexion à la base de donnée et réinitialise la table des routeurs.
         """
         try:
-            conn = mysql.connector.connect(**DB_CONFIG)
-            curseur = conn.cursor()
-            curseur.execute("DELETE FROM routeurs")
-            conn.commit()
-            curseur.close()
-            conn.close()
+            with self.bdd.connexion() as conn:
+                curseur = conn.cursor()
+                curseur.execute("DELETE FROM routeurs")
+                conn.commit()
+                curseur.close()
             self.log_callback("BASE DE DONNÉE", "Table 'routeurs' réinitialisée. Logs conservés.")
         except Exception as e:
             self.log_callback("BASE DE DONNÉE", f"Erreur SQL: {e}")
 
-    def sauvegarde_log(self, event_type, details) -> None:
+    def sauvegarde_log(self, event_type, details, conn=None) -> None:
         """
 
         Enregistre une log dans la base de données.
@@ -101,18 +202,18 @@ class MasterServer(threading.Thread):
         Args:
             event_type (str): Type d'événement
             details (str): Description de l'événement
+            conn (PooledMySQLConnection | None): Connexion déjà prêtée pour la requête en cours, sinon une connexion est prise dans la réserve
         """
         try:
-            conn = mysql.connector.connect(**DB_CONFIG)
-            curseur = conn.cursor()
-            requête = "INSERT INTO logs (event_type, details) VALUES (%s, %s)"
-            curseur.execute(requête, (event_type, details))
-            conn.commit()
-            curseur.close()
-            conn.close()
+            with (contextlib.nullcontext(conn) if conn is not None else self.bdd.connexion()) as conn:
+                curseur = conn.cursor()
+                requête = "INSERT INTO logs (event_type, details) VALUES (%s, %s)"
+                curseur.execute(requête, (event_type, details))
+                conn.commit()
+                curseur.close()
             self.log_callback(event_type, details)
         except Exception as e:
-            print(f"Erreur DB Log: {e}")
+            journal.error(f"Erreur DB Log: {e}")
 
     def stop(self) -> None:
         """
@@ -141,6 +242,77 @@ class MasterServer(threading.Thread):
             except: 
                 pass
 
+    def répond(self, socket_client: socket.socket, réponse: str, tramé: bool) -> None:
+        """
+        Répond dans le format de la requête: une trame, ou un envoi brut pour les anciens clients
+
+        Args:
+            socket_client (socket.socket): Socket du client connecté
+            réponse (str): La réponse
+            tramé (bool): La requête était une trame
+        """
+        if tramé:
+            envoie_trame(socket_client, réponse.encode('utf-8'))
+        else:
+            socket_client.send(réponse.encode('utf-8'))
+
+    def annuaire_uds(self) -> str:
+        """
+        Annuaire des sockets Unix de tous les routeurs et clients, joint aux réponses envoyées aux routeurs
+
+        Returns:
+            str: "ip:port:chemin;ip:port:chemin;..."
+        """
+        with self.verrou_charges:
+            entrées: list[tuple[str, str, str]] = list(self.chemins_uds.values())
+            entrées += [(ip, port, chemin) for (ip, port), chemin in self.chemins_clients.items()]
+        return ";".join(f"{ip}:{port}:{chemin}" for ip, port, chemin in entrées)
+
+    def enregistre_charge(self, parties: list[str]) -> bool:
+        """
+        Garde en mémoire le rapport de charge d'un processus de routeur
+
+        Args:
+            parties (list[str]): CHARGE_ROUTEUR|ID_routeur|pid|profondeur|paquets_par_s|cpu découpé sur "|"
+
+        Returns:
+            bool: False si le rapport est mal formé ou vient d'un routeur non enregistré
+        """
+        if len(parties) != 6:
+            return False
+        try:
+            pid, profondeur, paquets_par_s, cpu = int(parties[2]), int(parties[3]), float(parties[4]), float(parties[5])
+        except ValueError:
+            return False
+        with self.verrou_charges:
+            if parties[1] not in self.routeurs_enregistrés:
+                return False
+            self.charges.setdefault(parties[1], {})[pid] = (time.monotonic(), profondeur, paquets_par_s, cpu)
+        return True
+
+    def charge_routeur(self, r_id: str) -> tuple[int, float, float] | None:
+        """
+        Charge d'un routeur, agrégée sur ses workers: files et débits additionnés, CPU moyen par processus.
+        Les rapports expirés (worker arrêté, PID réutilisé après un redémarrage) sont supprimés au passage.
+
+        Args:
+            r_id (str): Identifiant du routeur
+
+        Returns:
+            tuple[int, float, float] | None: (profondeur, paquets/s, cpu %), None sans rapport récent
+        """
+        limite: float = time.monotonic() - VALIDITÉ_CHARGE
+        with self.verrou_charges:
+            par_pid: dict[int, tuple[float, int, float, float]] = self.charges.get(r_id, {})
+            for pid in [pid for pid, r in par_pid.items() if r[0] <= limite]:
+                del par_pid[pid]
+            if not par_pid:
+                self.charges.pop(r_id, None)
+            rapports = list(par_pid.values())
+        if not rapports:
+            return None
+        return (sum(r[1] for r in rapports), sum(r[2] for r in rapports), sum(r[3] for r in rapports) / len(rapports))
+
     def gère_client(self, socket_client: socket.socket) -> None:
         """
         Gère les connexions des clients
@@ -149,70 +321,137 @@ class MasterServer(threading.Thread):
             socket_client (socket.socket): Socket du client connecté
         """
         try:
-            donnee = socket_client.recv(65536).decode('utf-8')
-            if not donnee: 
+            contenu, tramé = recois_message(socket_client)
+            if not contenu: 
                 return
+            donnee = contenu.decode('utf-8')
             parties = donnee.split('|')
             cmd = parties[0]
-            
-            conn = mysql.connector.connect(**DB_CONFIG)
-            curseur = conn.cursor(dictionary=True)
 
+            # Format: CHARGE_ROUTEUR|ID_routeur|pid|profondeur|paquets_par_s|cpu
+            # Rapport périodique de chaque routeur: gardé en mémoire, sans passer par la base de données.
+            # Réponse: ACK|annuaire des sockets Unix, tenu à jour chez le routeur à chaque rapport
+            if cmd == "CHARGE_ROUTEUR":
+                if self.enregistre_charge(parties):
+                    self.répond(socket_client, f"ACK|{self.annuaire_uds()}", tramé)
+                else:
+                    self.répond(socket_client, "ERREUR|Rapport de charge refusé", tramé)
+                    self.log_callback("ERROR", "Rapport de charge invalide ou d'un routeur non enregistré")
+                socket_client.close()
+                return
+            
             # Juste question de sécurité, une faille d'injection basique pourrait être évitée ici
-            if cmd not in ["ENREGISTREMENT_ROUTEUR", "DEENREGISTREMENT_ROUTEUR", "ENREGISTREMENT_CLIENT", "LISTE_ROUTEURS"]:
-                socket_client.send("ERREUR|Commande inconnue".encode('utf-8'))
+            if cmd not in ["ENREGISTREMENT_ROUTEUR", "DEENREGISTREMENT_ROUTEUR", "ROTATION_CLE_ROUTEUR", "ENREGISTREMENT_CLIENT", "LISTE_ROUTEURS"]:
+                self.répond(socket_client, "ERREUR|Commande inconnue", tramé)
                 self.log_callback("ERROR", "Format de de commande invalide")
                 return
             
-            # Format: ENREGISTREMENT_ROUTEUR|ID_routeur|ip|port|clé_publique_n|clé_publique_e
-            if cmd == "ENREGISTREMENT_ROUTEUR":
-                if len(parties) != 6:
-                    self.log_callback("ERROR", "Format de d'enregistrement de routeur invalide")
-                    return
-                r_id, r_ip, r_port, r_n, r_e = parties[1], parties[2], parties[3], parties[4], parties[5]
-                requête: str = "INSERT INTO routeurs (router_id, ip_address, port, public_key_n, public_key_e) VALUES (%s, %s, %s, %s, %s)"
-                curseur.execute(requête, (r_id, r_ip, r_port, r_n, r_e))
-                conn.commit()
-                self.sauvegarde_log(cmd, f"Le routeur {r_id} a rejoint le réseau sur {r_ip}:{r_port}")
-                socket_client.send("ACK".encode('utf-8'))
-                print(f"[Master] Routeur {r_id} enregistré avec succès")
-
-            # Format: DEENREGISTREMENT_ROUTEUR|ID_routeur
-            elif cmd == "DEENREGISTREMENT_ROUTEUR":
-                if len(parties) != 2:
-                    self.log_callback("ERROR", "Format de désenregistrement invalide")
-                    return
-                r_id = parties[1]
+            # Une seule connexion par requête, journalisation comprise, rendue à la réserve à la sortie du bloc
+            with self.bdd.connexion() as conn:
+                # Curseur bufferisé: aucun résultat non lu ne doit rester sur une connexion rendue à la réserve
+                curseur = conn.cursor(dictionary=True, buffered=True)
+
+                # Format: ENREGISTREMENT_ROUTEUR|ID_routeur|ip|port|clé_publique_n|clé_publique_e[|chemin_socket_unix[|époque]]
+                if cmd == "ENREGISTREMENT_ROUTEUR":
+                    if len(parties) not in (6, 7, 8):
+                        self.log_callback("ERROR", "Format de d'enregistrement de routeur invalide")
+                        return
+                    r_id, r_ip, r_port, r_n, r_e = parties[1], parties[2], parties[3], parties[4], parties[5]
+                    with self.verrou_charges:
+                        self.routeurs_enregistrés.add(r_id)
+                        if len(parties) >= 7 and parties[6]:
+                            self.chemins_uds[r_id] = (r_ip, r_port, parties[6])
+                        else:
+                            self.chemins_uds.pop(r_id, None)
+                        if len(parties) == 8 and parties[7]:
+                            self.époques[r_id] = parties[7]
+                        else:
+                            self.époques.pop(r_id, None)
+                    # Un routeur qui redémarre (ou change de clé) met simplement à jour sa ligne
+                    requête: str = ("INSERT INTO routeurs (router_id, ip_address, port, public_key_n, public_key_e) VALUES (%s, %s, %s, %s, %s) "
+                                    "ON DUPLICATE KEY UPDATE ip_address = VALUES(ip_address), port = VALUES(port), "
+                                    "public_key_n = VALUES(public_key_n), public_key_e = VALUES(public_key_e), last_seen = CURRENT_TIMESTAMP")
+                    curseur.execute(requête, (r_id, r_ip, r_port, r_n, r_e))
+                    conn.commit()
+                    self.sauvegarde_log(cmd, f"Le routeur {r_id} a rejoint le réseau sur {r_ip}:{r_port}", conn)
+                    self.répond(socket_client, f"ACK|{self.annuaire_uds()}", tramé)
+                    journal.info(f"Routeur {r_id} enregistré avec succès")
+
+                # Format: DEENREGISTREMENT_ROUTEUR|ID_routeur
+                elif cmd == "DEENREGISTREMENT_ROUTEUR":
+                    if len(parties) != 2:
+                        self.log_callback("ERROR", "Format de désenregistrement invalide")
+                        return
+                    r_id = parties[1]
                 
-                curseur.execute("SELECT * FROM routeurs WHERE router_id = %s", (r_id,))
-                routeur: dict = curseur.fetchone()
+                    curseur.execute("SELECT * FROM routeurs WHERE router_id = %s", (r_id,))
+                    routeur: dict = curseur.fetchone()
                 
-                if routeur:
-                    curseur.execute("DELETE FROM routeurs WHERE router_id = %s", (r_id,))
+                    if routeur:
+                        curseur.execute("DELETE FROM routeurs WHERE router_id = %s", (r_id,))
+                        conn.commit()
+                        with self.verrou_charges:
+                            self.routeurs_enregistrés.discard(r_id)
+                            self.charges.pop(r_id, None)
+                            self.chemins_uds.pop(r_id, None)
+                            self.époques.pop(r_id, None)
+                        self.sauvegarde_log(cmd, f"Le routeur {r_id} a quitté le réseau", conn)
+                        self.répond(socket_client, "ACK", tramé)
+                        journal.info(f"Routeur {r_id} désenregistré avec succès")
+                    else:
+                        self.répond(socket_client, "ERREUR|Routeur inconnu", tramé)
+                        self.log_callback("WARNING", f"Tentative de désenregistrement d'un routeur inconnu: {r_id}")
+
+                # Format: ROTATION_CLE_ROUTEUR|ID_routeur|clé_publique_n|clé_publique_e
+                elif cmd == "ROTATION_CLE_ROUTEUR":
+                    if len(parties) != 4:
+                        self.log_callback("ERROR", "Format de rotation de clé invalide")
+                        return
+                    r_id, r_n, r_e = parties[1], parties[2], parties[3]
+                    curseur.execute("UPDATE routeurs SET public_key_n = %s, public_key_e = %s, last_seen = CURRENT_TIMESTAMP WHERE router_id = %s", (r_n, r_e, r_id))
                     conn.commit()
-                    self.sauvegarde_log(cmd, f"Le routeur {r_id} a quitté le réseau")
-                    socket_client.send("ACK".encode('utf-8'))
-                    print(f"[Master] Routeur {r_id} désenregistré avec succès")
-                else:
-                    socket_client.send("ERREUR|Routeur inconnu".encode('utf-8'))
-                    self.log_callback("WARNING", f"Tentative de désenregistrement d'un routeur inconnu: {r_id}")
-
-            # Format: ENREGISTREMENT_CLIENT|nom_hôte
-            elif cmd == "ENREGISTREMENT_CLIENT":
-                self.sauvegarde_log(cmd, f"Nouveau client connecter")
-                socket_client.send("ACK".encode('utf-8'))
-
-            # Format: LISTE_ROUTEURS
-            elif cmd == "LISTE_ROUTEURS":
-                curseur.execute("SELECT * FROM routeurs")
-                rangé = curseur.fetchall()
-                list_r = []
-                for routeur in rangé:
-                    list_r.append(f"{routeur['router_id']}:{routeur['ip_address']}:{routeur['port']}:{routeur['public_key_n']}:{routeur['public_key_e']}")
-                # Format: ROUTEURS|ID_ROUTEUR:IP:PORT:N:E;ID:IP:PORT:N:E;
-                socket_client.send(("ROUTEURS|" + ";".join(list_r)).encode('utf-8'))
-                self.sauvegarde_log(cmd, f"Liste des routeurs envoyée à un client")
-            conn.close()
+                    if curseur.rowcount:
+                        self.sauvegarde_log(cmd, f"Le routeur {r_id} a changé de clé publique", conn)
+                        self.répond(socket_client, "ACK", tramé)
+                    else:
+                        self.répond(socket_client, "ERREUR|Routeur inconnu", tramé)
+                        self.log_callback("WARNING", f"Rotation de clé pour un routeur inconnu: {r_id}")
+
+                # Format: ENREGISTREMENT_CLIENT|nom_hôte[|port|chemin_socket_unix]
+                elif cmd == "ENREGISTREMENT_CLIENT":
+                    if len(parties) >= 4 and parties[2].isdigit() and parties[3]:
+                        # Adresse vue par le master; un client sur la machine du master est annoncé sous son IP réseau
+                        ip_client: str = socket_client.getpeername()[0]
+                        if ip_client.startswith("127."):
+                            ip_client = trouve_ip_local()
+                        with self.verrou_charges:
+                            self.chemins_clients[(ip_client, parties[2])] = parties[3]
+                    self.sauvegarde_log(cmd, f"Nouveau client connecter", conn)
+                    self.répond(socket_client, "ACK", tramé)
+
+                # Format: LISTE_ROUTEURS
+                elif cmd == "LISTE_ROUTEURS":
+                    curseur.execute("SELECT * FROM routeurs")
+                    rangé = curseur.fetchall()
+                    list_r = []
+                    for routeur in rangé:
+                        entrée: str = f"{routeur['router_id']}:{routeur['ip_address']}:{routeur['port']}:{routeur['public_key_n']}:{routeur['public_key_e']}"
+                        charge = self.charge_routeur(routeur['router_id'])
+                        if charge:
+                            entrée += f":{charge[0]}:{charge[1]:.1f}:{charge[2]:.1f}"
+                        with self.verrou_charges:
+                            annonce_uds: tuple[str, str, str] | None = self.chemins_uds.get(routeur['router_id'])
+                            époque: str | None = self.époques.get(routeur['router_id'])
+                        if époque:
+                            entrée += f":epoque={époque}"
+                        if annonce_uds:
+                            entrée += f":uds={annonce_uds[2]}"
+                        list_r.append(entrée)
+                    # Format: ROUTEURS|ID_ROUTEUR:IP:PORT:N:E[:PROFONDEUR:PAQUETS_PAR_S:CPU][:epoque=ÉPOQUE][:uds=CHEMIN];ID:IP:PORT:N:E;
+                    # Les champs de charge ne sont présents que si le routeur a envoyé un rapport récent,
+                    # le chemin du socket Unix (toujours en dernier) que si le routeur en a annoncé un
+                    self.répond(socket_client, "ROUTEURS|" + ";".join(list_r), tramé)
+                    self.sauvegarde_log(cmd, f"Liste des routeurs envoyée à un client", conn)
             socket_client.close()
         except Exception as e:
             self.log_callback("ERROR", str(e))
@@ -393,6 +632,7 @@ class MasterWindow(QMainWindow):
         événement.accept()
 
 if __name__ == "__main__":
+    configure_journal()
     application = QApplication(sys.argv)
     fenêtre = MasterWindow(9000)
     fenêtre.show()
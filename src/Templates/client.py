@@ -1,8 +1,8 @@
 import sys
 import socket
-import random
 import os
 import signal
+import threading
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QLineEdit, QPushButton, QLabel, QSpinBox, QFrame, QStatusBar
 from PyQt6.QtCore import QThread, pyqtSignal, QDateTime
 from PyQt6.QtGui import QCloseEvent
@@ -12,6 +12,16 @@ project_root = os.path.abspath(os.path.join(current_dir, "../.."))
 if project_root not in sys.path: sys.path.insert(0, project_root)
 
 from src.Composants.Algorithme_de_chiffrage import RSA
+from src.Composants.Oignon import construit_oignon
+from src.Composants.Trame import envoie_trame, envoie_trames, recois_message, emballe_paquet
+from src.Composants.Selection_de_chemin import choisit_chemin
+from src.Composants.Circuit import CircuitClient
+from src.Composants.Transport import connecte, annonce_chemin, écoute_uds, supprime_uds, chemin_uds_défaut
+from src.Composants.Liens import connexion_fermée, INACTIVITÉ_LIEN_ENTRANT
+
+# Un circuit inactif depuis plus longtemps est remplacé. Il reste sous le délai après lequel le premier routeur
+# ferme le lien du circuit (les routeurs oublient le circuit lui-même par défaut après 600 s)
+INACTIVITÉ_MAX_CIRCUIT: float = INACTIVITÉ_LIEN_ENTRANT / 2
 
 class ÉcouteClient(QThread):
     """
@@ -37,6 +47,10 @@ class ÉcouteClient(QThread):
             self.port = int(port)
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            # Le dernier routeur, s'il est sur la même machine, livre par ce socket Unix plutôt que par TCP
+            # (chemin annoncé au master à l'enregistrement, None sans dossier privé sûr)
+            self.chemin_uds: str | None = chemin_uds_défaut(self.port)
+            self.uds_sock: socket.socket | None = None
         except Exception as e:
             print(f"[ERREUR INIT THREAD] {e}")
             raise e
@@ -48,22 +62,53 @@ class ÉcouteClient(QThread):
         try:
             self.sock.bind(('0.0.0.0', self.port))
             self.sock.listen(50)
-            while True:
-                conn, _ = self.sock.accept()
-                try:
-                    data = conn.recv(4096).decode('utf-8')
-                    if "|" in data:
-                        msg_content = data.split('|')[1]
-                        self.message_recu.emit(msg_content)
-                except Exception as e:
-                    print(f"Erreur lecture socket: {e}")
-                finally:
-                    conn.close()
+            # Après le bind TCP: si le port est déjà pris, le socket Unix appartient à l'autre processus
+            self.uds_sock = écoute_uds(self.chemin_uds, 50) if self.chemin_uds else None
+            if self.uds_sock is not None:
+                threading.Thread(target=self.accepte, args=(self.uds_sock,), daemon=True).start()
+            self.accepte(self.sock)
         except OSError as e:
             print(f"[ERREUR CRITIQUE] Le port {self.port} est probablement deja occupe.\nDetails: {e}")
         except Exception as e:
             print(f"[ERREUR RUN] {e}")
 
+    def accepte(self, sock: socket.socket):
+        """
+        Boucle d'acceptation d'un socket d'écoute (TCP ou Unix)
+
+        Args:
+            sock (socket.socket): Socket en écoute
+
+        Raises:
+            OSError: Socket fermé
+        """
+        while True:
+            conn, _ = sock.accept()
+            # Le dernier routeur peut garder la connexion ouverte: un thread par lien
+            threading.Thread(target=self.lit_connexion, args=(conn,), daemon=True).start()
+
+    def lit_connexion(self, conn: socket.socket):
+        """
+        Lit les messages d'une connexion: une suite de trames sur un lien persistant, ou un seul message (ancien format)
+
+        Args:
+            conn (socket.socket): Connexion acceptée
+        """
+        try:
+            while True:
+                contenu, tramé = recois_message(conn, 4096)
+                if not contenu:
+                    return
+                data = contenu.decode('utf-8', errors='replace')
+                if "|" in data:
+                    self.message_recu.emit(data.split('|', 1)[1])
+                if not tramé:
+                    return  # Ancien format: un seul message par connexion
+        except Exception as e:
+            print(f"Erreur lecture socket: {e}")
+        finally:
+            conn.close()
+
     def stop(self):
         """
         Arrête le thread d'écoute
@@ -71,6 +116,9 @@ class ÉcouteClient(QThread):
         try:
             if hasattr(self, 'sock'):
                 self.sock.close()
+            if getattr(self, 'uds_sock', None) is not None:
+                self.uds_sock.close()
+                supprime_uds(self.chemin_uds)
             self.terminate()
         except:
             pass
@@ -82,7 +130,7 @@ class ApplicationClient(QMainWindow):
     Args:
         QMainWindow (Class): Fenêtre principale PyQt6
     """
-    def __init__(self, m_ip: str, m_port: str, port_client: str):
+    def __init__(self, m_ip: str, m_port: str, port_client: str, format_fil: str = "cellule", sélection: str = "pondérée", circuits: bool = True):
         """
         Initialise la classe ApplicationClient
 
@@ -90,10 +138,20 @@ class ApplicationClient(QMainWindow):
             m_ip (str): L'adresse IP du master
             m_port (str): Le port du master
             port_client (str): Le port du client
+            format_fil (str): Format des couches chiffrées: "cellule" (taille fixe à chaque saut), "hybride", "binaire" ou "texte" (anciens formats, pour les routeurs pas encore à jour)
+            sélection (str): Choix des routeurs du chemin: "pondérée" (les routeurs chargés sont moins souvent tirés) ou "uniforme"
+            circuits (bool): Réutilise un circuit tant que la destination et le nombre de sauts ne changent pas
+                (une opération RSA par saut à la création, puis un simple XOR par message); False pour un oignon par message
         """
         super().__init__()
         self.addr_master = (m_ip, int(m_port))
         self.port_client = int(port_client)
+        self.format_fil = format_fil
+        self.sélection = sélection
+        self.circuits = circuits
+        self.circuit: CircuitClient | None = None
+        # Toutes les cellules d'un circuit passent par la même connexion: le premier routeur les traite dans l'ordre
+        self.lien_circuit: socket.socket | None = None
         self.cipher = RSA()
         
         self.setup_ui()
@@ -427,7 +485,7 @@ class ApplicationClient(QMainWindow):
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.connect(self.addr_master)
-            s.send(f"ENREGISTREMENT_CLIENT|{socket.gethostname()}|{self.port_client}".encode())
+            envoie_trame(s, f"ENREGISTREMENT_CLIENT|{socket.gethostname()}|{self.port_client}|{self.ecouteur.chemin_uds or ''}".encode())
             s.close()
         except: self.display_de_chat.append("<i>Serveur Master hors ligne</i>")
 
@@ -441,15 +499,36 @@ class ApplicationClient(QMainWindow):
         try:
             s: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.connect(self.addr_master)
-            s.send("LISTE_ROUTEURS".encode())
-            rep: str = s.recv(65356).decode().split('|')[1]
+            envoie_trame(s, "LISTE_ROUTEURS".encode())
+            réponse, _ = recois_message(s)
+            rep: str = réponse.decode().split('|')[1]
             s.close()
             routeurs: list[dict] = []
             for r in rep.split(';'):
                 if not r:
                     continue
                 p = r.split(':')
-                routeurs.append({"id":p[0],"ip":p[1],"port":int(p[2]),"key":(int(p[3]),int(p[4]))})
+                # Socket Unix annoncé par le routeur (toujours le dernier champ, le chemin peut contenir des ':')
+                chemin_uds: str | None = None
+                for k in range(5, len(p)):
+                    if p[k].startswith("uds="):
+                        chemin_uds = ":".join(p[k:])[len("uds="):]
+                        p = p[:k]
+                        break
+                # Époque du démarrage du routeur, absente s'il n'accepte pas les circuits
+                époque: str | None = None
+                if len(p) > 5 and p[-1].startswith("epoque="):
+                    époque = p.pop()[len("epoque="):]
+                routeur: dict = {"id":p[0],"ip":p[1],"port":int(p[2]),"key":(int(p[3]),int(p[4]))}
+                if chemin_uds:
+                    routeur["uds"] = chemin_uds
+                if époque:
+                    routeur["époque"] = époque
+                annonce_chemin(routeur["ip"], routeur["port"], chemin_uds)
+                # Charge du routeur, seulement s'il a envoyé un rapport récent au master
+                if len(p) >= 8:
+                    routeur["charge"] = {"profondeur": int(p[5]), "paquets_par_s": float(p[6]), "cpu": float(p[7])}
+                routeurs.append(routeur)
             print(f"[INFO] {len(routeurs)} routeurs reçus du master.")
             return routeurs
         except Exception as e:
@@ -475,10 +554,8 @@ class ApplicationClient(QMainWindow):
             try:
                 dest_port = int(self.port_destination.text())
                 
-                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                s.settimeout(5.0)
-                s.connect((dest_ip, dest_port))
-                s.send(f"MESSAGE|{msg}".encode())
+                s = connecte(dest_ip, dest_port, timeout=5.0)
+                envoie_trame(s, f"MESSAGE|{msg}".encode())
                 s.close()
                 
                 temp_actuel = QDateTime.currentDateTime().toString("HH:mm:ss")
@@ -520,22 +597,27 @@ class ApplicationClient(QMainWindow):
             self.display_de_chat.append("<span style='color:red'>Pas assez de routeurs !</span>")
             return
 
-        chemin: list = random.sample(liste_r, nombre_sauts)
-        message_envoye: str = f"{self.ip_destination.text()}|{self.port_destination.text()}|{msg}"
-        
-        for i in range(len(chemin)-1, -1, -1):
-            r: int = chemin[i]
-            if i == len(chemin)-1:
-                prochain_saut = "FINALE|0"
+        # Circuits seulement à travers des routeurs qui les acceptent (époque annoncée), sinon cellules oignon
+        capables: list[dict] = [r for r in liste_r if r.get("époque")]
+        par_circuit: bool = self.circuits and len(capables) >= nombre_sauts
+        try:
+            if par_circuit:
+                paquets, chemin = self.prépare_circuit(capables, nombre_sauts, dest_ip, self.port_destination.value(), msg.encode('utf-8'))
             else:
-                prochain_saut = f"{chemin[i+1]['ip']}|{chemin[i+1]['port']}"
-            message_envoye = self.cipher.encrypt(f"{prochain_saut}|{message_envoye}", r["key"])
+                self.ferme_circuit()
+                chemin: list = choisit_chemin(liste_r, nombre_sauts, self.sélection == "pondérée")
+                paquets = [emballe_paquet(construit_oignon(self.cipher, chemin, dest_ip, self.port_destination.value(), msg, self.format_fil))]
+        except ValueError as e:
+            self.display_de_chat.append(f"<span style='color:#ef4444'>❌ {e}</span>")
+            return
 
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.connect((chemin[0]["ip"], chemin[0]["port"]))
-            s.send(message_envoye.encode())
-            s.close()
+            if par_circuit:
+                self.envoie_circuit(paquets)
+            else:
+                s = connecte(chemin[0]["ip"], chemin[0]["port"], timeout=None)
+                envoie_trames(s, paquets)
+                s.close()
             temp_liste_routeur: list = []
             for r in chemin:
                 temp_liste_routeur.append(r['id'])
@@ -573,8 +655,77 @@ class ApplicationClient(QMainWindow):
             """
             self.display_de_chat.append(html)
 
+    def prépare_circuit(self, liste_r: list[dict], nombre_sauts: int, dest_ip: str, dest_port: int, message: bytes) -> tuple[list[bytes], list[dict]]:
+        """
+        Paquets à envoyer pour un message par circuit: la cellule de création si le circuit courant
+        ne convient plus, puis la cellule du message
+
+        Args:
+            liste_r (list[dict]): Routeurs annoncés par le master
+            nombre_sauts (int): Nombre de sauts
+            dest_ip (str): IP du destinataire
+            dest_port (int): Port du destinataire
+            message (bytes): Le message
+
+        Raises:
+            ValueError: Chemin impossible (pas assez de routeurs, cellule de création trop petite)
+
+        Returns:
+            tuple[list[bytes], list[dict]]: (paquets pour le premier routeur, dans l'ordre, chemin du circuit)
+        """
+        paquets: list[bytes] = []
+        if self.lien_circuit is not None and connexion_fermée(self.lien_circuit):
+            # Lien fermé par le premier routeur (inactivité, redémarrage): un message envoyé dessus serait perdu sans erreur
+            self.ferme_circuit()
+        if self.circuit is None or not self.circuit.réutilisable(liste_r, nombre_sauts, dest_ip, dest_port, INACTIVITÉ_MAX_CIRCUIT):
+            self.ferme_circuit()
+            circuit = CircuitClient(choisit_chemin(liste_r, nombre_sauts, self.sélection == "pondérée"), dest_ip, dest_port)
+            paquets.append(emballe_paquet(circuit.création()))
+            self.circuit = circuit
+        paquets.append(emballe_paquet(self.circuit.données(message)))
+        return paquets, self.circuit.chemin
+
+    def envoie_circuit(self, paquets: list[bytes]):
+        """
+        Envoie des cellules au premier routeur du circuit courant, sur la connexion du circuit
+
+        Args:
+            paquets (list[bytes]): Les cellules, dans l'ordre
+
+        Raises:
+            OSError: Premier routeur injoignable, le circuit est abandonné (le prochain message en ouvrira un autre)
+        """
+        premier: dict = self.circuit.chemin[0]
+        try:
+            if self.lien_circuit is None:
+                self.lien_circuit = connecte(premier["ip"], premier["port"], timeout=5.0)
+            envoie_trames(self.lien_circuit, paquets)
+        except OSError:
+            self.ferme_circuit()
+            raise
+
+    def ferme_circuit(self):
+        """Demande aux routeurs du circuit courant de l'oublier (sinon ils l'oublient après un délai d'inactivité)"""
+        if self.circuit is None:
+            return
+        if self.lien_circuit is not None:
+            try:
+                if connexion_fermée(self.lien_circuit):
+                    # La fin part sur une nouvelle connexion: sur le lien fermé, elle serait perdue
+                    premier: dict = self.circuit.chemin[0]
+                    with connecte(premier["ip"], premier["port"], timeout=2.0) as s:
+                        envoie_trame(s, emballe_paquet(self.circuit.fin()))
+                else:
+                    envoie_trame(self.lien_circuit, emballe_paquet(self.circuit.fin()))
+            except OSError:
+                pass
+            self.lien_circuit.close()
+            self.lien_circuit = None
+        self.circuit = None
+
     def closeEvent(self, event: QCloseEvent):
         """Handle window close - clean up threads"""
+        self.ferme_circuit()
         if hasattr(self, 'ecouteur'):
             self.ecouteur.stop()
         event.accept()
@@ -3,13 +3,39 @@ import socket
 import threading
 import os
 import signal # Même raison que pour le master
+import time
+import asyncio
+import queue
+import selectors
+import json
+import ipaddress
+import logging
+import secrets
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, "../.."))
 if project_root not in sys.path: 
     sys.path.insert(0, project_root)
 
-from src.Composants.Algorithme_de_chiffrage import RSA
+from src.Composants.Algorithme_de_chiffrage import RSA, active_déchiffrement_parallèle, arrête_déchiffrement_parallèle, SEUIL_PARALLÈLE, VERSION_HYBRIDE
+from src.Composants.Magasin_de_cles import MagasinDeClés
+from src.Composants.Liens import RéserveDeLiens, OrdonnanceurEnvois, INACTIVITÉ_LIEN_ENTRANT
+from src.Composants.Metriques import Métriques
+from src.Composants.Journalisation import (obtient_journal, configure_journal, suspend_journal, relance_journal, arrête_journal,
+                                           lit_échantillonnage)
+from src.Composants.Trame import (MARQUEUR_TRAME, ENTÊTE_TRAME, envoie_trame, emballe_trame, recois_message, longueur_trame, AssembleurMessage,
+                                  paquet_en_morceaux, déballe_paquet, a_un_entête_paquet, Paquet)
+from src.Composants.Oignon import ouvre_cellule, lit_entête_routage, sépare_destination, VERSION_CELLULE, TYPE_RELAIS, TYPE_FINALE
+from src.Composants.Transport import écoute_uds, supprime_uds, chemin_uds_défaut, lit_annuaire, remplace_annuaire, ADRESSE_UDS
+from src.Composants.Circuit import (TableDeCircuits, EntréeCircuit, lit_entête_circuit, ouvre_création, retire_couche,
+                                    lit_données, nonce_suivant, VERSION_CIRCUIT, ENTÊTE_CIRCUIT, CRÉATION, DONNÉES)
+
+DOSSIER_CLÉS: str = os.path.join(project_root, "src", "Configuration", "cles")
+COMMANDE_STATS: bytes = b"STATS"  # Envoyée depuis la machine du routeur, renvoie les métriques en JSON
+# Durée max de lecture d'un message, de la connexion (ou de son premier octet sur un lien persistant) au dernier
+DÉLAI_LECTURE_MESSAGE: float = 10.0
+
+journal: logging.Logger = obtient_journal("routeur")
 
 def trouve_ip_local() -> str:
     """Trouve l'adresse IP locale"""
@@ -23,24 +49,137 @@ def trouve_ip_local() -> str:
         s.close()
     return ip
 
+class ConnexionEntrante:
+    """
+    Une connexion entrante garée dans le sélecteur pendant que son prochain message arrive
+    """
+    __slots__ = ("addr", "assembleur", "limite", "début")
+
+    def __init__(self, addr: tuple):
+        """
+        Initialise l'état de lecture d'une connexion acceptée
+
+        Args:
+            addr (tuple): Adresse de l'émetteur
+        """
+        self.addr: tuple = addr
+        self.assembleur: AssembleurMessage = AssembleurMessage()
+        self.limite: float = time.monotonic() + DÉLAI_LECTURE_MESSAGE  # Fermée si le message n'est pas complet à cette date
+        self.début: float = time.perf_counter()
+
 class Routeur:
-    def __init__(self, id_routeur: str, ip_master: str, master_port: int, port_router: int):
+    def __init__(self, id_routeur: str, ip_master: str, master_port: int, port_router: int,
+                 dossier_clés: str | None = DOSSIER_CLÉS, âge_max_clés: float | None = None,
+                 intervalle_rotation: float | None = None, chevauchement: float = 300.0,
+                 processus_déchiffrement: int | None = None, seuil_parallèle: int = SEUIL_PARALLÈLE,
+                 mode_asyncio: bool = False, paquets_max: int = 64,
+                 nb_threads: int = 8, taille_file: int = 128, surcharge: str = "attente",
+                 liens_persistants: bool = True, nb_workers: int = 1, taille_file_sortante: int = 1024,
+                 intervalle_rapport: float | None = 10.0, inactivité_circuit: float = 600.0,
+                 accepte_ancien: bool = False, uds: bool = True, chemin_uds: str | None = None):
         self.id: str = id_routeur
+        self.journal: logging.Logger = obtient_journal(f"routeur.{id_routeur}")
         self.master_addr: tuple[str, int] = (ip_master, int(master_port))
         self.port: int = int(port_router)
         self.ip: str = trouve_ip_local()
         self.en_cours: bool = True
         self.threads_actifs: list[threading.Thread] = []
-        self.cipher: RSA = RSA()
-        self.clé_publique, self.clé_privée = self.cipher.generate_keys()
+        if dossier_clés:
+            # Recharge la clé du précédent lancement si elle respecte la politique, sinon en génère une
+            self.magasin: MagasinDeClés | None = MagasinDeClés(dossier_clés, âge_max=âge_max_clés)
+            self.cipher: RSA = self.magasin.charge_ou_génère(self.id)
+        else:
+            self.magasin = None
+            self.cipher = RSA()
+            self.cipher.generate_keys()
+        self.clé_publique, self.clé_privée = self.cipher.clé_publique, self.cipher.clé_privé
+
+        # Mode multi-processus: le processus principal s'enregistre une seule fois et lance N workers qui
+        # partagent le port (SO_REUSEPORT) et la paire de clés chargée ci-dessus
+        self.nb_workers: int = max(1, nb_workers)
+        self.est_worker: bool = False
+        self.workers: list[int] = []  # PID des workers (processus principal uniquement)
+        if self.nb_workers > 1 and intervalle_rotation:
+            # Chaque worker tournerait sa propre clé: le master n'en connaîtrait qu'une
+            self.journal.warning(f"La rotation des clés est désactivée avec plusieurs workers")
+            intervalle_rotation = None
+
+        # Rotation en arrière-plan: les anciennes clés restent utilisables pendant la fenêtre de chevauchement
+        self.intervalle_rotation: float | None = intervalle_rotation
+        self.chevauchement: float = chevauchement
+        self.anciennes_clés: list[tuple[RSA, float]] = []  # (chiffreur, expiration)
+        self.verrou_clés: threading.Lock = threading.Lock()
+        self.arrêt_demandé: threading.Event = threading.Event()
+
+        # Déchiffrement des gros paquets sur un pool de processus (None = désactivé, 0 = un processus par cœur)
+        # Avec plusieurs workers, chacun crée son propre pool après le fork
+        self.processus_déchiffrement: int | None = processus_déchiffrement
+        self.seuil_parallèle: int = seuil_parallèle
+        if processus_déchiffrement is not None and self.nb_workers == 1:
+            active_déchiffrement_parallèle(processus_déchiffrement, seuil_parallèle)
+
+        # Mode asyncio: une seule boucle d'événements, le déchiffrement part dans un exécuteur
+        self.mode_asyncio: bool = mode_asyncio
+        self.paquets_max: int = paquets_max
+
+        # Mode thread: pool fixe de workers derrière une file bornée
+        # surcharge = "rejet": connexion fermée tout de suite si la file est pleine
+        # surcharge = "attente": on arrête d'accepter, le backlog TCP se remplit et ralentit l'émetteur
+        if surcharge not in ("rejet", "attente"):
+            raise ValueError(f"Politique de surcharge inconnue: {surcharge}")
+        self.nb_threads: int = nb_threads
+        self.surcharge: str = surcharge
+        self.file_travail: queue.Queue = queue.Queue(maxsize=taille_file)
+        self.paquets_rejetés: int = 0
+        self.paquets_traités: int = 0
+        self.verrou_compteurs: threading.Lock = threading.Lock()
+
+        self.liens_persistants: bool = liens_persistants
+        self.taille_file_sortante: int = taille_file_sortante
+        # Rapport de charge envoyé au master pour que les clients évitent les routeurs saturés (None = désactivé)
+        self.intervalle_rapport: float | None = intervalle_rapport
+        self.paquets_en_vol: int = 0  # Mode asyncio uniquement (modifié depuis la boucle d'événements)
+        # Circuits ouverts par les clients: une opération RSA à la création, puis une couche XOR par message
+        self.circuits: TableDeCircuits = TableDeCircuits(inactivité_circuit)
+        # Époque de ce lancement, publiée par le master: la table des circuits ne survit pas à un redémarrage,
+        # un client ne réutilise un circuit que tant que l'époque de chaque routeur reste la même.
+        # Pas de circuits, donc pas d'époque: avec plusieurs workers (un circuit ne serait connu que d'un seul d'entre eux)
+        # et sans liens persistants (création et messages partiraient sur des connexions différentes, le saut suivant
+        # pourrait traiter un message avant la création de son circuit)
+        self.accepte_circuits: bool = self.nb_workers == 1 and liens_persistants
+        self.époque: str = secrets.token_hex(8) if self.accepte_circuits else ""
+        # Les paquets sans entête (magique, longueur, CRC32) sont refusés, sauf pour laisser passer d'anciens clients
+        self.accepte_ancien: bool = accepte_ancien
+        # Socket Unix en plus du port TCP: les voisins sur la même machine s'y connectent sans passer par la pile TCP
+        self.chemin_uds: str | None = (chemin_uds or chemin_uds_défaut(self.port)) if uds else None
+        self.uds_sock: socket.socket | None = None
+        # Compteurs et latences par étape (réception, déchiffrement, mise en file, attente, connexion, envoi)
+        self.métriques: Métriques = Métriques()
+        self.initialise_sockets()
+
+    def initialise_sockets(self):
+        """Crée les sockets et les réserves propres au processus (rappelé dans chaque worker après le fork)"""
+        # Liens persistants vers les prochains sauts (None = une connexion par paquet, ancien comportement)
+        self.liens: RéserveDeLiens | None = RéserveDeLiens(métriques=self.métriques) if self.liens_persistants else None
+        # Envois sortants: une file par prochain saut, les handlers rendent la main dès la mise en file
+        self.envois: OrdonnanceurEnvois = OrdonnanceurEnvois(self.liens, taille_file=self.taille_file_sortante,
+                                                             métriques=self.métriques)
+        # Les liens entrants persistants sont "garés" dans le sélecteur entre deux trames
+        self.sélecteur: selectors.BaseSelector = selectors.DefaultSelector()
+        self.réveil_lecture, self.réveil_écriture = socket.socketpair()
+        self.réveil_lecture.setblocking(False)
+        # Le sélecteur n'est manipulé que par la boucle d'acceptation: les workers passent par cette file
+        self.à_garer: queue.SimpleQueue = queue.SimpleQueue()
 
         self.server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.est_worker:
+            self.server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self.server_sock.settimeout(1.0) 
 
     def gestionnaire_arrêt(self, sig, frame):
         """Gère l'arrêt propre avec CTRL+C"""
-        print(f"\n[!] Signal d'arrêt reçu pour le routeur {self.id}...")
+        self.journal.warning(f"Signal d'arrêt reçu pour le routeur {self.id}...")
         self.arrêt_propre()
 
     def arrêt_propre(self):
@@ -48,161 +187,915 @@ class Routeur:
         if not self.en_cours:
             return
             
-        print(f"[!] Arrêt en cours du routeur {self.id}...")
+        self.journal.warning(f"Arrêt en cours du routeur {self.id}...")
         self.en_cours = False
+        self.arrêt_demandé.set()
         
         if hasattr(self, 'server_sock') and self.server_sock:
             try:
                 self.server_sock.close()
-                print(f"Info: Socket serveur fermé")
+                self.journal.info(f"Socket serveur fermé")
             except Exception as e:
-                print(f"Erreur: Erreur fermeture socket: {e}")
+                self.journal.error(f"Erreur fermeture socket: {e}")
         
-        print(f"Attente de la fin des {len(self.threads_actifs)} threads...")
+        if self.uds_sock is not None:
+            try:
+                self.uds_sock.close()
+            except OSError:
+                pass
+
+        arrête_déchiffrement_parallèle()
+        self.envois.arrête()
+        if self.liens:
+            self.liens.ferme_tout()
+        for clé in list(self.sélecteur.get_map().values()):
+            if clé.data not in (None, "réveil", "uds"):
+                try:
+                    clé.fileobj.close()
+                except OSError:
+                    pass
+
+        if not self.workers:
+            état = self.état_charge()
+            self.journal.info(f"{état['paquets_traités']} paquets traités, {état['paquets_rejetés']} rejetés (file pleine)")
+        self.journal.info(f"Attente de la fin des {len(self.threads_actifs)} threads...")
         for thread in self.threads_actifs[:]:
             if thread.is_alive():
                 try:
                     thread.join(timeout=2.0)
                     if thread.is_alive():
-                        print(f"[!] Thread non terminé: {thread.name}")
+                        self.journal.warning(f"Thread non terminé: {thread.name}")
                 except Exception as e:
-                    print(f"[!] Erreur attente thread: {e}")
+                    self.journal.warning(f"Erreur attente thread: {e}")
+
+        if self.est_worker:
+            # Seul le processus principal est connu du master
+            self.journal.info(f"Worker {os.getpid()} du routeur {self.id} arrêté")
+            sys.exit(0)
+        self.arrêt_workers()
+        if self.uds_sock is not None:
+            supprime_uds(self.chemin_uds)
         
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.settimeout(2.0)
             s.connect(self.master_addr)
-            s.send(f"DEENREGISTREMENT_ROUTEUR|{self.id}".encode('utf-8'))
+            envoie_trame(s, f"DEENREGISTREMENT_ROUTEUR|{self.id}".encode('utf-8'))
             s.close()
-            print(f"Info: Déconnecté du master")
+            self.journal.info(f"Déconnecté du master")
         except:
-            print(f"Erreur: Impossible de contacter le master pour le déenregistrement")
+            self.journal.error(f"Impossible de contacter le master pour le déenregistrement")
         
-        print(f"Info: Routeur {self.id} arrêté proprement")
+        self.journal.info(f"Routeur {self.id} arrêté proprement")
         sys.exit(0)
 
+    def arrêt_workers(self, délai: float = 10.0):
+        """Envoie SIGTERM à tous les workers puis attend leur fin (SIGKILL après le délai)"""
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        limite: float = time.monotonic() + délai
+        for pid in self.workers:
+            while True:
+                try:
+                    fini, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if fini:
+                    break
+                if time.monotonic() > limite:
+                    self.journal.warning(f"Worker {pid} toujours actif, arrêt forcé")
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    break
+                time.sleep(0.05)
+        if self.workers:
+            self.journal.info(f"{len(self.workers)} workers arrêtés")
+        self.workers = []
+
+    def ouvre_uds(self):
+        """
+        Ouvre le socket Unix d'écoute, avant l'enregistrement pour que le master puisse l'annoncer.
+        Avec plusieurs workers, il est ouvert avant le fork et partagé par tous.
+        """
+        if self.chemin_uds and self.uds_sock is None:
+            self.uds_sock = écoute_uds(self.chemin_uds)
+            if self.uds_sock is not None:
+                self.uds_sock.setblocking(False)  # Partagé entre workers: un autre peut accepter avant nous
+                self.journal.info(f"Écoute locale sur {self.chemin_uds}")
+
     def enregistrement_vers_master(self):
         """Enregistre le routeur auprès du master"""
         msg = f"ENREGISTREMENT_ROUTEUR|{self.id}|{self.ip}|{self.port}|{self.clé_publique[0]}|{self.clé_publique[1]}"
+        msg += f"|{self.chemin_uds if self.uds_sock is not None else ''}|{self.époque}"
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.settimeout(5.0)
             s.connect(self.master_addr)
-            s.send(msg.encode('utf-8'))
+            envoie_trame(s, msg.encode('utf-8'))
+            self.lit_annuaire_master(s)
             s.close()
-            print(f"Info: Enregistré sur Master ({self.ip}:{self.port})")
+            self.journal.info(f"Enregistré sur Master ({self.ip}:{self.port})")
         except Exception as e:
-            print(f"Erreur: Erreur Master: {e}")
+            self.journal.error(f"Erreur Master: {e}")
+
+    def publication_clé_vers_master(self):
+        """Publie la nouvelle clé publique du routeur auprès du master après une rotation"""
+        msg = f"ROTATION_CLE_ROUTEUR|{self.id}|{self.clé_publique[0]}|{self.clé_publique[1]}"
+        try:
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.settimeout(5.0)
+            s.connect(self.master_addr)
+            envoie_trame(s, msg.encode('utf-8'))
+            s.close()
+            self.journal.info(f"Nouvelle clé publiée sur le Master")
+        except Exception as e:
+            self.journal.error(f"Erreur Master: {e}")
+
+    def rotation_des_clés(self):
+        """
+        Boucle du thread de rotation: génère la clé suivante hors de tout verrou, puis bascule dessus.
+        L'ancienne clé est conservée jusqu'à la fin de la fenêtre de chevauchement.
+        """
+        while not self.arrêt_demandé.wait(self.intervalle_rotation):
+            nouveau: RSA = RSA(self.cipher.taille_clé)
+            nouveau.generate_keys()
+            if self.magasin:
+                try:
+                    self.magasin.sauvegarde(self.id, nouveau)
+                except OSError as e:
+                    self.journal.error(f"Impossible de sauvegarder la nouvelle clé: {e}")
+
+            maintenant: float = time.monotonic()
+            with self.verrou_clés:
+                anciennes = [(c, exp) for c, exp in self.anciennes_clés if exp > maintenant]
+                anciennes.append((self.cipher, maintenant + self.chevauchement))
+                self.anciennes_clés = anciennes
+                self.cipher = nouveau
+                self.clé_publique, self.clé_privée = nouveau.clé_publique, nouveau.clé_privé
+            self.journal.info(f"Rotation de clé effectuée ({len(anciennes)} ancienne(s) clé(s) encore acceptée(s))")
+            self.publication_clé_vers_master()
+
+    def démarre_tâches_de_fond(self):
+        """Lance les threads de rotation des clés et de rapport de charge (dans chaque processus qui sert des paquets)"""
+        if self.intervalle_rotation:
+            threading.Thread(target=self.rotation_des_clés, name="rotation-clés", daemon=True).start()
+        if self.intervalle_rapport:
+            threading.Thread(target=self.rapport_de_charge, name="rapport-charge", daemon=True).start()
+        threading.Thread(target=self.expiration_circuits, name="expiration-circuits", daemon=True).start()
+
+    def expiration_circuits(self):
+        """Supprime périodiquement les circuits inactifs"""
+        while not self.arrêt_demandé.wait(min(60.0, self.circuits.délai_inactivité / 4)):
+            expirés: int = self.circuits.nettoie()
+            if expirés:
+                self.métriques.incrémente("circuits_expirés", expirés)
+                self.journal.debug(f"{expirés} circuits expirés, {len(self.circuits)} ouverts")
+
+    def profondeur_totale(self) -> int:
+        """Paquets en attente dans ce processus: file des workers, paquets en vol (asyncio) et files de sortie"""
+        sortie: int = sum(f["profondeur"] for f in self.envois.état()["files"].values())
+        return self.file_travail.qsize() + self.paquets_en_vol + sortie
+
+    def rapport_de_charge(self):
+        """
+        Boucle du thread de rapport: envoie au master la profondeur des files, le débit (paquets/s)
+        et l'utilisation CPU du processus (% d'un cœur) sur la dernière période.
+        Avec plusieurs workers, chacun envoie son rapport et le master les agrège.
+        """
+        précédent_t: float = time.monotonic()
+        précédent_cpu: float = time.process_time()
+        précédent_paquets: int = self.métriques.valeur("paquets_reçus")
+        while not self.arrêt_demandé.wait(self.intervalle_rapport):
+            maintenant: float = time.monotonic()
+            cpu: float = time.process_time()
+            paquets: int = self.métriques.valeur("paquets_reçus")
+            durée: float = max(maintenant - précédent_t, 1e-6)
+            paquets_par_s: float = (paquets - précédent_paquets) / durée
+            cpu_pourcent: float = 100 * (cpu - précédent_cpu) / durée
+            précédent_t, précédent_cpu, précédent_paquets = maintenant, cpu, paquets
+
+            msg = f"CHARGE_ROUTEUR|{self.id}|{os.getpid()}|{self.profondeur_totale()}|{paquets_par_s:.1f}|{cpu_pourcent:.1f}"
+            try:
+                with socket.create_connection(self.master_addr, timeout=2.0) as s:
+                    envoie_trame(s, msg.encode('utf-8'))
+                    self.lit_annuaire_master(s)
+            except OSError as e:
+                self.journal.debug(f"Rapport de charge non envoyé: {e}")
+
+    def lit_annuaire_master(self, s: socket.socket):
+        """
+        Lit la réponse du master à un enregistrement ou à un rapport de charge: "ACK|ip:port:chemin;..."
+        donne les sockets Unix de tous les routeurs et clients, les seuls auxquels ce routeur se connectera
+        """
+        try:
+            réponse, _ = recois_message(s)
+        except (OSError, ValueError):
+            return
+        if not réponse:
+            return
+        statut, séparateur, annuaire = bytes(réponse).decode('utf-8', 'replace').partition('|')
+        if statut == "ACK" and séparateur:  # Un simple "ACK" vient d'un master sans annuaire
+            remplace_annuaire(lit_annuaire(annuaire))
+
+    def chiffreurs_actifs(self) -> list[RSA]:
+        """Clé courante suivie des anciennes clés encore dans la fenêtre de chevauchement"""
+        maintenant: float = time.monotonic()
+        with self.verrou_clés:
+            return [self.cipher] + [c for c, exp in reversed(self.anciennes_clés) if exp > maintenant]
 
     def start(self):
         """Démarre le routeur"""
+        if self.nb_workers > 1:
+            self.start_multiprocessus()
+            return
+        if self.mode_asyncio:
+            self.start_asyncio()
+            return
+
         # Configurer les signaux
         signal.signal(signal.SIGINT, self.gestionnaire_arrêt) # Utilisateur
         signal.signal(signal.SIGTERM, self.gestionnaire_arrêt) # Système
         
+        self.ouvre_uds()
         self.enregistrement_vers_master()
-        
+        self.démarre_tâches_de_fond()
+        self.boucle_serveur()
+
+    def start_multiprocessus(self):
+        """
+        Processus principal du mode multi-processus: enregistre le routeur une seule fois, lance les workers
+        puis les surveille jusqu'à l'arrêt (qui les arrête tous avant de se désenregistrer)
+        """
+        if not hasattr(os, "fork") or not hasattr(socket, "SO_REUSEPORT"):
+            self.journal.error(f"--workers nécessite fork() et SO_REUSEPORT, démarrage avec un seul processus")
+            self.nb_workers = 1
+            self.start()
+            return
+
+        signal.signal(signal.SIGINT, self.gestionnaire_arrêt)
+        signal.signal(signal.SIGTERM, self.gestionnaire_arrêt)
+        self.ouvre_uds()
+        self.enregistrement_vers_master()
+
+        # Aucun thread ne doit tourner pendant un fork (un verrou tenu par un thread resterait pris dans le fils):
+        # le thread d'écriture des journaux est arrêté, chaque processus relance ensuite les siens
+        suspend_journal()
+        threads: list[str] = [t.name for t in threading.enumerate() if t is not threading.main_thread()]
+        for i in range(self.nb_workers):
+            sys.stdout.flush()
+            pid = os.fork()
+            if pid == 0:
+                self.boucle_worker_processus(i)  # Ne revient jamais
+            self.workers.append(pid)
+        relance_journal()
+        if threads:
+            self.journal.warning(f"Threads actifs pendant le fork des workers: {', '.join(threads)}")
+        self.journal.info(f"Routeur {self.id} prêt sur {self.ip}:{self.port} ({self.nb_workers} workers)")
+        self.journal.info(f"Appuyez sur CTRL+C pour arrêter")
+
+        while self.en_cours and self.workers:
+            try:
+                pid, statut = os.wait()
+            except ChildProcessError:
+                break
+            if pid in self.workers:
+                self.workers.remove(pid)
+                self.journal.warning(f"Worker {pid} terminé (code {os.waitstatus_to_exitcode(statut)}), {len(self.workers)} restant(s)")
+        self.arrêt_propre()
+
+    def boucle_worker_processus(self, numéro: int):
+        """
+        Corps d'un worker après le fork: recrée ses propres sockets et pools puis sert les paquets.
+        Le processus se termine avec os._exit pour ne jamais revenir dans le code du processus principal.
+        """
+        code: int = 0
+        try:
+            relance_journal()
+            self.est_worker = True
+            self.workers = []
+            self.métriques = Métriques()
+            self.initialise_sockets()
+            if self.processus_déchiffrement is not None:
+                active_déchiffrement_parallèle(self.processus_déchiffrement, self.seuil_parallèle)
+            self.démarre_tâches_de_fond()
+            if self.mode_asyncio:
+                try:
+                    asyncio.run(self.serveur_asyncio())
+                except Exception as e:
+                    self.journal.error(f"Erreur démarrage serveur (worker {numéro}): {e}")
+                self.arrêt_propre()
+            else:
+                signal.signal(signal.SIGINT, self.gestionnaire_arrêt)
+                signal.signal(signal.SIGTERM, self.gestionnaire_arrêt)
+                self.boucle_serveur()
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 0
+        except BaseException as e:
+            self.journal.error(f"Worker {numéro} arrêté sur erreur: {e}")
+            code = 1
+        finally:
+            arrête_journal()  # os._exit ne passe pas par atexit
+            sys.stdout.flush()
+            os._exit(code)
+
+    def boucle_serveur(self):
+        """Ouvre le port d'écoute, lance le pool de threads et fait tourner la boucle d'acceptation"""
         try:
             self.server_sock.bind(('0.0.0.0', self.port))
             self.server_sock.listen(10)  # Backlog augmenté
-            print(f"Info: Routeur {self.id} prêt sur {self.ip}:{self.port}")
-            print(f"Appuyez sur CTRL+C pour arrêter")
+            if self.est_worker:
+                self.journal.info(f"Worker {os.getpid()} du routeur {self.id} prêt sur {self.ip}:{self.port}")
+            else:
+                self.journal.info(f"Routeur {self.id} prêt sur {self.ip}:{self.port}")
+                self.journal.info(f"Appuyez sur CTRL+C pour arrêter")
         except Exception as e:
-            print(f"Erreur: Erreur démarrage serveur: {e}")
+            self.journal.error(f"Erreur démarrage serveur: {e}")
             self.arrêt_propre()
             return
         
+        for i in range(self.nb_threads):
+            worker = threading.Thread(target=self.boucle_worker, name=f"worker-{i}", daemon=True)
+            worker.start()
+            self.threads_actifs.append(worker)
+        threading.Thread(target=self.surveillance_charge, name="surveillance-charge", daemon=True).start()
+
+        self.sélecteur.register(self.server_sock, selectors.EVENT_READ, None)
+        self.sélecteur.register(self.réveil_lecture, selectors.EVENT_READ, "réveil")
+        if self.uds_sock is not None:
+            self.sélecteur.register(self.uds_sock, selectors.EVENT_READ, "uds")
+        prochain_nettoyage: float = time.monotonic() + 1.0
         while self.en_cours:
             try:
-                client, addr = self.server_sock.accept()
-                client.settimeout(10.0)
-                
-                if self.en_cours:
-                    thread = threading.Thread(
-                        target=self.gestionnaire_paquet,
-                        args=(client, addr),
-                        daemon=True
-                    )
-                    thread.start()
-                    self.threads_actifs.append(thread)
-                    threads_vivants = []
-                    for t in self.threads_actifs: # Nettoyage des threads terminés pour éviter la fuite mémoire
-                        if t.is_alive():
-                            threads_vivants.append(t)
-                    self.threads_actifs = threads_vivants
-
+                for clé, _ in self.sélecteur.select(timeout=1.0):
+                    if clé.fileobj is self.server_sock:
+                        client, addr = self.server_sock.accept()
+                        # Le message est assemblé ici: un worker ne reçoit que des messages complets
+                        self.gare(client, ConnexionEntrante(addr))
+                    elif clé.data == "uds":
+                        try:
+                            client, _ = self.uds_sock.accept()
+                        except BlockingIOError:
+                            continue  # Connexion prise par un autre worker
+                        self.gare(client, ConnexionEntrante((ADRESSE_UDS, 0)))
+                    elif clé.data == "réveil":
+                        self.réveil_lecture.recv(4096)
+                        while not self.à_garer.empty():
+                            self.regare(*self.à_garer.get())
+                    else:
+                        self.lit_connexion(clé.fileobj, clé.data)
+                if time.monotonic() >= prochain_nettoyage:
+                    self.ferme_connexions_inactives()
+                    prochain_nettoyage = time.monotonic() + 1.0
                     
             except socket.timeout:
                 continue
             except OSError as e:
                 if self.en_cours:
-                    print(f"Erreur: Erreur accept: {e}")
+                    self.journal.error(f"Erreur accept: {e}")
                 break
             except Exception as e:
                 if self.en_cours:
-                    print(f"Erreur: Erreur inattendue: {e}")
+                    self.journal.error(f"Erreur inattendue: {e}")
                 break
         
         self.arrêt_propre()
 
-    def gestionnaire_paquet(self, client_sock: socket.socket, addr: tuple):
-        """Gère un paquet reçu"""
+    def gare(self, client: socket.socket, connexion: ConnexionEntrante):
+        """
+        Met une connexion entrante en attente dans le sélecteur (boucle d'acceptation uniquement)
+
+        Args:
+            client (socket.socket): La connexion, nouvelle ou persistante
+            connexion (ConnexionEntrante): Son adresse, son message en cours et sa date limite
+        """
         try:
-            donnee = client_sock.recv(65536).decode('utf-8')  # 64KB max
-            if not donnee:
+            client.setblocking(False)
+            self.sélecteur.register(client, selectors.EVENT_READ, connexion)
+        except (OSError, ValueError, KeyError):
+            client.close()
+
+    def regare(self, client: socket.socket, connexion: ConnexionEntrante):
+        """
+        Reprend un lien persistant rendu par un worker: une trame déjà reçue part tout de suite,
+        sinon le lien attend la suivante (boucle d'acceptation uniquement)
+
+        Args:
+            client (socket.socket): Le lien entrant
+            connexion (ConnexionEntrante): Son état de lecture
+        """
+        try:
+            message = connexion.assembleur.message()
+        except ValueError:
+            message = None
+            connexion.assembleur.fermé = True
+        if message is not None:
+            connexion.début = time.perf_counter()
+            self.mise_en_file(client, connexion, message)
+            return
+        if connexion.assembleur.fermé:
+            client.close()
+            return
+        if connexion.assembleur.en_cours():
+            connexion.limite = time.monotonic() + DÉLAI_LECTURE_MESSAGE
+        else:
+            connexion.limite = time.monotonic() + INACTIVITÉ_LIEN_ENTRANT
+        self.gare(client, connexion)
+
+    def lit_connexion(self, client: socket.socket, connexion: ConnexionEntrante):
+        """
+        Lit ce qui est arrivé sur une connexion garée et confie le message aux workers dès qu'il est complet
+        (boucle d'acceptation uniquement, la socket est non bloquante)
+
+        Args:
+            client (socket.socket): La connexion lisible
+            connexion (ConnexionEntrante): Son état de lecture
+        """
+        if not connexion.assembleur.en_cours():
+            # Premier octet d'un message: le délai de lecture court à partir de maintenant
+            connexion.début = time.perf_counter()
+            connexion.limite = time.monotonic() + DÉLAI_LECTURE_MESSAGE
+        try:
+            ouverte: bool = connexion.assembleur.lit(client)
+            message = connexion.assembleur.message()
+        except (BlockingIOError, InterruptedError):
+            return
+        except (OSError, ValueError) as e:
+            self.journal.debug("Connexion de %s fermée: %s", connexion.addr, e)
+            ouverte, message = False, None
+        if message is None and ouverte:
+            return
+        self.sélecteur.unregister(client)
+        if message is None or not self.en_cours:
+            client.close()
+            return
+        self.mise_en_file(client, connexion, message)
+
+    def ferme_connexions_inactives(self):
+        """Ferme les connexions garées dans le sélecteur dont le délai d'attente est dépassé (boucle d'acceptation uniquement)"""
+        maintenant: float = time.monotonic()
+        expirées = [clé for clé in self.sélecteur.get_map().values()
+                    if isinstance(clé.data, ConnexionEntrante) and clé.data.limite < maintenant]
+        for clé in expirées:
+            self.sélecteur.unregister(clé.fileobj)
+            try:
+                clé.fileobj.close()
+            except OSError:
+                pass
+        if expirées:
+            self.métriques.incrémente("connexions_inactives_fermées", len(expirées))
+
+    def mise_en_file(self, client: socket.socket, connexion: ConnexionEntrante, message: tuple):
+        """Confie un message complet au pool de workers en appliquant la politique de surcharge"""
+        client.settimeout(DÉLAI_LECTURE_MESSAGE)  # Pour l'éventuelle réponse (STATS)
+        travail: tuple = (client, connexion, message)
+        if self.surcharge == "rejet":
+            try:
+                self.file_travail.put_nowait(travail)
+            except queue.Full:
+                with self.verrou_compteurs:
+                    self.paquets_rejetés += 1
+                client.close()
+            return
+        # Attente: tant que la file est pleine on n'appelle plus accept(), la contre-pression remonte par TCP
+        while self.en_cours:
+            try:
+                self.file_travail.put(travail, timeout=1.0)
                 return
-            
-            print(f"[Router {self.id}] Message de {addr}: {donnee[:100]}...")
-            
-            decrypté = self.cipher.decrypt(donnee)
-            print(f"[Router {self.id}] Décrypté: {decrypté}")
-            
-            if "|" not in decrypté:
-                print(f"[Router {self.id}] Format invalide")
+            except queue.Full:
+                continue
+        client.close()
+
+    def remise_en_attente(self, client: socket.socket, connexion: ConnexionEntrante):
+        """Rend un lien entrant persistant à la boucle d'acceptation jusqu'à sa prochaine trame"""
+        self.à_garer.put((client, connexion))
+        try:
+            self.réveil_écriture.send(b"\0")
+        except OSError:
+            pass
+
+    def boucle_worker(self):
+        """Boucle d'un worker du pool: traite les messages de la file jusqu'à l'arrêt"""
+        while self.en_cours:
+            try:
+                client, connexion, message = self.file_travail.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            self.gestionnaire_paquet(client, connexion, message)
+            with self.verrou_compteurs:
+                self.paquets_traités += 1
+
+    def état_charge(self) -> dict:
+        """
+        Profondeur de la file et compteurs, pour dimensionner le pool sur chaque machine
+
+        Returns:
+            dict: L'état de charge du routeur
+        """
+        with self.verrou_compteurs:
+            return {
+                "profondeur_file": self.file_travail.qsize(),
+                "taille_file": self.file_travail.maxsize,
+                "threads": self.nb_threads,
+                "surcharge": self.surcharge,
+                "paquets_traités": self.paquets_traités,
+                "paquets_rejetés": self.paquets_rejetés,
+                "envois": self.envois.état(),
+                "circuits": len(self.circuits),
+            }
+
+    def surveillance_charge(self, intervalle: float = 30.0):
+        """Affiche périodiquement l'état de la file quand le routeur a eu de l'activité"""
+        précédent: dict = {}
+        while not self.arrêt_demandé.wait(intervalle):
+            état = self.état_charge()
+            if (état["paquets_traités"], état["paquets_rejetés"]) != (précédent.get("paquets_traités"), précédent.get("paquets_rejetés")):
+                self.journal.info(f"File {état['profondeur_file']}/{état['taille_file']}, {état['paquets_traités']} traités, {état['paquets_rejetés']} rejetés")
+            précédent = état
+
+    def start_asyncio(self):
+        """Démarre le routeur en mode asyncio (pas de thread par connexion)"""
+        self.ouvre_uds()
+        self.enregistrement_vers_master()
+        self.démarre_tâches_de_fond()
+
+        try:
+            asyncio.run(self.serveur_asyncio())
+        except Exception as e:
+            self.journal.error(f"Erreur démarrage serveur: {e}")
+        self.arrêt_propre()
+
+    async def serveur_asyncio(self):
+        """Boucle principale du mode asyncio, jusqu'à la réception de SIGINT/SIGTERM"""
+        boucle = asyncio.get_running_loop()
+        arrêt = asyncio.Event()
+
+        def signal_reçu(sig, frame=None):
+            self.journal.warning(f"Signal d'arrêt reçu pour le routeur {self.id}...")
+            boucle.call_soon_threadsafe(arrêt.set)
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                boucle.add_signal_handler(sig, signal_reçu, sig)
+            except NotImplementedError:  # Windows
+                signal.signal(sig, signal_reçu)
+
+        self.limite_paquets = asyncio.Semaphore(self.paquets_max)
+        self.écrivains: set[asyncio.StreamWriter] = set()  # Connexions entrantes ouvertes, fermées à l'arrêt
+        serveur = await asyncio.start_server(self.gestionnaire_paquet_asyncio, '0.0.0.0', self.port, backlog=128,
+                                             reuse_port=self.est_worker or None)
+        serveur_uds = None
+        if self.uds_sock is not None:
+            serveur_uds = await asyncio.start_unix_server(self.gestionnaire_paquet_asyncio, sock=self.uds_sock, backlog=128)
+        self.journal.info(f"Routeur {self.id} prêt sur {self.ip}:{self.port} (asyncio, {self.paquets_max} paquets en vol max)")
+        self.journal.info(f"Appuyez sur CTRL+C pour arrêter")
+        async with serveur:
+            await arrêt.wait()
+            if serveur_uds is not None:
+                serveur_uds.close()
+            # Sans cela, la fermeture du serveur (wait_closed, Python >= 3.12.1) attendrait les liens persistants
+            for écrivain in list(self.écrivains):
+                écrivain.close()
+
+    @staticmethod
+    async def lit_trame_asyncio(lecteur: asyncio.StreamReader, début: bytes) -> bytes:
+        """Lit la fin de l'entête puis le contenu d'une trame dont le marqueur est déjà lu"""
+        suite: bytes = await lecteur.readexactly(ENTÊTE_TRAME.size - len(début))
+        return await lecteur.readexactly(longueur_trame(début + suite))
+
+    async def gestionnaire_paquet_asyncio(self, lecteur: asyncio.StreamReader, écrivain: asyncio.StreamWriter):
+        """Gère une connexion en mode asyncio: un paquet simple, ou une suite de trames sur un lien persistant"""
+        addr = écrivain.get_extra_info('peername') or (ADRESSE_UDS, 0)  # Pas d'adresse IP sur un socket Unix
+        self.écrivains.add(écrivain)
+        try:
+            début = await asyncio.wait_for(lecteur.readexactly(len(MARQUEUR_TRAME)), timeout=DÉLAI_LECTURE_MESSAGE)
+            if début != MARQUEUR_TRAME:
+                t0: float = time.perf_counter()
+                donnee = début + await asyncio.wait_for(lecteur.read(65536), timeout=DÉLAI_LECTURE_MESSAGE)  # 64KB max
+                if donnee == COMMANDE_STATS:
+                    réponse = self.réponse_stats(addr)
+                    if réponse:
+                        écrivain.write(réponse)
+                        await écrivain.drain()
+                    return
+                await self.traite_paquet_asyncio(donnee, addr, t0)
                 return
+            while début == MARQUEUR_TRAME:
+                t0 = time.perf_counter()
+                # Un seul délai pour toute la trame: un émetteur qui envoie goutte à goutte ne la prolonge pas
+                donnee = await asyncio.wait_for(self.lit_trame_asyncio(lecteur, début), timeout=DÉLAI_LECTURE_MESSAGE)
+                if donnee == COMMANDE_STATS:
+                    réponse = self.réponse_stats(addr)
+                    if not réponse:
+                        return
+                    écrivain.write(emballe_trame(réponse))
+                    await écrivain.drain()
+                else:
+                    await self.traite_paquet_asyncio(donnee, addr, t0)
+                début = await asyncio.wait_for(lecteur.readexactly(len(MARQUEUR_TRAME)), timeout=INACTIVITÉ_LIEN_ENTRANT)
+        except (asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # Lien fermé par l'émetteur, ou lien persistant encore ouvert à l'arrêt du routeur
+        except asyncio.TimeoutError:
+            self.métriques.incrémente("lectures_expirées")
+        except Exception as e:
+            self.journal.warning("Erreur traitement paquet: %s", e, extra={"événement": "erreur_paquet"})
+        finally:
+            self.écrivains.discard(écrivain)
+            écrivain.close()
 
-            parties = decrypté.split('|', 2)
-            if len(parties) < 3:
-                print(f"[Router {self.id}] Pas assez de parties")
+    async def traite_paquet_asyncio(self, donnee: bytes, addr: tuple, début: float):
+        """Traite un paquet en mode asyncio, le déchiffrement s'exécute hors de la boucle"""
+        self.compte_réception(donnee, début)
+        self.journal.debug("Message de %s: %s...", addr, donnee[:100], extra={"événement": "paquet_reçu"})
+        # Limite le nombre de paquets en cours de traitement
+        self.paquets_en_vol += 1
+        try:
+            async with self.limite_paquets:
+                envoi = await asyncio.get_running_loop().run_in_executor(None, self.traite_paquet, donnee)
+                if envoi:
+                    await self.gestionnaire_envoie_asyncio(*envoi)
+        finally:
+            self.paquets_en_vol -= 1
+        self.métriques.observe("total", time.perf_counter() - début)
+
+    async def gestionnaire_envoie_asyncio(self, ip: str, port: int, donnee: Paquet):
+        """Envoie un message à une destination sans bloquer la boucle (la mise en file ne bloque jamais)"""
+        self.gestionnaire_envoie(ip, port, donnee)
+
+    def gestionnaire_paquet(self, client_sock: socket.socket, connexion: ConnexionEntrante, message: tuple):
+        """Gère un paquet reçu: connexion simple (ancien format) ou prochaine trame d'un lien persistant"""
+        garder: bool = False
+        addr: tuple = connexion.addr
+        try:
+            début: float = connexion.début
+            donnee, tramé = message
+            garder = tramé
+            if not donnee:
                 return
-                
-            prochaine_ip, prochaine_port, payload = parties[0], parties[1], parties[2]
-
-            if prochaine_ip == "FINALE":
-                f_parts = payload.split('|', 2)
-                if len(f_parts) >= 3:
-                    ip_destination, port_destination, actual_message = f_parts
-                    print(f"[Router {self.id}] Destination finale: {ip_destination}:{port_destination}")
-                    self.gestionnaire_envoie(ip_destination, port_destination, f"MESSAGE|{actual_message}")
+
+            if donnee == COMMANDE_STATS:
+                réponse = self.réponse_stats(addr)
+                if réponse is None:
+                    garder = False
+                elif tramé:
+                    envoie_trame(client_sock, réponse)
                 else:
-                    print(f"[Router {self.id}] Payload FINAL malformé: {payload}")
-            else:
-                print(f"[Router {self.id}] Relay vers: {prochaine_ip}:{prochaine_port}")
-                self.gestionnaire_envoie(prochaine_ip, prochaine_port, payload)
+                    client_sock.sendall(réponse)
+                return
+            self.compte_réception(donnee, début)
+            
+            self.journal.debug("Message de %s: %s...", addr, bytes(donnee[:100]), extra={"événement": "paquet_reçu"})
+            
+            envoi = self.traite_paquet(donnee)
+            if envoi:
+                self.gestionnaire_envoie(*envoi)
+            self.métriques.observe("total", time.perf_counter() - début)
                 
         except Exception as e:
-            print(f"[Router {self.id}] Erreur traitement paquet: {e}")
+            self.journal.warning("Erreur traitement paquet: %s", e, extra={"événement": "erreur_paquet"})
+            self.métriques.incrémente("erreurs_traitement")
+            garder = False
         finally:
+            if garder and self.en_cours:
+                self.remise_en_attente(client_sock, connexion)
+            else:
+                try:
+                    client_sock.close()
+                except:
+                    pass
+
+    def compte_réception(self, donnee: bytes, début: float):
+        """Compte un paquet reçu et la durée de sa lecture"""
+        self.métriques.observe("réception", time.perf_counter() - début)
+        self.métriques.incrémente("paquets_reçus")
+        self.métriques.incrémente("octets_reçus", len(donnee))
+
+    def réponse_stats(self, addr: tuple) -> bytes | None:
+        """
+        Instantané JSON des métriques et de la charge, réservé aux connexions locales
+
+        Args:
+            addr (tuple): Adresse de l'émetteur de la commande STATS
+
+        Returns:
+            bytes | None: Le JSON encodé, None si l'émetteur n'est pas sur la machine du routeur
+        """
+        try:
+            local: bool = addr[0] == ADRESSE_UDS or ipaddress.ip_address(addr[0]).is_loopback
+        except (ValueError, TypeError, IndexError):
+            local = False
+        if not local:
+            self.journal.warning("Commande STATS refusée depuis %s", addr)
+            return None
+        self.métriques.incrémente("requêtes_stats")
+        instantané: dict = {"routeur": self.id, **self.métriques.instantané(), "charge": self.état_charge()}
+        return json.dumps(instantané, ensure_ascii=False).encode('utf-8')
+
+    def traite_paquet(self, donnee: bytes) -> tuple[str, str, Paquet] | None:
+        """
+        Déchiffre un paquet et détermine ce qu'il faut envoyer, et à qui (partagé par les modes thread et asyncio).
+        Le contenu relayé n'est jamais décodé ni recopié: il repart en morceaux (entêtes + vues sur le clair).
+
+        Args:
+            donnee (bytes): Le paquet reçu
+
+        Returns:
+            tuple[str, str, Paquet] | None: (ip, port, données à envoyer), None si le paquet est rejeté
+        """
+        début: float = time.perf_counter()
+        donnee = self.vérifie_entête(donnee)
+        if donnee is None:
+            return None
+        if donnee[:1] == bytes([VERSION_CIRCUIT]):
+            envoi = self.traite_circuit(donnee)
+            self.métriques.observe("circuit", time.perf_counter() - début)
+            return envoi
+        routage = self.déchiffre_routage(donnee)
+        self.métriques.observe("déchiffrement", time.perf_counter() - début)
+        if routage is None:
+            self.journal.warning("Format invalide", extra={"événement": "paquet_invalide"})
+            self.métriques.incrémente("paquets_invalides")
+            return None
+        type_saut, ip, port, contenu = routage
+
+        if type_saut == TYPE_FINALE:
+            self.journal.debug("Destination finale: %s:%s", ip, port, extra={"événement": "paquet_final"})
+            self.métriques.incrémente("paquets_finaux")
+            return ip, port, (b"MESSAGE|", contenu)
+
+        self.journal.debug("Relay vers: %s:%s", ip, port, extra={"événement": "paquet_relayé"})
+        self.métriques.incrémente("paquets_relayés")
+        return ip, port, paquet_en_morceaux(*contenu)
+
+    def vérifie_entête(self, donnee: bytes) -> bytes | memoryview | None:
+        """
+        Contrôle de l'entête de paquet avant tout calcul RSA: un paquet aléatoire ou corrompu ne coûte qu'un CRC32
+
+        Args:
+            donnee (bytes): Le paquet reçu
+
+        Returns:
+            bytes | memoryview | None: Le paquet sans son entête (vue sur le tampon reçu), None s'il est rejeté
+        """
+        if a_un_entête_paquet(donnee):
             try:
-                client_sock.close()
-            except:
-                pass
+                return déballe_paquet(donnee)
+            except ValueError as e:
+                self.journal.warning("Paquet rejeté: %s", e, extra={"événement": "paquet_invalide"})
+                self.métriques.incrémente("paquets_rejetés_entête")
+                return None
+        if not self.accepte_ancien:
+            self.journal.warning("Paquet sans entête rejeté", extra={"événement": "paquet_invalide"})
+            self.métriques.incrémente("paquets_rejetés_entête")
+            return None
+        self.métriques.incrémente("paquets_sans_entête")
+        return donnee
 
-    def gestionnaire_envoie(self, ip: str, port: int, donnee: str):
-        """Envoie un message à une destination"""
+    def traite_circuit(self, donnee: bytes | memoryview) -> tuple[str, str, Paquet] | None:
+        """
+        Traite une cellule de circuit: création (RSA, une fois par circuit), message (XOR) ou fermeture
+
+        Args:
+            donnee (bytes | memoryview): La cellule reçue
+
+        Returns:
+            tuple[str, str, Paquet] | None: (ip, port, données à envoyer), None s'il n'y a rien à transmettre
+        """
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(5.0)
-            s.connect((ip, int(port)))
-            s.send(donnee.encode('utf-8'))
-            s.close()
-            print(f"[Router {self.id}] Message envoyé à {ip}:{port}")
-        except Exception as e:
-            print(f"[Router {self.id}] Échec vers {ip}:{port}: {e}")
+            type_cellule, identifiant, corps = lit_entête_circuit(donnee)
+        except ValueError:
+            self.métriques.incrémente("paquets_invalides")
+            return None
+
+        if type_cellule == CRÉATION:
+            if not self.accepte_circuits:
+                self.journal.warning("Création de circuit refusée: circuits désactivés (plusieurs workers ou sans liens persistants)", extra={"événement": "circuit_refusé"})
+                self.métriques.incrémente("circuits_refusés")
+                return None
+            for cipher in self.chiffreurs_actifs():
+                try:
+                    clé, type_saut, ip, port, sortant, suite = ouvre_création(cipher, corps)
+                    break
+                except ValueError:
+                    continue
+            else:
+                self.journal.warning("Création de circuit invalide", extra={"événement": "paquet_invalide"})
+                self.métriques.incrémente("paquets_invalides")
+                return None
+            if not self.circuits.ajoute(identifiant, EntréeCircuit(clé, type_saut, ip, port, sortant)):
+                self.journal.warning("Circuit refusé: table pleine ou identifiant déjà utilisé", extra={"événement": "paquet_invalide"})
+                self.métriques.incrémente("circuits_refusés")
+                return None
+            self.métriques.incrémente("circuits_créés")
+            self.journal.debug("Circuit créé vers %s:%s", ip, port, extra={"événement": "circuit_créé"})
+            if type_saut == TYPE_FINALE:
+                return None
+            return ip, str(port), paquet_en_morceaux(ENTÊTE_CIRCUIT.pack(VERSION_CIRCUIT, CRÉATION, sortant), *suite)
+
+        if type_cellule == DONNÉES:
+            entrée: EntréeCircuit | None = self.circuits.prend(identifiant)
+            if entrée is None:
+                self.journal.warning("Message pour un circuit inconnu ou expiré", extra={"événement": "circuit_inconnu"})
+                self.métriques.incrémente("circuits_inconnus")
+                return None
+            try:
+                nonce, clair = retire_couche(entrée.clé, corps)
+                if entrée.type_saut == TYPE_FINALE:
+                    message: memoryview = lit_données(clair)
+            except ValueError:
+                self.journal.warning("Message de circuit invalide", extra={"événement": "paquet_invalide"})
+                self.métriques.incrémente("paquets_invalides")
+                return None
+            if entrée.type_saut == TYPE_FINALE:
+                self.métriques.incrémente("paquets_finaux")
+                self.journal.debug("Destination finale: %s:%s", entrée.ip, entrée.port, extra={"événement": "paquet_final"})
+                return entrée.ip, str(entrée.port), (b"MESSAGE|", message)
+            self.métriques.incrémente("paquets_relayés")
+            self.journal.debug("Relay vers: %s:%s", entrée.ip, entrée.port, extra={"événement": "paquet_relayé"})
+            return entrée.ip, str(entrée.port), paquet_en_morceaux(ENTÊTE_CIRCUIT.pack(VERSION_CIRCUIT, DONNÉES, entrée.sortant),
+                                                                   nonce_suivant(entrée.clé, nonce), clair)
+
+        # FIN: le circuit est oublié à chaque saut
+        entrée = self.circuits.retire(identifiant)
+        if entrée is None or entrée.type_saut == TYPE_FINALE:
+            return None
+        return entrée.ip, str(entrée.port), paquet_en_morceaux(ENTÊTE_CIRCUIT.pack(VERSION_CIRCUIT, type_cellule, entrée.sortant))
+
+    def déchiffre_routage(self, donnee: bytes | memoryview) -> tuple[int, str, str, tuple | memoryview] | None:
+        """
+        Déchiffre un paquet avec la clé courante puis, pendant une rotation, avec les anciennes clés.
+        Une clé est retenue dès que le clair obtenu commence par un entête de routage valide.
+
+        Args:
+            donnee (bytes | memoryview): Le paquet reçu
+
+        Returns:
+            tuple[int, str, str, tuple | memoryview] | None: (type, ip, port, contenu): pour un relais (TYPE_RELAIS),
+            le prochain saut et le paquet à lui transmettre en morceaux; pour le dernier saut (TYPE_FINALE), le
+            destinataire et le message. None si aucune clé ne convient
+        """
+        if donnee[:1] == bytes([VERSION_CELLULE]):
+            return self.ouvre_cellule(donnee)
+
+        for cipher in self.chiffreurs_actifs():
+            try:
+                if donnee[:1] == bytes([VERSION_HYBRIDE]):
+                    flux = iter((cipher.decrypt_hybride(donnee),))
+                else:
+                    # Texte ou binaire: l'entête est vérifié dès le premier bloc déchiffré
+                    flux = cipher.decrypt_flux(donnee)
+                routage = lit_entête_routage(flux)
+            except ValueError:
+                continue
+            if routage is None:
+                continue
+            prochaine_ip, prochain_port, payload = routage
+            self.journal.debug("Décrypté: %s|%s|%s", prochaine_ip, prochain_port, bytes(payload[:100]), extra={"événement": "paquet_déchiffré"})
+            if prochaine_ip != "FINALE":
+                return TYPE_RELAIS, prochaine_ip, prochain_port, (payload,)
+            destination = sépare_destination(payload)
+            if destination is None:
+                self.journal.warning("Payload FINAL malformé: %s", bytes(payload[:100]), extra={"événement": "paquet_invalide"})
+                return None
+            return TYPE_FINALE, *destination
+        return None
+
+    def ouvre_cellule(self, donnee: bytes | memoryview) -> tuple[int, str, str, tuple | memoryview] | None:
+        """
+        Retire la couche d'une cellule de taille fixe, avec la clé courante puis les anciennes clés
+
+        Args:
+            donnee (bytes | memoryview): La cellule reçue
+
+        Returns:
+            tuple[int, str, str, tuple | memoryview] | None: Même forme que déchiffre_routage
+        """
+        for cipher in self.chiffreurs_actifs():
+            try:
+                type_saut, ip, port, contenu = ouvre_cellule(cipher, donnee)
+            except ValueError:
+                continue
+            return type_saut, ip, str(port), contenu
+        return None
+
+    def gestionnaire_envoie(self, ip: str, port: int, donnee: Paquet):
+        """Confie un message à la file de son prochain saut et rend la main sans attendre l'envoi"""
+        début: float = time.perf_counter()
+        accepté: bool = self.envois.envoie(ip, port, donnee)
+        self.métriques.observe("mise_en_file", time.perf_counter() - début)
+        if accepté:
+            self.journal.debug("Message mis en file vers %s:%s", ip, port, extra={"événement": "paquet_en_file"})
+        else:
+            self.métriques.incrémente("paquets_refusés_sortie")
+            self.journal.warning("Échec vers %s:%s: file pleine ou voisin injoignable", ip, port, extra={"événement": "refus_sortie"})
+
+USAGE: str = "Usage: python router.py <router_id> [-m master_ip] [-mp master_port] [-p router_port] [-k dossier_clés | --sans-stockage] [-ka âge_max_clés_s] [-r rotation_s] [-rc chevauchement_s] [--parallele nb_processus] [--seuil-parallele nb_blocs] [--asyncio] [--paquets-max N] [--threads N] [--file N] [--surcharge rejet|attente] [--sans-liens-persistants] [--workers N] [--file-sortante N] [--journal DEBUG|INFO|WARNING|ERROR] [--journal-fichier chemin] [--echantillon événement=N] [--rapport-charge s] [--circuit-inactivite s] [--accepte-ancien] [--uds chemin | --sans-uds]"
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python router.py <router_id> [-m master_ip] [-mp master_port] [-p router_port]")
+        print(USAGE)
         print("Exemple: python router.py R1 -m 127.0.0.1 -mp 9000 -p 9001")
         sys.exit(1)
     
@@ -212,6 +1105,28 @@ if __name__ == "__main__":
     m = "127.0.0.1"
     mp = 9000
     p = 8000
+    dossier_clés = DOSSIER_CLÉS
+    âge_max_clés = None
+    rotation = None
+    chevauchement = 300.0
+    processus_déchiffrement = None
+    seuil_parallèle = SEUIL_PARALLÈLE
+    mode_asyncio = False
+    paquets_max = 64
+    nb_threads = 8
+    taille_file = 128
+    surcharge = "attente"
+    liens_persistants = True
+    nb_workers = 1
+    taille_file_sortante = 1024
+    niveau_journal = "INFO"
+    fichier_journal = None
+    échantillonnage = {}
+    intervalle_rapport = 10.0
+    inactivité_circuit = 600.0
+    accepte_ancien = False
+    uds = True
+    chemin_uds = None
     
     i = 2
     while i < len(sys.argv):
@@ -225,21 +1140,90 @@ if __name__ == "__main__":
         elif arg == "-p" and i + 1 < len(sys.argv):
             p = int(sys.argv[i + 1])
             i += 1
+        elif arg == "-k" and i + 1 < len(sys.argv):
+            dossier_clés = sys.argv[i + 1]
+            i += 1
+        elif arg == "--sans-stockage":
+            dossier_clés = None
+        elif arg == "-ka" and i + 1 < len(sys.argv):
+            âge_max_clés = float(sys.argv[i + 1])
+            i += 1
+        elif arg == "-r" and i + 1 < len(sys.argv):
+            rotation = float(sys.argv[i + 1])
+            i += 1
+        elif arg == "-rc" and i + 1 < len(sys.argv):
+            chevauchement = float(sys.argv[i + 1])
+            i += 1
+        elif arg == "--parallele" and i + 1 < len(sys.argv):
+            processus_déchiffrement = int(sys.argv[i + 1])
+            i += 1
+        elif arg == "--seuil-parallele" and i + 1 < len(sys.argv):
+            seuil_parallèle = int(sys.argv[i + 1])
+            i += 1
+        elif arg == "--asyncio":
+            mode_asyncio = True
+        elif arg == "--paquets-max" and i + 1 < len(sys.argv):
+            paquets_max = int(sys.argv[i + 1])
+            i += 1
+        elif arg == "--threads" and i + 1 < len(sys.argv):
+            nb_threads = int(sys.argv[i + 1])
+            i += 1
+        elif arg == "--file" and i + 1 < len(sys.argv):
+            taille_file = int(sys.argv[i + 1])
+            i += 1
+        elif arg == "--surcharge" and i + 1 < len(sys.argv):
+            surcharge = sys.argv[i + 1]
+            i += 1
+        elif arg == "--sans-liens-persistants":
+            liens_persistants = False
+        elif arg == "--file-sortante" and i + 1 < len(sys.argv):
+            taille_file_sortante = int(sys.argv[i + 1])
+            i += 1
+        elif arg == "--journal" and i + 1 < len(sys.argv):
+            niveau_journal = sys.argv[i + 1]
+            i += 1
+        elif arg == "--journal-fichier" and i + 1 < len(sys.argv):
+            fichier_journal = sys.argv[i + 1]
+            i += 1
+        elif arg == "--echantillon" and i + 1 < len(sys.argv):
+            lit_échantillonnage(sys.argv[i + 1], échantillonnage)
+            i += 1
+        elif arg == "--rapport-charge" and i + 1 < len(sys.argv):
+            intervalle_rapport = float(sys.argv[i + 1]) or None  # 0 = pas de rapport
+            i += 1
+        elif arg == "--circuit-inactivite" and i + 1 < len(sys.argv):
+            inactivité_circuit = float(sys.argv[i + 1])
+            i += 1
+        elif arg == "--accepte-ancien":
+            accepte_ancien = True
+        elif arg == "--uds" and i + 1 < len(sys.argv):
+            chemin_uds = sys.argv[i + 1]
+            i += 1
+        elif arg == "--sans-uds":
+            uds = False
+        elif arg == "--workers" and i + 1 < len(sys.argv):
+            nb_workers = int(sys.argv[i + 1])
+            i += 1
         elif arg in ["-h", "--help"]:
-            print("Usage: python router.py <router_id> [-m master_ip] [-mp master_port] [-p router_port]")
+            print(USAGE)
             sys.exit(0)
         i += 1
     
-    print(f"Info: Démarrage routeur {rid} sur le port {p}")
-    print(f"Info: Master: {m}:{mp}")
+    configure_journal(niveau_journal, échantillonnage, fichier_journal)
+    journal.info(f"Démarrage routeur {rid} sur le port {p}")
+    journal.info(f"Master: {m}:{mp}")
     
     try:
-        routeur = Routeur(rid, m, mp, p)
+        routeur = Routeur(rid, m, mp, p, dossier_clés, âge_max_clés, rotation, chevauchement,
+                          processus_déchiffrement, seuil_parallèle, mode_asyncio, paquets_max,
+                          nb_threads, taille_file, surcharge, liens_persistants, nb_workers,
+                          taille_file_sortante, intervalle_rapport, inactivité_circuit, accepte_ancien,
+                          uds, chemin_uds)
         routeur.start()
     except KeyboardInterrupt:
-        print("\n[!] Arrêt par CTRL+C")
+        journal.warning("Arrêt par CTRL+C")
         if 'routeur' in locals():
             routeur.arrêt_propre()
     except Exception as e:
-        print(f"[!] Erreur démarrage: {e}")
+        journal.error(f"Erreur démarrage: {e}")
         sys.exit(1)
\ No newline at end of file